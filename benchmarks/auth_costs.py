@@ -0,0 +1,40 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from models.login_user import LoginUser
+from utils import config
+from utils.file_handler import FileHandler
+
+# Logins per second at each PBKDF2 cost, plus the one-off cost of a login
+# that upgrades a legacy base64 entry.
+# Run from the repo root: python -m benchmarks.auth_costs
+parser = argparse.ArgumentParser(description="Measure login throughput per PBKDF2 cost.")
+parser.add_argument("--costs", type=int, nargs="+", default=[10_000, 100_000, 200_000, 600_000])
+parser.add_argument("--logins", type=int, default=20)
+args = parser.parse_args()
+
+tmpdir = tempfile.mkdtemp()
+saved = config.PBKDF2_ITERATIONS
+try:
+    for cost in args.costs:
+        config.PBKDF2_ITERATIONS = cost
+        path = os.path.join(tmpdir, f"login_{cost}.csv")
+        LoginUser.add_users([LoginUser("bench@mycsu.edu", "password1", "admin")], file_path=path)
+        start = time.perf_counter()
+        for _ in range(args.logins):
+            assert LoginUser.verify("bench@mycsu.edu", "password1", file_path=path) == "admin"
+        elapsed = time.perf_counter() - start
+        print(f"cost {cost:>9,}: {args.logins / elapsed:8.1f} logins/s ({elapsed / args.logins * 1000:.1f} ms each)")
+
+    path = os.path.join(tmpdir, "legacy.csv")
+    # base64 of "password1", as the old scheme stored it
+    FileHandler.write_to_csv(path, {"email": "bench@mycsu.edu", "password": "cGFzc3dvcmQx", "role": "admin"}, LoginUser.FIELDS)
+    start = time.perf_counter()
+    LoginUser.verify("bench@mycsu.edu", "password1", file_path=path)
+    print(f"legacy entry re-hashed at cost {config.PBKDF2_ITERATIONS:,} on first login: {(time.perf_counter() - start) * 1000:.1f} ms")
+finally:
+    config.PBKDF2_ITERATIONS = saved
+    shutil.rmtree(tmpdir, ignore_errors=True)
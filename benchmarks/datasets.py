@@ -0,0 +1,45 @@
+import csv
+import random
+
+from models.login_user import LoginUser
+from models.student import Student
+from utils.encryption import hash_password
+
+FIRST_NAMES = ["Ada", "Alan", "Grace", "Linus", "Barbara", "Edsger", "Donald", "Frances", "Ken", "Margaret"]
+LAST_NAMES = ["Lovelace", "Turing", "Hopper", "Torvalds", "Liskov", "Dijkstra", "Knuth", "Allen", "Thompson", "Hamilton"]
+COURSES = [f"DATA{200 + 10 * i}" for i in range(20)]
+PASSWORD = "password1"
+# (grade, marks_range) rows of the grades.csv written next to the students
+GRADE_RANGES = [("A", "90-100"), ("B", "80-89"), ("C", "70-79"), ("D", "60-69"), ("F", "0-59")]
+
+
+def student_email(i: int) -> str:
+    return f"s{i}@mycsu.edu"
+
+
+def write_students(path: str, n: int, seed: int = 0) -> None:
+    """n students with the same rows for the same (n, seed); names repeat, emails do not."""
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(Student.FIELDS)
+        writer.writerows(
+            (
+                student_email(i),
+                rng.choice(FIRST_NAMES) + str(i % 97),
+                rng.choice(LAST_NAMES),
+                rng.choice(COURSES),
+                rng.choice("ABCDF"),
+                min(100, max(0, int(rng.gauss(72, 15)))),
+            )
+            for i in range(n)
+        )
+
+
+def write_logins(path: str, n: int) -> None:
+    """n users sharing one PBKDF2 hash of PASSWORD, so setup does not pay the cost n times."""
+    stored = hash_password(PASSWORD)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(LoginUser.FIELDS)
+        writer.writerows((student_email(i), stored, "student") for i in range(n))
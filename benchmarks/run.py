@@ -0,0 +1,241 @@
+"""
+Benchmark suite for the model operations.
+
+Run from the repo root:
+    python -m benchmarks.run                          # 1k and 100k rows
+    python -m benchmarks.run --scales 1k 100k 1m --output results.json
+    python -m benchmarks.run --scales 1k --save-baseline
+
+Every scale gets a fresh deterministic dataset. Each operation is timed
+--repeat times on a warm cache, except "load" and "load_parallel", which
+re-parse the file every time (serially, and through utils/parallel_csv.py
+on every core; the report gives the speedup of one over the other, and
+"load_parallel" is skipped on a single core, where there is none to get). Timing starts after
+one untimed warm-up call and is reported as median / p95 in milliseconds;
+each operation then runs once more under tracemalloc for its peak memory.
+Results are compared with the baseline file; the run exits with status 1
+if any operation's median is more than --threshold slower than the
+baseline.
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmarks import datasets
+from models.grade import Grade
+from models.login_user import LoginUser
+from models.student import Student
+from utils import config, parallel_csv, storage
+from utils.file_handler import FileHandler
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Below this many milliseconds a slowdown is treated as timer noise
+NOISE_MS = 0.05
+
+
+def _p95(samples: List[float]) -> float:
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+class Bench:
+    """One dataset and the operations timed against it."""
+
+    def __init__(self, directory: str, rows: int, seed: int):
+        self.rows = rows
+        self.students = os.path.join(directory, "students.csv")
+        self.logins = os.path.join(directory, "login.csv")
+        datasets.write_students(self.students, rows, seed)
+        datasets.write_logins(self.logins, min(rows, 10_000))
+        with contextlib.redirect_stdout(io.StringIO()):
+            Grade.add_new_grades(
+                [Grade(f"G{i}", letter, span) for i, (letter, span) in enumerate(datasets.GRADE_RANGES)],
+                file_path=os.path.join(directory, "grades.csv"),
+            )
+        if config.ENGINE != "csv":
+            for path in (self.students, self.logins):
+                storage.migrate(path, storage.get_engine("csv"), FileHandler._engine())
+        self.next_new = 0
+        self.next_victim = 0
+        self.middle_cursor = None
+
+    def _new_student(self) -> Student:
+        self.next_new += 1
+        return Student(f"new{self.next_new}@mycsu.edu", "New", "Student", "DATA200", "B", 80)
+
+    def _some_email(self, i: int) -> str:
+        # spread probes over the file; deletes work from the end
+        return datasets.student_email((i * 7919) % (self.rows // 2))
+
+    def operations(self) -> Dict[str, Callable[[int], object]]:
+        path = self.students
+
+        def loader(threshold, workers):
+            def load(i):
+                saved = config.PARALLEL_LOAD_BYTES, config.PARALLEL_LOAD_WORKERS
+                config.PARALLEL_LOAD_BYTES, config.PARALLEL_LOAD_WORKERS = threshold, workers
+                try:
+                    FileHandler.invalidate(path)
+                    FileHandler.read_all(path)
+                finally:
+                    config.PARALLEL_LOAD_BYTES, config.PARALLEL_LOAD_WORKERS = saved
+            return load
+
+        def delete(i):
+            self.next_victim += 1
+            Student.delete_student(datasets.student_email(self.rows - self.next_victim), file_path=path)
+
+        def middle_page(i):
+            # the first (untimed) call finds the cursor half way down the marks order
+            if self.middle_cursor is None:
+                half = Student.sort_students(by="marks", page_size=max(1, self.rows // 2), file_path=path)
+                self.middle_cursor = half["next"]
+            return Student.sort_students(by="marks", page_size=20, cursor=self.middle_cursor, file_path=path)
+
+        ops = {
+            # serial csv.DictReader vs the parallel loader on every core
+            "load": loader(0, 0),
+            "load_parallel": loader(1, parallel_csv.cores()),
+            "add": lambda i: Student.add_new_student(self._new_student(), file_path=path),
+            "bulk_add_1000": lambda i: Student.add_new_students([self._new_student() for _ in range(1000)], file_path=path),
+            "update": lambda i: Student.update_student(self._some_email(i), {"marks": i % 101}, file_path=path),
+            "delete": delete,
+            "search_by_email": lambda i: Student.search_by_email(self._some_email(i), file_path=path),
+            "search_by_name": lambda i: Student.search_by_name("ada1", file_path=path),
+            "sort_by_marks": lambda i: Student.sort_students(by="marks", file_path=path),
+            "sort_by_name": lambda i: Student.sort_students(by="name", file_path=path),
+            "sort_top10": lambda i: Student.sort_students(by="marks", descending=True, limit=10, file_path=path),
+            "sort_page_middle": middle_page,
+            "course_stats": lambda i: Student.course_stats("DATA200", file_path=path),
+            "regrade_check": lambda i: Student.regrade_course("DATA200", file_path=path, dry_run=True),
+            "authenticate": lambda i: LoginUser.authenticate(
+                datasets.student_email(i % min(self.rows, 10_000)), datasets.PASSWORD, file_path=self.logins
+            ),
+        }
+        if parallel_csv.cores() < 2:
+            del ops["load_parallel"]
+        return ops
+
+
+def measure(op: Callable[[int], object], repeat: int) -> Dict[str, float]:
+    # one untimed call first, so lazily built indexes and views are not counted
+    op(repeat + 1)
+    samples = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        op(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    tracemalloc.start()
+    op(repeat)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(_p95(samples), 4),
+        "peak_kb": round(peak / 1024, 1),
+        "samples": repeat,
+    }
+
+
+def run(scales: List[str], repeat: int, seed: int, only: List[str]) -> Dict[str, object]:
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for scale in scales:
+        directory = tempfile.mkdtemp()
+        try:
+            bench = Bench(directory, SCALES[scale], seed)
+            FileHandler.read_all(bench.students)  # warm cache for everything but "load"
+            results[scale] = {}
+            for name, op in bench.operations().items():
+                if only and name not in only:
+                    continue
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[scale][name] = measure(op, repeat)
+                print(f"{scale:>5} {name:<16} {results[scale][name]['median_ms']:>10.3f} ms  "
+                      f"p95 {results[scale][name]['p95_ms']:>10.3f} ms  peak {results[scale][name]['peak_kb']:>10.1f} KiB",
+                      file=sys.stderr)
+            if "load" in results[scale] and "load_parallel" in results[scale]:
+                speedup = results[scale]["load"]["median_ms"] / results[scale]["load_parallel"]["median_ms"]
+                results[scale]["load_parallel"]["speedup"] = round(speedup, 2)
+                print(f"{scale:>5} parallel load speedup x{speedup:.2f} ({parallel_csv.cores()} workers)", file=sys.stderr)
+            elif parallel_csv.cores() < 2 and (not only or "load_parallel" in only):
+                print(f"{scale:>5} load_parallel skipped: only one core", file=sys.stderr)
+        finally:
+            FileHandler.invalidate()
+            storage.get_engine("sqlite").close()
+            shutil.rmtree(directory, ignore_errors=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            # None when load_parallel was skipped on a single core
+            "parallel_workers": parallel_csv.cores() if parallel_csv.cores() > 1 else None,
+            "platform": platform.platform(),
+            "engine": config.ENGINE,
+            "log_mode": config.LOG_MODE,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def regressions(current: Dict[str, object], baseline: Dict[str, object], threshold: float) -> List[str]:
+    """Operations whose median is more than threshold (0.5 = 50%) slower than in baseline."""
+    found = []
+    for scale, ops in current["results"].items():
+        for name, now in ops.items():
+            before = baseline.get("results", {}).get(scale, {}).get(name)
+            if before is None:
+                continue
+            limit = before["median_ms"] * (1 + threshold)
+            if now["median_ms"] > limit and now["median_ms"] - before["median_ms"] > NOISE_MS:
+                found.append(f"{scale} {name}: {now['median_ms']:.3f} ms vs baseline {before['median_ms']:.3f} ms")
+    return found
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time every model operation at several dataset sizes.")
+    parser.add_argument("--scales", nargs="+", choices=sorted(SCALES), default=["1k", "100k"])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", default=[], help="run only these operations")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown, 0.5 = 50%%")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    report = run(args.scales, args.repeat, args.seed, args.only)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+        return 0
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline) as f:
+        found = regressions(report, json.load(f), args.threshold)
+    for line in found:
+        print("REGRESSION " + line, file=sys.stderr)
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
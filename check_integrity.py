@@ -0,0 +1,30 @@
+import argparse
+import time
+
+from utils import integrity
+
+# Report students and professors whose course_id is not in courses.csv.
+#   python check_integrity.py [--data-dir DIR]
+# Exits with status 1 when orphans are found, so it can run in a cron job or CI.
+parser = argparse.ArgumentParser(description="Scan the data files for rows referring to missing courses.")
+parser.add_argument("--data-dir", help="directory holding the CSV files (default: each model's DATA_FILE)")
+parser.add_argument("--examples", type=int, default=10, help="orphan keys to list per table")
+args = parser.parse_args()
+
+start = time.perf_counter()
+report = integrity.scan(args.data_dir, examples=args.examples)
+elapsed = time.perf_counter() - start
+
+total = 0
+print(f"{report['courses']} courses")
+for name, table in report["tables"].items():
+    total += table["orphans"]
+    print(f"{name}: {table['rows']} rows, {table['orphans']} orphaned")
+    for course_id, n in sorted(table["missing"].items(), key=lambda item: -item[1]):
+        print(f"  course_id {course_id!r}: {n} row(s)")
+    if table["examples"]:
+        print(f"  e.g. {', '.join(table['examples'])}")
+print(f"Scanned in {elapsed:.2f}s")
+if total:
+    print("Fix the rows above, or add the missing courses.")
+raise SystemExit(1 if total else 0)
@@ -0,0 +1,56 @@
+import argparse
+import os
+import time
+
+from models.student import Student
+from utils import config, datagen
+from utils.file_handler import FileHandler
+
+# Generate a complete synthetic data set (students, courses, professors,
+# grades and logins) for load testing; see utils/datagen.py.
+#   python generate_data.py --students 1000000 --out-dir /tmp/big
+# Then point the app at it, e.g. by copying the files into data/.
+parser = argparse.ArgumentParser(description="Write deterministic synthetic CSV data at any scale.")
+parser.add_argument("--students", type=int, default=1000)
+parser.add_argument("--courses", type=int, default=20)
+parser.add_argument("--professors", type=int, help="default: one per course")
+parser.add_argument(
+    "--max-courses", type=int, default=1,
+    help="most courses one student is enrolled in; above 1, enrollments share the student's email",
+)
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--password", default="password1", help="password of every generated login")
+parser.add_argument("--out-dir", default=os.path.dirname(Student.DATA_FILE))
+parser.add_argument("--force", action="store_true", help="overwrite CSV files that already exist")
+args = parser.parse_args()
+
+existing = [
+    name for name in ("students.csv", "courses.csv", "professors.csv", "grades.csv", "login.csv")
+    if os.path.exists(os.path.join(args.out_dir, name))
+]
+if existing and not args.force:
+    print(f" Value Error: {', '.join(existing)} already in {args.out_dir} (use --force to replace them)")
+    raise SystemExit(1)
+
+start = time.perf_counter()
+try:
+    counts = datagen.generate(
+        args.out_dir,
+        args.students,
+        courses=args.courses,
+        professors=args.professors,
+        seed=args.seed,
+        max_courses=args.max_courses,
+        password=args.password,
+    )
+except ValueError as e:
+    print(f" Value Error: {e}")
+    raise SystemExit(1)
+FileHandler.invalidate()
+for name, rows in counts.items():
+    print(f"{os.path.join(args.out_dir, name + '.csv')}: {rows} rows")
+print(f"Generated in {time.perf_counter() - start:.2f}s")
+
+if config.ENGINE != "csv":
+    print("CMG_ENGINE is not csv; run migrate_to_sqlite.py --force "
+          f"--data-dir {args.out_dir} to load the new files.")
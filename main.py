@@ -1,11 +1,19 @@
 # main.py
+import argparse
+import asyncio
+import contextlib
 import time
 from utils.file_handler import FileHandler
+from utils.service import GradeClient, GradeServer, LocalApi
 from models.student import Student
 from models.course import Course
 from models.professor import Professor
 from models.login_user import LoginUser
 
+# Where the menus send their reads and writes: this process (LocalApi) or a
+# running grade service (GradeClient, with --client)
+api = LocalApi()
+
 # Make sure headers exist 
 def ensure_headers():
     FileHandler.write_header_if_missing(Student.DATA_FILE, Student.FIELDS)
@@ -17,71 +25,122 @@ def seed_demo_data():
     One-time seed for demo. Run once, then comment out.
     Safe: only adds if CSVs are (nearly) empty.
     """
-    # Seed courses
-    if not FileHandler.read_all(Course.DATA_FILE):
-        Course.add_new_course(Course("DATA200", "Data Foundations", "Intro to data"))
-        Course.add_new_course(Course("DATA210", "Database Systems", "SQL and design"))
-        Course.add_new_course(Course("DATA220", "Algorithms", "Core algorithms"))
+    # Seed courses: every course the seeded rows below refer to, even if
+    # courses.csv already has others (students of a missing course are rejected)
+    known = Course.ids() or ()
+    missing = [c for c in (
+        Course("DATA200", "Data Foundations", "Intro to data"),
+        Course("DATA210", "Database Systems", "SQL and design"),
+        Course("DATA220", "Algorithms", "Core algorithms"),
+    ) if c.course_id not in known]
+    if missing:
+        Course.add_new_courses(missing)
 
     # Seed professors (one per course)
     if not FileHandler.read_all(Professor.DATA_FILE):
-        Professor.add_new_professor(Professor("P001", "Ada Lovelace", "Associate", "DATA200"))
-        Professor.add_new_professor(Professor("P002", "Alan Turing", "Full", "DATA210"))
-        Professor.add_new_professor(Professor("P003", "Grace Hopper", "Associate", "DATA220"))
+        Professor.add_new_professors([
+            Professor("P001", "Ada Lovelace", "Associate", "DATA200"),
+            Professor("P002", "Alan Turing", "Full", "DATA210"),
+            Professor("P003", "Grace Hopper", "Associate", "DATA220"),
+        ])
 
     # Seed login users (admin + one professor + one student)
-    from models.login_user import LoginUser
     if not FileHandler.read_all(LoginUser.DATA_FILE):
-        LoginUser.add_user(LoginUser("admin@mycsu.edu", "password1", "admin"))
-        LoginUser.add_user(LoginUser("prof@mycsu.edu", "profpass", "professor"))
-        LoginUser.add_user(LoginUser("student1@mycsu.edu", "studpass", "student"))
+        LoginUser.add_users([
+            LoginUser("admin@mycsu.edu", "password1", "admin"),
+            LoginUser("prof@mycsu.edu", "profpass", "professor"),
+            LoginUser("student1@mycsu.edu", "studpass", "student"),
+        ])
 
     # Seed students (only if very few exist)
     existing_students = FileHandler.read_all(Student.DATA_FILE)
     if len(existing_students) < 10:
         # Add 60 students across 3 courses with varied marks
+        students = []
         for i in range(60):
             course_id = "DATA200" if i % 3 == 0 else ("DATA210" if i % 3 == 1 else "DATA220")
             grade = "A" if i % 10 < 3 else ("B" if i % 10 < 7 else "C")
             marks = (i * 7) % 101  # spreads 0..100
-            s = Student(
+            students.append(Student(
                 f"student{i}@mycsu.edu", f"First{i}", f"Last{i}",
                 course_id, grade, marks
-            )
-            try:
-                Student.add_new_student(s)
-            except ValueError:
-                pass  # skip duplicates if you re-run accidentally
+            ))
+        # duplicates are skipped (and reported) if you re-run accidentally
+        Student.add_new_students(students)
 
 
-# Login helpers
-def get_user_role(email: str) -> str:
-    """Return role for a given email from login.csv (or '' if not found)."""
-    rows = FileHandler.read_all(LoginUser.DATA_FILE)
-    for r in rows:
-        if r.get("email") == email:
-            return r.get("role", "")
-    return ""
+# Paged listings
+PAGE_SIZE = 20
 
+def show_paged(table: str, empty_message: str, where=None, page_size: int = PAGE_SIZE):
+    """
+    Print a table's rows one page at a time with next/prev navigation.
+    Pages come from the api "rows" op: each starts at the cursor the page
+    before it returned, so every page costs the same to fetch, and paging
+    back refetches from a remembered cursor. Only one page is held in memory.
+    """
+    starts = [None]  # cursor of each page reached so far
+    page_no = 0
+    while True:
+        page = api.call("rows", table=table, where=where, limit=page_size, cursor=starts[page_no])
+        if not page["rows"] and page_no == 0:
+            print(empty_message)
+            return
+        for r in page["rows"]:
+            print(r)
+        print(f"-- page {page_no + 1} --")
+        has_next = page["next"] is not None
+        options = []
+        if has_next:
+            options.append("n) next")
+        if page_no > 0:
+            options.append("p) prev")
+        options.append("q) back")
+        choice = input(" | ".join(options) + ": ").strip().lower()
+
+        if choice == "n" and has_next:
+            del starts[page_no + 1:]
+            starts.append(page["next"])
+            page_no += 1
+        elif choice == "p" and page_no > 0:
+            page_no -= 1
+        elif choice == "q":
+            break
+        else:
+            print("Invalid choice.")
+
+
+# Login helpers
 def login_flow():
-    """Prompt for email/password and authenticate up to 3 attempts."""
+    """Prompt for email/password and authenticate up to 3 attempts; returns the session or None."""
     attempts = 0
     while attempts < 3:
         email = input("Email: ").strip()
         password = input("Password: ").strip()
-        if LoginUser.authenticate(email, password):
-            role = get_user_role(email)
-            if role:
-                print(f"Login successful. Role: {role}")
-                return email, role
+        session = api.call("login", email=email, password=password)
+        if session:
+            if session["role"]:
+                print(f"Login successful. Role: {session['role']}")
+                return session
             else:
                 print("User found but role missing. Contact admin.")
-                return None, None
+                api.call("logout", token=session["token"])
+                return None
         else:
             print("Invalid credentials. Try again.")
             attempts += 1
     print("Too many failed attempts.")
-    return None, None
+    return None
+
+def session_alive(token: str) -> bool:
+    """Check the login session before each portal action (no login.csv read)."""
+    try:
+        if api.call("session", token=token):
+            return True
+    except PermissionError:
+        pass
+    print("Your session has expired. Please log in again.")
+    return False
 
 # Students: Search & Sort submenu (Admin portal)
 def menu_students_search_sort():
@@ -98,13 +157,13 @@ def menu_students_search_sort():
 
         if choice == "1":
             email = input("Email to search: ").strip()
-            row, elapsed = Student.search_by_email(email)
+            row, elapsed = api.call("students.search_email", email=email)
             print(f"Time: {elapsed:.6f} s")
             print("Result:", row if row else "Not found")
 
         elif choice == "2":
             kw = input("Name contains: ").strip()
-            rows, elapsed = Student.search_by_name(kw)
+            rows, elapsed = api.call("students.search_name", keyword=kw)
             print(f"Time: {elapsed:.6f} s")
             print(f"Found {len(rows)} record(s).")
             for r in rows[:10]:
@@ -122,12 +181,32 @@ def menu_students_search_sort():
             else:
                 by, desc = "name", True
 
-            t0 = time.perf_counter()
-            rows = Student.sort_students(by=by, descending=desc)
-            t1 = time.perf_counter()
-            print(f"Sort time: {(t1 - t0):.6f} s")
-            for r in rows[:10]:
-                print(r)
+            # keyset pages: each one starts from the cursor of the page before
+            cursor = None
+            page_no = 1
+            while True:
+                t0 = time.perf_counter()
+                page = api.call("students.sort", by=by, descending=desc, page_size=PAGE_SIZE, cursor=cursor)
+                t1 = time.perf_counter()
+                if not page["rows"]:
+                    print("No students found.")
+                    break
+                for r in page["rows"]:
+                    print(r)
+                print(f"-- page {page_no} -- ({(t1 - t0):.6f} s)")
+                options = []
+                if page["next"]:
+                    options.append("n) next")
+                if page["previous"]:
+                    options.append("p) prev")
+                options.append("q) back")
+                move = input(" | ".join(options) + ": ").strip().lower()
+                if move == "n" and page["next"]:
+                    cursor, page_no = page["next"], page_no + 1
+                elif move == "p" and page["previous"]:
+                    cursor, page_no = page["previous"], page_no - 1
+                elif move == "q":
+                    break
 
         elif choice == "7":
             break
@@ -154,18 +233,15 @@ def menu_students_admin():
             grade = input("Grade: ").strip()
             marks = input("Marks: ").strip()
             try:
-                s = Student(email, first, last, course, grade, marks)
-                Student.add_new_student(s)
+                api.call("add", table="students", fields={
+                    "email": email, "first_name": first, "last_name": last,
+                    "course_id": course, "grade": grade, "marks": marks,
+                })
             except ValueError as e:
                 print(f"Error: {e}")
 
         elif choice == "2":
-            rows = FileHandler.read_all(Student.DATA_FILE)
-            if not rows:
-                print("No students yet.")
-            else:
-                for r in rows:
-                    print(r)
+            show_paged("students", "No students yet.")
 
         elif choice == "3":
             email = input("Email to update: ").strip()
@@ -178,7 +254,7 @@ def menu_students_admin():
                 data["marks"] = marks
             try:
                 if data:
-                    Student.update_student(email, data)
+                    api.call("update", table="students", key=email, data=data)
                 else:
                     print("Nothing to update.")
             except ValueError as e:
@@ -187,7 +263,7 @@ def menu_students_admin():
         elif choice == "4":
             email = input("Email to delete: ").strip()
             try:
-                Student.delete_student(email)
+                api.call("delete", table="students", key=email)
             except ValueError as e:
                 print(f"Error: {e}")
 
@@ -214,18 +290,12 @@ def menu_courses_admin():
             name = input("Course name: ").strip()
             desc = input("Description: ").strip()
             try:
-                c = Course(cid, name, desc)
-                Course.add_new_course(c)
+                api.call("add", table="courses", fields={"course_id": cid, "name": name, "description": desc})
             except ValueError as e:
                 print(f"Error: {e}")
 
         elif choice == "2":
-            rows = FileHandler.read_all(Course.DATA_FILE)
-            if not rows:
-                print("No courses yet.")
-            else:
-                for r in rows:
-                    print(r)
+            show_paged("courses", "No courses yet.")
 
         elif choice == "3":
             cid = input("Course ID to update: ").strip()
@@ -238,7 +308,7 @@ def menu_courses_admin():
                 data["description"] = new_desc
             try:
                 if data:
-                    Course.update_course(cid, data)
+                    api.call("update", table="courses", key=cid, data=data)
                 else:
                     print("Nothing to update.")
             except ValueError as e:
@@ -246,8 +316,22 @@ def menu_courses_admin():
 
         elif choice == "4":
             cid = input("Course ID to delete: ").strip()
+            students, professors = api.call("courses.dependents", course_id=cid)
+            options = {}
+            if students or professors:
+                print(f"{students} student(s) and {professors} professor(s) are in {cid}.")
+                print("1) Delete them too")
+                print("2) Move them to another course")
+                print("3) Cancel")
+                how = input("Choose: ").strip()
+                if how == "1":
+                    options = {"cascade": "delete"}
+                elif how == "2":
+                    options = {"cascade": "reassign", "reassign_to": input("Move them to course ID: ").strip()}
+                else:
+                    continue
             try:
-                Course.delete_course(cid)
+                api.call("delete", table="courses", key=cid, **options)
             except ValueError as e:
                 print(f"Error: {e}")
 
@@ -272,18 +356,12 @@ def menu_professors_admin():
             rank = input("Rank: ").strip()
             cid = input("Course ID: ").strip()
             try:
-                p = Professor(pid, name, rank, cid)
-                Professor.add_new_professor(p)
+                api.call("add", table="professors", fields={"prof_id": pid, "name": name, "rank": rank, "course_id": cid})
             except ValueError as e:
                 print(f"Error: {e}")
 
         elif choice == "2":
-            rows = FileHandler.read_all(Professor.DATA_FILE)
-            if not rows:
-                print("No professors yet.")
-            else:
-                for r in rows:
-                    print(r)
+            show_paged("professors", "No professors yet.")
 
         elif choice == "3":
             pid = input("Professor ID to update: ").strip()
@@ -299,7 +377,7 @@ def menu_professors_admin():
                 data["course_id"] = new_course
             try:
                 if data:
-                    Professor.update_professor(pid, data)
+                    api.call("update", table="professors", key=pid, data=data)
                 else:
                     print("Nothing to update.")
             except ValueError as e:
@@ -308,7 +386,7 @@ def menu_professors_admin():
         elif choice == "4":
             pid = input("Professor ID to delete: ").strip()
             try:
-                Professor.delete_professor(pid)
+                api.call("delete", table="professors", key=pid)
             except ValueError as e:
                 print(f"Error: {e}")
 
@@ -318,7 +396,7 @@ def menu_professors_admin():
             print("Invalid choice.")
 
 # Professor Portal (limited)
-def menu_professor_portal(email: str):
+def menu_professor_portal(token: str):
     """
     Professor portal:
     - List ALL students
@@ -326,38 +404,33 @@ def menu_professor_portal(email: str):
     - Search student by email (timed)
     - Update a student's grade/marks
     - Course stats (avg/median/min/max)
+    - Regrade a course from grades.csv
+    - Enter a whole course's marks, saved together
     """
     while True:
+        if not session_alive(token):
+            return
         print("\n=== Professor Portal ===")
         print("1) List ALL students")
         print("2) List students by course_id")
         print("3) Search student by email (timed)")
         print("4) Update student grade/marks")
         print("5) Course stats (avg/median/min/max)")
-        print("6) Back")
+        print("6) Regrade course from grades.csv")
+        print("7) Enter marks for a course")
+        print("8) Back")
         choice = input("Choose: ").strip()
 
         if choice == "1":
-            rows = FileHandler.read_all(Student.DATA_FILE)
-            if not rows:
-                print("No students found.")
-            else:
-                for r in rows:
-                    print(r)
+            show_paged("students", "No students found.")
 
         elif choice == "2":
             cid = input("Course ID: ").strip()
-            rows = FileHandler.read_all(Student.DATA_FILE)
-            filtered = [r for r in rows if r.get("course_id") == cid]
-            if not filtered:
-                print("No students for that course.")
-            else:
-                for r in filtered:
-                    print(r)
+            show_paged("students", "No students for that course.", where={"course_id": cid})
 
         elif choice == "3":
             email_q = input("Student email to search: ").strip()
-            row, elapsed = Student.search_by_email(email_q)
+            row, elapsed = api.call("students.search_email", email=email_q)
             print(f"Time: {elapsed:.6f} s")
             print("Result:", row if row else "Not found")
 
@@ -374,14 +447,14 @@ def menu_professor_portal(email: str):
                 print("Nothing to update.")
                 continue
             try:
-                Student.update_student(target_email, data)
+                api.call("update", table="students", key=target_email, data=data)
                 print("Update successful.")
             except ValueError as e:
                 print(f"Error: {e}")
 
         elif choice == "5":
             cid = input("Course ID for stats: ").strip()
-            stats = Student.course_stats(cid)
+            stats = api.call("students.course_stats", course_id=cid)
             if not stats:
                 print("No marks found for that course.")
             else:
@@ -394,27 +467,92 @@ def menu_professor_portal(email: str):
                 print(f"Max:      {stats['max']}")
 
         elif choice == "6":
+            cid = input("Course ID to regrade: ").strip()
+            try:
+                report = api.call("students.regrade", course_id=cid, dry_run=True)
+            except ValueError as e:
+                print(f"Error: {e}")
+                continue
+            print(f"{report['students']} students, {len(report['changed'])} with a grade that disagrees with their marks:")
+            for email, stored, computed in report["changed"][:10]:
+                print(f"  {email}: {stored or '-'} -> {computed}")
+            if report["ungradable"]:
+                print(f"{len(report['ungradable'])} students have marks outside every grade range (left as they are).")
+            if report["changed"] and input("Apply these grades? (y/n): ").strip().lower() == "y":
+                try:
+                    report = api.call("students.regrade", course_id=cid)
+                    print(f"{len(report['changed'])} grades updated.")
+                except ValueError as e:
+                    print(f"Error: {e}")
+
+        elif choice == "7":
+            enter_course_marks()
+
+        elif choice == "8":
             break
         else:
             print("Invalid choice.")
 
 
 
+def enter_course_marks():
+    """
+    Ask for the marks of every student in one course, then save them all
+    with one write (or none, if any entry is rejected).
+    """
+    cid = input("Course ID: ").strip()
+    students = list(api.iter_rows("students", where={"course_id": cid}))
+    if not students:
+        print("No students for that course.")
+        return
+    print(f"{len(students)} students. Enter new marks; blank keeps the current marks, q stops early.")
+    changes = {}
+    for row in students:
+        while True:
+            entry = input(f"{row['email']} ({row['first_name']} {row['last_name']}) [{row['marks']}]: ").strip()
+            if entry == "" or entry.lower() == "q" or entry.isdigit():
+                break
+            print("Marks must be a whole number.")
+        if entry.lower() == "q":
+            break
+        if entry and entry != row["marks"]:
+            changes[row["email"]] = {"marks": entry}
+    if not changes:
+        print("Nothing to update.")
+        return
+    if input(f"Save {len(changes)} changed marks? (y/n): ").strip().lower() != "y":
+        print("Discarded.")
+        return
+    try:
+        api.call("students.update_many", changes=changes)
+        print(f"{len(changes)} marks saved.")
+    except ValueError as e:
+        print(f"Error: {e} (nothing was saved)")
+        return
+    if input("Set letter grades from grades.csv too? (y/n): ").strip().lower() == "y":
+        try:
+            report = api.call("students.regrade", course_id=cid)
+            print(f"{len(report['changed'])} grades updated.")
+        except ValueError as e:
+            print(f"Error: {e}")
+
+
 # Student Portal (limited)
-def menu_student_portal(email: str):
+def menu_student_portal(token: str, email: str):
     """
     Simple student portal:
     - View your own record
     """
     while True:
+        if not session_alive(token):
+            return
         print("\n=== Student Portal ===")
         print("1) View my record")
         print("2) Back")
         choice = input("Choose: ").strip()
 
         if choice == "1":
-            rows = FileHandler.read_all(Student.DATA_FILE)
-            me = next((r for r in rows if r.get("email") == email), None)
+            me = api.call("get", table="students", key=email)
             print("Your record:", me if me else "Not found")
         elif choice == "2":
             break
@@ -422,15 +560,55 @@ def menu_student_portal(email: str):
             print("Invalid choice.")
 
 
+# Metrics submenu (Admin portal); reports on the process doing the work,
+# which is the grade service in --client mode
+def menu_metrics():
+    while True:
+        state = api.call("metrics.report")
+        print("\n=== Metrics ===")
+        print(f"Recording: {'on' if state['enabled'] else 'off'}")
+        print("1) Show")
+        print("2) Turn recording " + ("off" if state["enabled"] else "on"))
+        print("3) Reset")
+        print("4) Dump to file")
+        print("5) Back")
+        choice = input("Choose: ").strip()
+
+        if choice == "1":
+            if len(state["lines"]) == 1:
+                print("Nothing recorded yet.")
+            for line in state["lines"]:
+                print(line)
+        elif choice == "2":
+            api.call("metrics.enable", on=not state["enabled"])
+        elif choice == "3":
+            api.call("metrics.reset")
+            print("Metrics cleared.")
+        elif choice == "4":
+            name = input("File name (default metrics.json): ").strip() or "metrics.json"
+            try:
+                path = api.call("metrics.dump", name=name)
+                print(f"Metrics written to {path}")
+            except (OSError, ValueError) as e:
+                print(f"Error: {e}")
+        elif choice == "5":
+            break
+        else:
+            print("Invalid choice.")
+
+
 # Admin Portal (full control + search/sort)
-def menu_admin():
+def menu_admin(token: str):
     while True:
+        if not session_alive(token):
+            return
         print("\n=== Admin Portal ===")
         print("1) Students")
         print("2) Courses")
         print("3) Professors")
         print("4) Search & Sort Students (timed)")
-        print("5) Back")
+        print("5) Metrics")
+        print("6) Back")
         choice = input("Choose: ").strip()
 
         if choice == "1":
@@ -442,6 +620,8 @@ def menu_admin():
         elif choice == "4":
             menu_students_search_sort()
         elif choice == "5":
+            menu_metrics()
+        elif choice == "6":
             break
         else:
             print("Invalid choice.")
@@ -449,9 +629,27 @@ def menu_admin():
 
 # MAIN
 def main():
-    ensure_headers()
+    global api
+    parser = argparse.ArgumentParser(description="CheckMyGrade")
+    parser.add_argument("--serve", action="store_true", help="run the grade service on a Unix socket")
+    parser.add_argument("--client", action="store_true", help="use a running grade service instead of the CSV files")
+    parser.add_argument("--socket", help="socket path of the grade service")
+    args = parser.parse_args()
+
+    if args.client:
+        try:
+            api = GradeClient(args.socket)
+        except OSError as e:
+            print(f"Cannot reach the grade service: {e}")
+            return
+    else:
+        ensure_headers()
+    if args.serve:
+        asyncio.run(GradeServer(args.socket).serve_forever())
+        return
     # added a seed_demo_data to add synthetic data for average/median data purposes 
     # seed_demo_data()
+    # (for large data sets use generate_data.py instead)
 
     while True:
         print("\n===== CheckMyGrade =====")
@@ -460,18 +658,21 @@ def main():
         choice = input("Choose: ").strip()
 
         if choice == "1":
-            email, role = login_flow()
-            if not email:
+            session = login_flow()
+            if not session:
                 continue
 
+            token, role = session["token"], session["role"]
             if role == "admin":
-                menu_admin()
+                menu_admin(token)
             elif role == "professor":
-                menu_professor_portal(email)
+                menu_professor_portal(token)
             elif role == "student":
-                menu_student_portal(email)
+                menu_student_portal(token, session["email"])
             else:
                 print("Unknown role. Contact admin.")
+            with contextlib.suppress(PermissionError):  # already expired
+                api.call("logout", token=token)
 
         elif choice == "2":
             print("Goodbye!")
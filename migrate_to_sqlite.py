@@ -0,0 +1,29 @@
+import argparse
+import os
+
+from models.course import Course
+from models.grade import Grade
+from models.login_user import LoginUser
+from models.professor import Professor
+from models.student import Student
+from utils import storage
+
+# Copy every CSV table (including any pending change log) into the SQLite
+# database used when CMG_ENGINE=sqlite. The CSV files are left untouched.
+parser = argparse.ArgumentParser(description="Copy the CSV data files into SQLite.")
+parser.add_argument("--data-dir", help="directory holding the CSV files (default: each model's DATA_FILE)")
+parser.add_argument("--force", action="store_true", help="replace tables that already exist in SQLite")
+args = parser.parse_args()
+
+source = storage.get_engine("csv")
+target = storage.get_engine("sqlite")
+for model in (Student, Course, Professor, Grade, LoginUser):
+    path = model.DATA_FILE
+    if args.data_dir:
+        path = os.path.join(args.data_dir, os.path.basename(path))
+    try:
+        copied = storage.migrate(path, source, target, replace=args.force)
+        print(f"{path}: {copied} rows copied")
+    except ValueError as e:
+        print(f" Value Error: {e} (use --force to replace it)")
+target.close()
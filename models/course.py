@@ -1,8 +1,12 @@
+from utils import config, metrics
 from utils.file_handler import FileHandler
+from utils.query import Query
 
 class Course:
     DATA_FILE = "data/courses.csv"
+    KEY = "course_id"
     FIELDS = ["course_id", "name", "description"]
+    __slots__ = ("course_id", "name", "description")
 
     def __init__(self, course_id, name, description):
         self.course_id = course_id
@@ -12,44 +16,139 @@ class Course:
     def display_courses(self):
         print(f"{self.course_id}: {self.name} - {self.description}")
 
+    @staticmethod
+    def query(file_path: str = None) -> Query:
+        """A query over the courses table; see utils/query.py."""
+        return Query(file_path or Course.DATA_FILE, key=Course.KEY)
+
     # use static method so we do not need to call on an instance
     # we can call it on an object 
     @staticmethod
+    @metrics.timed
     def add_new_course(course, file_path: str = None):
         file_path = file_path or Course.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        # Make sure that this course does not already exist
-        if any(r.get("course_id") == course.course_id for r in rows):
-            raise ValueError("Course ID already exists")
+        # Hold the lock so no other process adds the same course in between
+        with FileHandler.locked(file_path):
+            # Make sure that this course does not already exist
+            if FileHandler.exists(file_path, Course.KEY, course.course_id):
+                raise ValueError("Course ID already exists")
 
-        # Create the row to be added to the csv file
-        row = {
+            # Create the row to be added to the csv file
+            row = Course._to_row(course)
+            # add to csv file 
+            FileHandler.write_to_csv(file_path, row, fieldnames=Course.FIELDS)
+        print(f"Course {course.course_id} added successfully!")
+
+    # add many courses with one duplicate check and one write;
+    # returns (course_id, "inserted" | "duplicate" | "invalid") per course
+    @staticmethod
+    @metrics.timed
+    def add_new_courses(courses, file_path: str = None):
+        file_path = file_path or Course.DATA_FILE
+        report = FileHandler.insert_many(
+            file_path, (Course._to_row(c) for c in courses), Course.KEY, Course.FIELDS
+        )
+        inserted = sum(1 for _, status in report if status == "inserted")
+        print(f"{inserted} of {len(report)} courses added successfully!")
+        return report
+
+    @staticmethod
+    def _to_row(course):
+        return {
             "course_id": course.course_id,
             "name": course.name,
             "description": course.description,
         }
-        # add to csv file 
-        FileHandler.write_to_csv(file_path, row, fieldnames=Course.FIELDS)
-        print(f"Course {course.course_id} added successfully!")
+
+    # FOREIGN KEYS
+    # students.csv and professors.csv refer to courses by course_id, within
+    # one data directory (see FileHandler.beside). Their writes check the id
+    # against the course key index (O(1) per row), and a course that is
+    # still referenced is only deleted with a cascade. A directory without
+    # courses.csv has nothing to check against.
+    @staticmethod
+    def ids(file_path: str = None):
+        """Every course_id as a set-like view of the key index; None if there is no courses file."""
+        return FileHandler.keys(file_path or Course.DATA_FILE, Course.KEY)
+
+    @staticmethod
+    def check_ids(course_ids, file_path: str = None):
+        """Raise ValueError naming any of course_ids that is not a course."""
+        known = Course.ids(file_path) if config.FOREIGN_KEYS else None
+        if known is None:
+            return
+        unknown = sorted({str(c) for c in course_ids if c not in known})
+        if unknown:
+            raise ValueError(f"Unknown course_id: {', '.join(unknown)}")
+
+    @staticmethod
+    def _dependent_files(file_path: str = None):
+        # imported here: both models import Course for their course_id checks
+        from models.professor import Professor
+        from models.student import Student
+        return FileHandler.beside(file_path, Student.DATA_FILE), FileHandler.beside(file_path, Professor.DATA_FILE)
+
+    @staticmethod
+    def dependents(course_id, file_path: str = None):
+        """(students, professors) that refer to course_id, next to the courses file."""
+        return tuple(FileHandler.count(path, "course_id", course_id) for path in Course._dependent_files(file_path))
 
     @staticmethod
-    def delete_course(course_id, file_path: str = None):
+    @metrics.timed
+    def delete_course(course_id, file_path: str = None, cascade: str = None, reassign_to: str = None):
+        """
+        Delete a course. Students and professors of the course stop it
+        (ValueError) unless cascade is "delete", which removes them too, or
+        "reassign", which moves them to the course reassign_to. Each
+        dependent file is changed with one write.
+        """
+        dependent_files = Course._dependent_files(file_path)
         file_path = file_path or Course.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if not any(r.get("course_id") == course_id for r in rows):
-            raise ValueError(f"No course found with id: {course_id}")
+        if cascade not in (None, "delete", "reassign"):
+            raise ValueError(f"Unknown cascade: {cascade} (use 'delete' or 'reassign')")
+        student_file, professor_file = dependent_files
+        # Hold every lock so no student or professor joins the course meanwhile
+        with FileHandler.locked(file_path), FileHandler.locked(student_file), FileHandler.locked(professor_file):
+            if not FileHandler.exists(file_path, Course.KEY, course_id):
+                raise ValueError(f"No course found with id: {course_id}")
+            students, professors = (FileHandler.count(path, "course_id", course_id) for path in dependent_files)
+            if students or professors:
+                if cascade is None and config.FOREIGN_KEYS:
+                    raise ValueError(
+                        f"Course {course_id} still has {students} student(s) and {professors} professor(s); "
+                        "delete them with it or reassign them"
+                    )
+                if cascade == "reassign":
+                    if reassign_to == course_id or not FileHandler.exists(file_path, Course.KEY, reassign_to):
+                        raise ValueError(f"Cannot reassign to course: {reassign_to}")
+                    for dependent in dependent_files:
+                        FileHandler.update_csv(dependent, "course_id", course_id, {"course_id": reassign_to})
+                elif cascade == "delete":
+                    for dependent in dependent_files:
+                        FileHandler.delete_from_csv(dependent, "course_id", course_id)
 
-        FileHandler.delete_from_csv(file_path, "course_id", course_id)
+            FileHandler.delete_from_csv(file_path, "course_id", course_id)
         print(f"Course {course_id} deleted successfully!")
+        if cascade and (students or professors):
+            done = "moved to " + reassign_to if cascade == "reassign" else "deleted"
+            print(f"{students} student(s) and {professors} professor(s) {done}.")
 
     @staticmethod
+    @metrics.timed
     def update_course(course_id, updated_data, file_path: str = None):
+        near = file_path
         file_path = file_path or Course.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        # make sure that the course exists
-        if not any(r.get("course_id") == course_id for r in rows):
-            raise ValueError(f"No course found with id: {course_id}")
+        with FileHandler.locked(file_path):
+            # make sure that the course exists
+            if not FileHandler.exists(file_path, Course.KEY, course_id):
+                raise ValueError(f"No course found with id: {course_id}")
+            new_id = updated_data.get("course_id", course_id)
+            if new_id != course_id:
+                if FileHandler.exists(file_path, Course.KEY, new_id):
+                    raise ValueError("Course ID already exists")
+                if config.FOREIGN_KEYS and any(Course.dependents(course_id, near)):
+                    raise ValueError(f"Course {course_id} has students or professors; its id cannot change")
 
-        # update course in csv file 
-        FileHandler.update_csv(file_path, "course_id", course_id, updated_data)
+            # update course in csv file 
+            FileHandler.update_csv(file_path, "course_id", course_id, updated_data)
         print(f"Course {course_id} updated successfully!")
@@ -1,8 +1,13 @@
+from utils import metrics
 from utils.file_handler import FileHandler
+from utils.query import Query
+from utils.grading import GradeScale
 
 class Grade:
     DATA_FILE = "data/grades.csv"
+    KEY = "grade_id"
     FIELDS = ["grade_id", "grade", "marks_range"]  
+    __slots__ = ("grade_id", "grade", "marks_range")
 
     def __init__(self, grade_id, grade, marks_range):
         self.grade_id = grade_id
@@ -13,36 +18,82 @@ class Grade:
         print(f"Grade {self.grade} -> Marks Range: {self.marks_range}")
 
     @staticmethod
+    def query(file_path: str = None) -> Query:
+        """A query over the grades table; see utils/query.py."""
+        return Query(file_path or Grade.DATA_FILE, key=Grade.KEY)
+
+    @staticmethod
+    @metrics.timed
     def add_new_grade(grade, file_path: str = None):
         file_path = file_path or Grade.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if any(r.get("grade_id") == grade.grade_id for r in rows):
-            raise ValueError("Grade ID already exists")
+        with FileHandler.locked(file_path):
+            if FileHandler.exists(file_path, Grade.KEY, grade.grade_id):
+                raise ValueError("Grade ID already exists")
+
+            row = Grade._to_row(grade)
+            # the scale with the new band must still parse and not overlap
+            GradeScale.from_rows(FileHandler.read_all(file_path) + [row])
+            FileHandler.write_to_csv(file_path, row, fieldnames=Grade.FIELDS)
+        print(f"Grade {grade.grade_id} added successfully!")
+
+    @staticmethod
+    @metrics.timed
+    def add_new_grades(grades, file_path: str = None):
+        file_path = file_path or Grade.DATA_FILE
+        scale_rows = FileHandler.read_all(file_path)
+        ids = {r["grade_id"] for r in scale_rows}
 
-        row = {
+        # "invalid": a malformed range, or one overlapping a grade in the file or earlier in the batch
+        def fits(row):
+            if row["grade_id"] in ids:
+                return True  # reported as a duplicate
+            try:
+                GradeScale.from_rows(scale_rows + [row])
+            except ValueError:
+                return False
+            ids.add(row["grade_id"])
+            scale_rows.append(row)
+            return True
+
+        report = FileHandler.insert_many(
+            file_path, (Grade._to_row(g) for g in grades), Grade.KEY, Grade.FIELDS, validate=fits
+        )
+        inserted = sum(1 for _, status in report if status == "inserted")
+        print(f"{inserted} of {len(report)} grades added successfully!")
+        return report
+
+    @staticmethod
+    def _to_row(grade):
+        return {
             "grade_id": grade.grade_id,
             "grade": grade.grade,
             "marks_range": grade.marks_range,
         }
-        FileHandler.write_to_csv(file_path, row, fieldnames=Grade.FIELDS)
-        print(f"Grade {grade.grade_id} added successfully!")
 
     @staticmethod
+    @metrics.timed
     def delete_grade(grade_id, file_path: str = None):
         file_path = file_path or Grade.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if not any(r.get("grade_id") == grade_id for r in rows):
+        if not FileHandler.exists(file_path, Grade.KEY, grade_id):
             raise ValueError(f"No grade found with id: {grade_id}")
 
         FileHandler.delete_from_csv(file_path, "grade_id", grade_id)
         print(f"Grade {grade_id} deleted successfully!")
 
     @staticmethod
+    @metrics.timed
     def update_grade(grade_id, updated_data, file_path: str = None):
         file_path = file_path or Grade.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if not any(r.get("grade_id") == grade_id for r in rows):
+        if not FileHandler.exists(file_path, Grade.KEY, grade_id):
             raise ValueError(f"No grade found with id: {grade_id}")
+        if "grade" in updated_data or "marks_range" in updated_data:
+            rows = FileHandler.read_all(file_path)
+            GradeScale.from_rows({**r, **updated_data} if r["grade_id"] == grade_id else r for r in rows)
 
         FileHandler.update_csv(file_path, "grade_id", grade_id, updated_data)
         print(f"Grade {grade_id} updated successfully!")
+
+    @staticmethod
+    def scale(file_path: str = None) -> GradeScale:
+        """The grading scale of grades.csv; ValueError if a range is malformed or overlaps another."""
+        return GradeScale.from_rows(FileHandler.read_all(file_path or Grade.DATA_FILE))
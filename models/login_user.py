@@ -1,75 +1,137 @@
+from utils.auth import sessions
+from utils import metrics
 from utils.file_handler import FileHandler
-from utils.encryption import encrypt, decrypt
+from utils.query import Query
+from utils.encryption import hash_password, needs_rehash, verify_password
 
 class LoginUser:
     DATA_FILE = "data/login.csv"
+    KEY = "email"
     FIELDS = ["email", "password", "role"]
+    __slots__ = ("email", "password", "role")
 
     def __init__(self, email, password, role):
         self.email = email
-        self.password = password  # plain in memory; will be encrypted on write
+        self.password = password  # plain in memory; will be hashed on write
         self.role = role
 
     @staticmethod
+    def query(file_path: str = None) -> Query:
+        """A query over the login table; see utils/query.py."""
+        return Query(file_path or LoginUser.DATA_FILE, key=LoginUser.KEY)
+
+    @staticmethod
+    @metrics.timed
     def add_user(user, file_path: str = None):
         """
-        Adds a user with encrypted password. Enforces unique email.
+        Adds a user with a hashed password. Enforces unique email.
         """
         file_path = file_path or LoginUser.DATA_FILE
-        rows = FileHandler.read_all(file_path)
 
-        if any(r.get("email") == user.email for r in rows):
-            raise ValueError("Email already exists")
+        with FileHandler.locked(file_path):
+            if FileHandler.exists(file_path, LoginUser.KEY, user.email):
+                raise ValueError("Email already exists")
+
+            row = LoginUser._to_row(user)
+            FileHandler.write_to_csv(file_path, row, fieldnames=LoginUser.FIELDS)
+        print(f"User {user.email} added successfully!")
 
-        row = {
+    @staticmethod
+    @metrics.timed
+    def add_users(users, file_path: str = None):
+        """
+        Adds many users in one write. Returns (email, status) per user where
+        status is "inserted", "duplicate" or "invalid" (no password or role).
+        """
+        file_path = file_path or LoginUser.DATA_FILE
+        # Validate the plain password, and only hash rows that get written
+        report = FileHandler.insert_many(
+            file_path,
+            ({"email": u.email, "password": u.password, "role": u.role} for u in users),
+            LoginUser.KEY,
+            LoginUser.FIELDS,
+            validate=lambda r: bool(r["password"]) and bool(r["role"]),
+            prepare=lambda r: {**r, "password": hash_password(r["password"])},
+        )
+        inserted = sum(1 for _, status in report if status == "inserted")
+        print(f"{inserted} of {len(report)} users added successfully!")
+        return report
+
+    @staticmethod
+    def _to_row(user):
+        return {
             "email": user.email,
-            "password": encrypt(user.password),
+            "password": hash_password(user.password),
             "role": user.role,
         }
-        FileHandler.write_to_csv(file_path, row, fieldnames=LoginUser.FIELDS)
-        print(f"User {user.email} added successfully!")
 
     @staticmethod
+    @metrics.timed
     def delete_user(email, file_path: str = None):
         file_path = file_path or LoginUser.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if not any(r.get("email") == email for r in rows):
+        if not FileHandler.exists(file_path, LoginUser.KEY, email):
             raise ValueError(f"No user found with email: {email}")
 
         FileHandler.delete_from_csv(file_path, "email", email)
         print(f"User {email} deleted successfully!")
 
     @staticmethod
+    @metrics.timed
     def update_user(email, updated_data, file_path: str = None):
         """
-        Updates fields; if 'password' is present it will be re-encrypted.
+        Updates fields; if 'password' is present it will be re-hashed.
         """
         file_path = file_path or LoginUser.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if not any(r.get("email") == email for r in rows):
+        if not FileHandler.exists(file_path, LoginUser.KEY, email):
             raise ValueError(f"No user found with email: {email}")
 
         if "password" in updated_data:
             updated_data = dict(updated_data)  # shallow copy
-            updated_data["password"] = encrypt(updated_data["password"])
+            updated_data["password"] = hash_password(updated_data["password"])
 
         FileHandler.update_csv(file_path, "email", email, updated_data)
         print(f"User {email} updated successfully!")
 
     @staticmethod
+    @metrics.timed
+    def verify(email, password, file_path: str = None):
+        """
+        Returns the user's role if a user exists and password matches, else
+        None, from one lookup in the email index. Legacy base64 passwords
+        and hashes of another cost are re-hashed on success.
+        """
+        file_path = file_path or LoginUser.DATA_FILE
+        r = FileHandler.find_row(file_path, LoginUser.KEY, email)
+        if r is None:
+            return None
+        stored = r.get("password", "")
+        if not verify_password(password, stored):
+            return None
+        if needs_rehash(stored):
+            LoginUser.store_hash(email, hash_password(password), file_path)
+        return r.get("role", "")
+
+    @staticmethod
+    def store_hash(email, stored, file_path: str = None):
+        """Replace the stored password hash of email with an already computed one."""
+        FileHandler.update_csv(file_path or LoginUser.DATA_FILE, LoginUser.KEY, email, {"password": stored})
+
+    @staticmethod
+    @metrics.timed
     def authenticate(email, password, file_path: str = None) -> bool:
         """
         Returns True if a user exists and password matches.
         """
-        file_path = file_path or LoginUser.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        for r in rows:
-            if r.get("email") == email:
-                try:
-                    return decrypt(r.get("password", "")) == password
-                except Exception:
-                    return False
-        return False
+        return LoginUser.verify(email, password, file_path) is not None
+
+    @staticmethod
+    @metrics.timed
+    def start_session(email, password, file_path: str = None):
+        """Verify the credentials and open a session; returns the Session or None."""
+        role = LoginUser.verify(email, password, file_path)
+        if role is None:
+            return None
+        return sessions.issue(email, role)
 
     def login(self, entered_password) -> bool:
         return self.password == entered_password
@@ -1,8 +1,13 @@
+from models.course import Course
+from utils import config, metrics
 from utils.file_handler import FileHandler
+from utils.query import Query
 
 class Professor:
     DATA_FILE = "data/professors.csv"
+    KEY = "prof_id"
     FIELDS = ["prof_id", "name", "rank", "course_id"]
+    __slots__ = ("prof_id", "name", "rank", "course_id")
 
     def __init__(self, prof_id, name, rank, course_id):
         self.prof_id = prof_id
@@ -14,37 +19,76 @@ class Professor:
         print(f"{self.name} ({self.rank}) - {self.course_id}")
 
     @staticmethod
+    def query(file_path: str = None) -> Query:
+        """A query over the professors table; see utils/query.py."""
+        return Query(file_path or Professor.DATA_FILE, key=Professor.KEY)
+
+    @staticmethod
+    @metrics.timed
     def add_new_professor(professor, file_path: str = None):
+        courses_file = FileHandler.beside(file_path, Course.DATA_FILE)
+        file_path = file_path or Professor.DATA_FILE
+        with FileHandler.locked(file_path):
+            if FileHandler.exists(file_path, Professor.KEY, professor.prof_id):
+                raise ValueError("Professor ID already exists")
+            Course.check_ids([professor.course_id], courses_file)
+
+            row = Professor._to_row(professor)
+            FileHandler.write_to_csv(file_path, row, fieldnames=Professor.FIELDS)
+        print(f"Professor {professor.prof_id} added successfully!")
+
+    @staticmethod
+    @metrics.timed
+    def add_new_professors(professors, file_path: str = None):
+        courses_file = FileHandler.beside(file_path, Course.DATA_FILE)
         file_path = file_path or Professor.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if any(r.get("prof_id") == professor.prof_id for r in rows):
-            raise ValueError("Professor ID already exists")
+        # rows whose course_id is not in courses.csv come back "invalid"
+        courses = Course.ids(courses_file) if config.FOREIGN_KEYS else None
+        report = FileHandler.insert_many(
+            file_path,
+            (Professor._to_row(p) for p in professors),
+            Professor.KEY,
+            Professor.FIELDS,
+            validate=None if courses is None else lambda r: r["course_id"] in courses,
+        )
+        inserted = sum(1 for _, status in report if status == "inserted")
+        print(f"{inserted} of {len(report)} professors added successfully!")
+        return report
 
-        row = {
+    @staticmethod
+    def _to_row(professor):
+        return {
             "prof_id": professor.prof_id,
             "name": professor.name,
             "rank": professor.rank,
             "course_id": professor.course_id,
         }
-        FileHandler.write_to_csv(file_path, row, fieldnames=Professor.FIELDS)
-        print(f"Professor {professor.prof_id} added successfully!")
 
     @staticmethod
+    @metrics.timed
     def delete_professor(prof_id, file_path: str = None):
         file_path = file_path or Professor.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if not any(r.get("prof_id") == prof_id for r in rows):
+        if not FileHandler.exists(file_path, Professor.KEY, prof_id):
             raise ValueError(f"No professor found with id: {prof_id}")
 
         FileHandler.delete_from_csv(file_path, "prof_id", prof_id)
         print(f"Professor {prof_id} deleted successfully!")
 
     @staticmethod
+    @metrics.timed
     def update_professor(prof_id, updated_data, file_path: str = None):
+        courses_file = FileHandler.beside(file_path, Course.DATA_FILE)
         file_path = file_path or Professor.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if not any(r.get("prof_id") == prof_id for r in rows):
+        if not FileHandler.exists(file_path, Professor.KEY, prof_id):
             raise ValueError(f"No professor found with id: {prof_id}")
+        if "course_id" in updated_data:
+            Course.check_ids([updated_data["course_id"]], courses_file)
 
         FileHandler.update_csv(file_path, "prof_id", prof_id, updated_data)
         print(f"Professor {prof_id} updated successfully!")
+
+    @staticmethod
+    @metrics.timed
+    def list_by_course(course_id, file_path: str = None):
+        file_path = file_path or Professor.DATA_FILE
+        return FileHandler.find_all(file_path, "course_id", course_id)
@@ -1,11 +1,26 @@
 # models/student.py
+import heapq
+import sys
 import time
-from statistics import median
+from array import array
+from models.course import Course
+from models.grade import Grade
+from utils.aggregates import MARKS_MAX, MARKS_MIN, CourseAggregates, MarksHistogram
+from utils import config, metrics
 from utils.file_handler import FileHandler
+from utils.grading import CourseGrades
+from utils.query import Query, search_index
+from utils.sorting import KeysetIndex, decode_cursor, encode_cursor
 
 class Student:
     DATA_FILE = "data/students.csv"
+    KEY = "email"
     FIELDS = ["email", "first_name", "last_name", "course_id", "grade", "marks"]
+    __slots__ = ("email", "first_name", "last_name", "course_id", "grade", "marks")
+    # sort_students orderings -> the columns they order by
+    SORT_COLUMNS = {"marks": ("marks",), "name": ("last_name", "first_name"), "email": ("email",)}
+    # columns of the n-gram index search_by_name uses
+    NAME_COLUMNS = ("first_name", "last_name")
 
     def __init__(self, email, first_name, last_name, course_id, grade, marks):
         self.email = email
@@ -18,18 +33,53 @@ class Student:
     def display_records(self):
         print(f"{self.first_name} {self.last_name} - {self.course_id} - {self.grade} ({self.marks})")
 
+    @staticmethod
+    def query(file_path: str = None) -> Query:
+        """A query over the students table; see utils/query.py."""
+        return Query(file_path or Student.DATA_FILE, key=Student.KEY, numeric=("marks",))
+
 
     # CRUD METHODS
     @staticmethod
+    @metrics.timed
     def add_new_student(student, file_path: str = None):
+        courses_file = FileHandler.beside(file_path, Course.DATA_FILE)
         file_path = file_path or Student.DATA_FILE
-        students = FileHandler.read_all(file_path)
-
-        for row in students:
-            if row.get("email") == student.email:
+        with FileHandler.locked(file_path):
+            if FileHandler.exists(file_path, Student.KEY, student.email):
                 raise ValueError("Email already exists")
+            Course.check_ids([student.course_id], courses_file)
+
+            row = Student._to_row(student)
+            FileHandler.write_to_csv(file_path, row, fieldnames=Student.FIELDS)
+        print(f"Student {student.first_name} {student.last_name} added successfully!")
+
+    @staticmethod
+    @metrics.timed
+    def add_new_students(students, file_path: str = None):
+        """
+        Add many students with one duplicate check and one write.
+        Returns a list of (email, status) with status "inserted",
+        "duplicate" or "invalid" (missing email, non-numeric marks or
+        unknown course_id).
+        """
+        courses_file = FileHandler.beside(file_path, Course.DATA_FILE)
+        file_path = file_path or Student.DATA_FILE
+        courses = Course.ids(courses_file) if config.FOREIGN_KEYS else None
+        report = FileHandler.insert_many(
+            file_path,
+            (Student._to_row(s) for s in students),
+            Student.KEY,
+            Student.FIELDS,
+            validate=lambda r: r["marks"].isdigit() and (courses is None or r["course_id"] in courses),
+        )
+        inserted = sum(1 for _, status in report if status == "inserted")
+        print(f"{inserted} of {len(report)} students added successfully!")
+        return report
 
-        row = {
+    @staticmethod
+    def _to_row(student):
+        return {
             "email": student.email,
             "first_name": student.first_name,
             "last_name": student.last_name,
@@ -37,24 +87,25 @@ class Student:
             "grade": student.grade,
             "marks": str(student.marks),
         }
-        FileHandler.write_to_csv(file_path, row, fieldnames=Student.FIELDS)
-        print(f"Student {student.first_name} {student.last_name} added successfully!")
 
     @staticmethod
+    @metrics.timed
     def delete_student(email, file_path: str = None):
         file_path = file_path or Student.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if not any(r.get("email") == email for r in rows):
+        if not FileHandler.exists(file_path, Student.KEY, email):
             raise ValueError(f"No student found with email: {email}")
         FileHandler.delete_from_csv(file_path, "email", email)
         print(f"Student with email {email} deleted successfully!")
 
     @staticmethod
+    @metrics.timed
     def update_student(email, updated_data, file_path: str = None):
+        courses_file = FileHandler.beside(file_path, Course.DATA_FILE)
         file_path = file_path or Student.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        if not any(r.get("email") == email for r in rows):
+        if not FileHandler.exists(file_path, Student.KEY, email):
             raise ValueError(f"No student found with email: {email}")
+        if "course_id" in updated_data:
+            Course.check_ids([updated_data["course_id"]], courses_file)
         if "marks" in updated_data:
             try:
                 updated_data["marks"] = int(updated_data["marks"])
@@ -63,84 +114,385 @@ class Student:
         FileHandler.update_csv(file_path, "email", email, updated_data)
         print(f"Student with email {email} updated successfully!")
 
+    @staticmethod
+    @metrics.timed
+    def update_students(changes, file_path: str = None):
+        """
+        Apply {email: updated_data, ...} with one write, all or nothing:
+        an unknown email, column or course_id, non-numeric marks or a change
+        of email raises ValueError before anything is written. Returns the
+        number of students updated.
+        """
+        courses_file = FileHandler.beside(file_path, Course.DATA_FILE)
+        file_path = file_path or Student.DATA_FILE
+        bad_marks = [email for email, data in changes.items() if "marks" in data and not str(data["marks"]).strip().isdigit()]
+        if bad_marks:
+            raise ValueError(f"Marks must be a whole number: {', '.join(bad_marks)}")
+        if any("email" in data and data["email"] != email for email, data in changes.items()):
+            raise ValueError("Emails cannot be changed in a batch; use update_student")
+        Course.check_ids({data["course_id"] for data in changes.values() if "course_id" in data}, courses_file)
+        updates = {
+            email: {**data, "marks": int(data["marks"])} if "marks" in data else data
+            for email, data in changes.items()
+        }
+        updated = FileHandler.update_many(file_path, Student.KEY, updates)
+        print(f"{updated} students updated successfully!")
+        return updated
+
     
     @staticmethod
-    def course_stats(course_id: str, file_path: str = None):
+    @metrics.timed
+    def course_stats(course_id: str, file_path: str = None, table: "StudentTable" = None):
         """
         Return stats for a given course_id:
         count, average, median, min, max.
         If no marks found, return None.
+        Answered from per-course aggregates kept up to date on every write,
+        or computed from `table` when a columnar StudentTable is given.
         """
-        file_path = file_path or Student.DATA_FILE
-        rows = FileHandler.read_all(file_path)
+        if table is not None:
+            return table.course_stats(course_id)
+        aggregates = Student._course_aggregates(file_path)
+        return aggregates.stats(course_id) if aggregates else None
 
-        marks = []
-        for r in rows:
-            if r.get("course_id") == course_id and r.get("marks") not in (None, "", "None"):
-                try:
-                    marks.append(int(r["marks"]))
-                except ValueError:
-                    pass
-
-        if not marks:
-            return None
+    @staticmethod
+    @metrics.timed
+    def course_stats_all(file_path: str = None):
+        """Return {course_id: stats} for every course that has marks."""
+        aggregates = Student._course_aggregates(file_path)
+        return aggregates.all_stats() if aggregates else {}
 
-        count = len(marks)
-        avg = round(sum(marks) / count, 2)
-        med = median(marks)
-        mn = min(marks)
-        mx = max(marks)
+    @staticmethod
+    @metrics.timed
+    def regrade_course(course_id: str, file_path: str = None, dry_run: bool = False):
+        """
+        Set every student of course_id to the letter grades.csv gives their
+        marks, in one pass over the course and one write. Returns
+        {"course_id", "students", "changed": [(email, stored, computed)],
+        "ungradable": [email]}; changed lists the rows whose stored grade
+        disagreed with their marks, ungradable those whose marks are not an
+        integer or fall outside every range (left as they are). With dry_run
+        the disagreements are only reported.
+        """
+        scale = Grade.scale(FileHandler.beside(file_path, Grade.DATA_FILE))
+        file_path = file_path or Student.DATA_FILE
+        with FileHandler.locked(file_path):
+            view = FileHandler.view(file_path, "course_grades", CourseGrades)
+            if view is None:
+                raise ValueError(f"No students file: {file_path}")
+            students, wrong, odd = view.check(course_id, scale)
+            rows = view.rows
+            changed = [(rows[pos]["email"], rows[pos]["grade"], letter) for pos, letter in wrong]
+            ungradable = [rows[pos]["email"] for pos in odd]
+            if changed and not dry_run:
+                FileHandler.update_many(file_path, Student.KEY, {email: {"grade": new} for email, _, new in changed})
+        if not dry_run:
+            print(f"{len(changed)} of {students} students in {course_id} regraded.")
+        return {"course_id": course_id, "students": students, "changed": changed, "ungradable": ungradable}
 
-        return {
-            "course_id": course_id,
-            "count": count,
-            "average": avg,
-            "median": med,
-            "min": mn,
-            "max": mx,
-        }
+    @staticmethod
+    def _course_aggregates(file_path: str = None):
+        file_path = file_path or Student.DATA_FILE
+        return FileHandler.view(file_path, "course_aggregates", CourseAggregates)
 
 
     # LOAD, SEARCH, SORT, TIMING
     @staticmethod
+    @metrics.timed
     def read_all(file_path: str = None):
         file_path = file_path or Student.DATA_FILE
         return FileHandler.read_all(file_path)
 
     @staticmethod
-    def sort_students(by: str = "marks", descending: bool = False, file_path: str = None):
-        file_path = file_path or Student.DATA_FILE
-        rows = FileHandler.read_all(file_path)
+    @metrics.timed
+    def list_by_course(course_id: str, file_path: str = None):
+        """Students enrolled in course_id, in file order, via the course_id index."""
+        return Student.query(file_path).where("course_id", "eq", course_id).all()
+
+    @staticmethod
+    @metrics.timed
+    def sort_students(
+        by: str = "marks",
+        descending: bool = False,
+        file_path: str = None,
+        limit: int = None,
+        table: "StudentTable" = None,
+        page_size: int = None,
+        cursor: str = None,
+    ):
+        """
+        Return student rows sorted by "marks", "name" (last, first) or email.
+        Ties keep file order. Marks use a counting sort over per-mark buckets;
+        with a limit only the top `limit` rows are selected (heap-based for
+        the string keys) instead of sorting the whole table.
+
+        With page_size, return one page instead:
+        {"rows", "next", "previous"}, where next and previous are opaque
+        cursors (None at either end) to pass back as cursor. Paged results
+        break ties by email and cost O(page_size + log n) per page.
+        """
+        if page_size is not None or cursor is not None:
+            return Student._sort_page(by, descending, file_path, page_size or 10, cursor)
+        if table is not None:
+            return [table.row(i) for i in table.sorted_ids(by, descending, limit)]
+        columns = Student.SORT_COLUMNS.get(by, Student.SORT_COLUMNS["email"])
+        return Student.query(file_path).order_by(*columns, descending=descending).limit(limit).all()
+
+    @staticmethod
+    def _keyset_key(by: str):
+        # (rank, value, email tiebreak) per row; see KeysetIndex
         if by == "marks":
-            rows.sort(key=lambda r: int(r["marks"]), reverse=descending)
+            def key(row):
+                marks = row.get("marks")
+                try:
+                    return (0, int(marks), row.get("email") or "")
+                except (TypeError, ValueError):
+                    return (1, "", row.get("email") or "")
         elif by == "name":
-            rows.sort(
-                key=lambda r: (r["last_name"].casefold(), r["first_name"].casefold()),
-                reverse=descending,
-            )
+            # "\0" sorts before any character, so the joined string orders like (last, first)
+            key = lambda row: (0, (row.get("last_name") or "").casefold() + "\0" + (row.get("first_name") or "").casefold(),
+                               row.get("email") or "")
         else:
-            rows.sort(key=lambda r: r["email"].casefold(), reverse=descending)
-        return rows
+            key = lambda row: (0, (row.get("email") or "").casefold(), row.get("email") or "")
+        return key
 
     @staticmethod
-    def search_by_email(email: str, file_path: str = None):
+    def _sort_page(by: str, descending: bool, file_path: str, page_size: int, cursor: str):
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        by = by if by in Student.SORT_COLUMNS else "email"
+        after = before = None
+        if cursor is not None:
+            state = Student._decode(cursor)
+            if state.get("by") != by or state.get("descending") != descending:
+                raise ValueError("Cursor belongs to another ordering")
+            after, before = state["after"], state["before"]
         file_path = file_path or Student.DATA_FILE
-        rows = FileHandler.read_all(file_path)
+        view = FileHandler.view(file_path, "keyset_" + by, lambda: KeysetIndex(Student._keyset_key(by)))
+        if view is None:
+            return {"rows": [], "next": None, "previous": None}
+        entries, has_previous, has_next = view.page(page_size, descending, after, before)
+
+        def token(**edge):
+            return encode_cursor({"by": by, "descending": descending, "after": None, "before": None, **edge})
+
+        rows = view.rows
+        return {
+            "rows": [dict(rows[entry[-1]]) for entry in entries],
+            "next": token(after=list(entries[-1])) if entries and has_next else None,
+            "previous": token(before=list(entries[0])) if entries and has_previous else None,
+        }
+
+    @staticmethod
+    def _decode(cursor: str):
+        state = decode_cursor(cursor)
+        try:
+            for edge in ("after", "before"):
+                if state[edge] is not None:
+                    rank, value, email, pos = state[edge]
+                    state[edge] = (int(rank), value, str(email), int(pos))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Invalid cursor") from None
+        return state
+
+    @staticmethod
+    @metrics.timed
+    def search_by_email(email: str, file_path: str = None, table: "StudentTable" = None):
+        if table is not None:
+            t0 = time.perf_counter()
+            found = table.find(email)
+            t1 = time.perf_counter()
+            return found, (t1 - t0)
+        # Load the table, its email index and the plan first so only the probe is timed
+        run = Student.query(file_path).where(Student.KEY, "eq", email).limit(1).prepare()
         t0 = time.perf_counter()
-        found = next((r for r in rows if r["email"] == email), None)
+        found = run()
         t1 = time.perf_counter()
-        return found, (t1 - t0)
+        return (found[0] if found else None), (t1 - t0)
 
     @staticmethod
+    @metrics.timed
     def search_by_name(keyword: str, file_path: str = None):
         file_path = file_path or Student.DATA_FILE
-        rows = FileHandler.read_all(file_path)
-        kw = keyword.casefold()
+        # Load the table, its name n-gram index and the plan first so only the probe is timed
+        table = FileHandler.table(file_path)
+        if search_index(file_path, Student.NAME_COLUMNS, table) is None:
+            return [], 0.0
+        run = Student.query(file_path).where(Student.NAME_COLUMNS, "contains", keyword).prepare(table)
         t0 = time.perf_counter()
-        hits = [
-            r
-            for r in rows
-            if kw in r["first_name"].casefold() or kw in r["last_name"].casefold()
-        ]
+        hits = run()
         t1 = time.perf_counter()
         return hits, (t1 - t0)
+
+
+class StudentTable:
+    """
+    Columnar, read-mostly copy of the students table for large rosters.
+    Marks live in an array('H'), course_id and grade are dictionary-encoded
+    into small integer codes, and emails/names are interned string lists, so
+    a row costs a few dozen bytes instead of a six-string dict.
+    Pass it as `table=` to Student.search_by_email, sort_students and
+    course_stats to run them on the columns.
+    """
+
+    __slots__ = (
+        "emails", "first_names", "last_names",
+        "course_codes", "grade_codes", "marks",
+        "courses", "grades", "_course_ids", "_grade_ids",
+        "odd_marks", "email_index",
+    )
+
+    # marks that are not an integer in 0..NO_MARK-1 are stored as NO_MARK,
+    # with the original text kept in odd_marks
+    NO_MARK = 0xFFFF
+
+    def __init__(self):
+        self.emails = []
+        self.first_names = []
+        self.last_names = []
+        self.course_codes = array("H")
+        self.grade_codes = array("H")
+        self.marks = array("H")
+        self.courses = []       # code -> course_id
+        self.grades = []        # code -> grade
+        self._course_ids = {}   # course_id -> code
+        self._grade_ids = {}    # grade -> code
+        self.odd_marks = {}     # row id -> original marks text
+        self.email_index = {}
+
+    @staticmethod
+    def load(file_path: str = None) -> "StudentTable":
+        """Build the table by streaming the CSV; the rows are never held as dicts."""
+        file_path = file_path or Student.DATA_FILE
+        table = StudentTable()
+        for row in FileHandler.iter_rows(file_path):
+            table.append(row)
+        return table
+
+    @staticmethod
+    def _encode(value, codes, values) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, row) -> None:
+        i = len(self.emails)
+        email = sys.intern(row.get("email") or "")
+        self.emails.append(email)
+        self.first_names.append(sys.intern(row.get("first_name") or ""))
+        self.last_names.append(sys.intern(row.get("last_name") or ""))
+        self.course_codes.append(self._encode(row.get("course_id") or "", self._course_ids, self.courses))
+        self.grade_codes.append(self._encode(row.get("grade") or "", self._grade_ids, self.grades))
+        raw = row.get("marks")
+        try:
+            mark = int(raw)
+        except (TypeError, ValueError):
+            mark = -1
+        if 0 <= mark < self.NO_MARK:
+            self.marks.append(mark)
+        else:
+            self.marks.append(self.NO_MARK)
+            self.odd_marks[i] = "" if raw is None else str(raw)
+        self.email_index.setdefault(email, i)
+
+    def __len__(self) -> int:
+        return len(self.emails)
+
+    def row(self, i: int):
+        mark = self.marks[i]
+        return {
+            "email": self.emails[i],
+            "first_name": self.first_names[i],
+            "last_name": self.last_names[i],
+            "course_id": self.courses[self.course_codes[i]],
+            "grade": self.grades[self.grade_codes[i]],
+            "marks": self.odd_marks[i] if mark == self.NO_MARK else str(mark),
+        }
+
+    def find(self, email: str):
+        i = self.email_index.get(email)
+        return None if i is None else self.row(i)
+
+    def _int_mark(self, i: int):
+        mark = self.marks[i]
+        if mark != self.NO_MARK:
+            return mark
+        try:
+            return int(self.odd_marks[i])
+        except ValueError:
+            return None
+
+    def sorted_ids(self, by: str = "marks", descending: bool = False, limit: int = None):
+        """Row ids in the same order Student.sort_students gives (ties in file order)."""
+        n = len(self)
+        if by == "marks":
+            # counting sort: one pass to bucket ids by mark, then concatenate
+            buckets = [[] for _ in range(MARKS_MIN, MARKS_MAX + 1)]
+            overflow = {}
+            unsortable = []
+            for i, mark in enumerate(self.marks):
+                if mark <= MARKS_MAX:
+                    buckets[mark - MARKS_MIN].append(i)
+                    continue
+                mark = self._int_mark(i)
+                if mark is None:
+                    unsortable.append(i)
+                else:
+                    overflow.setdefault(mark, []).append(i)
+            ordered = [overflow[m] for m in sorted(overflow) if m < MARKS_MIN] + buckets
+            ordered += [overflow[m] for m in sorted(overflow) if m > MARKS_MAX]
+            if descending:
+                ordered.reverse()
+            ordered.append(unsortable)
+            ids = [i for bucket in ordered for i in bucket]
+            return ids if limit is None else ids[:limit]
+
+        if by == "name":
+            first, last = self.first_names, self.last_names
+            key = lambda i: (last[i].casefold(), first[i].casefold())
+        else:
+            emails = self.emails
+            key = lambda i: emails[i].casefold()
+        if limit is not None:
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            return pick(limit, range(n), key=key)
+        return sorted(range(n), key=key, reverse=descending)
+
+    def course_stats(self, course_id: str):
+        code = self._course_ids.get(course_id)
+        if code is None:
+            return None
+        hist = MarksHistogram()
+        for i, c in enumerate(self.course_codes):
+            if c == code:
+                mark = self._int_mark(i)
+                if mark is not None:
+                    hist.add(mark)
+        return hist.stats(course_id) if hist.count else None
+
+    def memory_report(self):
+        """Approximate bytes held by the columns, in total and per row."""
+        seen = set()
+        strings = 0
+        for column in (self.emails, self.first_names, self.last_names, self.courses, self.grades):
+            for value in column:
+                if id(value) not in seen:
+                    seen.add(id(value))
+                    strings += sys.getsizeof(value)
+        containers = sum(
+            sys.getsizeof(c)
+            for c in (
+                self.emails, self.first_names, self.last_names, self.courses, self.grades,
+                self.course_codes, self.grade_codes, self.marks,
+                self.odd_marks, self.email_index, self._course_ids, self._grade_ids,
+            )
+        )
+        total = strings + containers
+        rows = len(self)
+        return {
+            "rows": rows,
+            "total_bytes": total,
+            "bytes_per_row": round(total / rows, 1) if rows else 0.0,
+        }
@@ -45,3 +45,12 @@ def test_delete_course_success(courses_file):
 def test_delete_course_missing_raises(courses_file):
     with pytest.raises(ValueError, match="No course found with id:"):
         Course.delete_course("NOPE101", file_path=courses_file)
+
+def test_add_new_courses_skips_duplicates(courses_file):
+    Course.add_new_course(Course("DATA200", "Data Foundations", "Intro to data"), file_path=courses_file)
+    report = Course.add_new_courses(
+        [Course("DATA200", "Dup", "Dup"), Course("DATA210", "Database Systems", "SQL")],
+        file_path=courses_file,
+    )
+    assert report == [("DATA200", "duplicate"), ("DATA210", "inserted")]
+    assert [r["course_id"] for r in FileHandler.read_all(courses_file)] == ["DATA200", "DATA210"]
@@ -1,6 +1,8 @@
 import os
+from statistics import median
+
 import pytest
-from models.student import Student
+from models.student import Student, StudentTable
 from utils.file_handler import FileHandler
 
 @pytest.fixture
@@ -49,3 +51,113 @@ def test_update_student_success(students_file):
 def test_update_student_missing_raises(students_file):
     with pytest.raises(ValueError, match="No student found with email:"):
         Student.update_student("ghost@mycsu.edu", {"grade": "A"}, file_path=students_file)
+
+def test_add_new_students_reports_each_row(students_file):
+    Student.add_new_student(Student("sam@mycsu.edu", "Sam", "Carpenter", "DATA200", "A", 96), file_path=students_file)
+    batch = [
+        Student("lily@mycsu.edu", "Lily", "Nguyen", "DATA210", "B", 88),
+        Student("sam@mycsu.edu", "Sam", "Again", "DATA200", "A", 90),
+        Student("lily@mycsu.edu", "Lily", "Twice", "DATA210", "B", 70),
+        Student("bad@mycsu.edu", "Bad", "Marks", "DATA200", "A", "n/a"),
+        Student("", "No", "Email", "DATA200", "A", 50),
+        Student("max@mycsu.edu", "Max", "Power", "DATA200", "C", 71),
+    ]
+    report = Student.add_new_students(batch, file_path=students_file)
+    assert [status for _, status in report] == [
+        "inserted", "duplicate", "duplicate", "invalid", "invalid", "inserted",
+    ]
+    rows = FileHandler.read_all(students_file)
+    assert [r["email"] for r in rows] == ["sam@mycsu.edu", "lily@mycsu.edu", "max@mycsu.edu"]
+
+def test_course_stats_follow_every_write(students_file):
+    Student.add_new_students(
+        [Student(f"s{i}@mycsu.edu", "F", "L", "DATA200" if i % 2 else "DATA210", "A", (i * 37) % 101) for i in range(40)],
+        file_path=students_file,
+    )
+    # build the aggregates before changing anything so the incremental path is exercised
+    Student.course_stats_all(file_path=students_file)
+    Student.update_student("s1@mycsu.edu", {"marks": 100}, file_path=students_file)
+    Student.update_student("s3@mycsu.edu", {"course_id": "DATA210"}, file_path=students_file)
+    Student.delete_student("s4@mycsu.edu", file_path=students_file)
+    Student.add_new_student(Student("x@mycsu.edu", "X", "Y", "DATA220", "B", 85), file_path=students_file)
+
+    rows = FileHandler.read_all(students_file)
+    all_stats = Student.course_stats_all(file_path=students_file)
+    assert sorted(all_stats) == ["DATA200", "DATA210", "DATA220"]
+    for cid, stats in all_stats.items():
+        marks = [int(r["marks"]) for r in rows if r["course_id"] == cid]
+        assert stats == {
+            "course_id": cid,
+            "count": len(marks),
+            "average": round(sum(marks) / len(marks), 2),
+            "median": median(marks),
+            "min": min(marks),
+            "max": max(marks),
+        }
+        assert Student.course_stats(cid, file_path=students_file) == stats
+    assert Student.course_stats("NOPE", file_path=students_file) is None
+
+@pytest.mark.parametrize("by", ["marks", "name", "email"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_sort_students_matches_stable_sort(students_file, by, descending):
+    Student.add_new_students(
+        [Student(f"s{i}@mycsu.edu", f"First{i % 7}", f"Last{i % 5}", "DATA200", "A", (i * 37) % 101) for i in range(60)],
+        file_path=students_file,
+    )
+    Student.sort_students(by=by, file_path=students_file)  # build the view, then change rows under it
+    Student.update_student("s2@mycsu.edu", {"marks": 5}, file_path=students_file)
+    Student.delete_student("s9@mycsu.edu", file_path=students_file)
+    Student.add_new_student(Student("new@mycsu.edu", "Zed", "Last0", "DATA200", "A", 37), file_path=students_file)
+
+    keys = {
+        "marks": lambda r: int(r["marks"]),
+        "name": lambda r: (r["last_name"].casefold(), r["first_name"].casefold()),
+        "email": lambda r: r["email"].casefold(),
+    }
+    expected = sorted(FileHandler.read_all(students_file), key=keys[by], reverse=descending)
+    assert Student.sort_students(by=by, descending=descending, file_path=students_file) == expected
+    assert Student.sort_students(by=by, descending=descending, file_path=students_file, limit=10) == expected[:10]
+
+@pytest.mark.parametrize("keyword", ["", "a", "LA", "ast1", "first12", "zzz", "Ng"])
+def test_search_by_name_matches_substring_scan(students_file, keyword):
+    Student.add_new_students(
+        [Student(f"s{i}@mycsu.edu", f"First{i}", f"Last{i}", "DATA200", "A", i) for i in range(30)],
+        file_path=students_file,
+    )
+    Student.search_by_name("x", file_path=students_file)  # build the index, then change rows under it
+    Student.update_student("s12@mycsu.edu", {"first_name": "Lily", "last_name": "Nguyen"}, file_path=students_file)
+    Student.delete_student("s13@mycsu.edu", file_path=students_file)
+    Student.add_new_student(Student("ng@mycsu.edu", "Ngozi", "Okafor", "DATA210", "B", 80), file_path=students_file)
+
+    kw = keyword.casefold()
+    expected = [
+        r for r in FileHandler.read_all(students_file)
+        if kw in r["first_name"].casefold() or kw in r["last_name"].casefold()
+    ]
+    hits, elapsed = Student.search_by_name(keyword, file_path=students_file)
+    assert hits == expected
+    assert elapsed >= 0
+
+def test_student_table_matches_row_based_operations(students_file):
+    Student.add_new_students(
+        [Student(f"s{i}@mycsu.edu", f"First{i % 7}", f"Last{i % 5}", f"DATA2{i % 3}0", "AB"[i % 2], (i * 37) % 101) for i in range(50)],
+        file_path=students_file,
+    )
+    Student.add_new_student(Student("odd@mycsu.edu", "Odd", "Marks", "DATA200", "C", 250), file_path=students_file)
+    table = StudentTable.load(students_file)
+
+    assert [table.row(i) for i in range(len(table))] == FileHandler.read_all(students_file)
+    found, _ = Student.search_by_email("s7@mycsu.edu", table=table)
+    assert found == Student.search_by_email("s7@mycsu.edu", file_path=students_file)[0]
+    assert Student.search_by_email("ghost@mycsu.edu", table=table)[0] is None
+    for by in ("marks", "name", "email"):
+        for desc in (False, True):
+            expected = Student.sort_students(by=by, descending=desc, file_path=students_file)
+            assert Student.sort_students(by=by, descending=desc, table=table) == expected
+            assert Student.sort_students(by=by, descending=desc, limit=5, table=table) == expected[:5]
+    for cid in ("DATA200", "DATA210", "DATA220", "NOPE"):
+        assert Student.course_stats(cid, table=table) == Student.course_stats(cid, file_path=students_file)
+
+    report = table.memory_report()
+    assert report["rows"] == 51
+    assert report["bytes_per_row"] > 0
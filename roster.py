@@ -0,0 +1,83 @@
+import argparse
+import sys
+
+from models.student import Student
+from utils import roster
+
+# Import a registrar's roster into students.csv, or export students, without
+# going through the menus; see utils/roster.py.
+#   python roster.py import new_students.csv
+#   python roster.py export out.csv --columns email,marks --where course_id=DATA200
+# Rows with errors are reported by line number; the rest are still imported.
+parser = argparse.ArgumentParser(description="Stream a student roster in or out of the data files.")
+commands = parser.add_subparsers(dest="command", required=True)
+
+importer = commands.add_parser("import", help="add the students of a roster CSV file")
+importer.add_argument("file", help="roster CSV with the students.csv columns ('-' for stdin)")
+importer.add_argument("--batch-size", type=int, default=roster.BATCH_SIZE, help="rows per write")
+importer.add_argument("--no-course-check", action="store_true", help="accept course ids missing from courses.csv")
+importer.add_argument("--dry-run", action="store_true", help="validate and report without writing")
+
+exporter = commands.add_parser("export", help="write students to a CSV file")
+exporter.add_argument("file", help="output CSV ('-' for stdout)")
+exporter.add_argument("--columns", help="comma-separated columns to keep (default: all)")
+exporter.add_argument(
+    "--where", action="append", default=[], metavar="COLUMN=VALUE", help="only rows with this value (repeatable)"
+)
+parser.add_argument("--students-file", default=Student.DATA_FILE)
+args = parser.parse_args()
+
+
+def open_arg(path: str, mode: str):
+    if path == "-":
+        return sys.stdin if "r" in mode else sys.stdout
+    return open(path, mode, newline="")
+
+
+if args.command == "import":
+    if args.batch_size < 1:
+        print(" Value Error: --batch-size must be at least 1")
+        raise SystemExit(1)
+    counts = {"inserted": 0, "duplicate": 0, "invalid": 0}
+    f = open_arg(args.file, "r")
+    try:
+        lines = roster.import_roster(
+            f,
+            file_path=args.students_file,
+            batch_size=args.batch_size,
+            course_ids=None if args.no_course_check else roster.known_course_ids,
+            dry_run=args.dry_run,
+        )
+        for line in lines:
+            counts[line.status] += 1
+            if line.error:
+                print(f"line {line.line_no}: {line.status}: {line.error}", file=sys.stderr)
+    except ValueError as e:
+        print(f" Value Error: {e}")
+        raise SystemExit(1)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    action = "would be added" if args.dry_run else "added"
+    print(f"{counts['inserted']} students {action}, {counts['duplicate']} duplicates, {counts['invalid']} invalid")
+    raise SystemExit(1 if counts["invalid"] or counts["duplicate"] else 0)
+
+where = {}
+for item in args.where:
+    column, sep, value = item.partition("=")
+    if not sep:
+        print(f" Value Error: --where expects COLUMN=VALUE, got {item!r}")
+        raise SystemExit(1)
+    where[column.strip()] = value
+columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+out = open_arg(args.file, "w")
+try:
+    written = roster.export_roster(out, file_path=args.students_file, columns=columns, where=where or None)
+except ValueError as e:
+    print(f" Value Error: {e}")
+    raise SystemExit(1)
+finally:
+    if out is not sys.stdout:
+        out.close()
+if out is not sys.stdout:
+    print(f"{written} students written to {args.file}")
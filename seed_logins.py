@@ -1,6 +1,6 @@
 from models.login_user import LoginUser
 
-# Run once to seed data for the application. Note that passwords will be encrypted in csv 
+# Run once to seed data for the application. Note that passwords will be hashed in csv 
 try:
     LoginUser.add_user(LoginUser("admin1@mycsu.edu", "password1", "admin"))
     LoginUser.add_user(LoginUser("prof@mycsu.edu", "password2", "professor"))
@@ -0,0 +1,54 @@
+import os
+import shutil
+import statistics
+import tempfile
+import unittest
+
+from models.student import Student
+from utils import analytics
+from utils.file_handler import FileHandler
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        with open(self.file_path, "w") as f:
+            f.write(",".join(Student.FIELDS) + "\n")
+        Student.add_new_students(
+            [Student(f"s{i}@mycsu.edu", "F", "L", f"DATA2{i % 3}0", "ABC"[i % 3 and i % 2], (i * 37) % 101) for i in range(90)],
+            file_path=self.file_path,
+        )
+        Student.add_new_student(Student("odd@mycsu.edu", "O", "D", "DATA200", "A", 130), file_path=self.file_path)
+        FileHandler.write_to_csv(
+            self.file_path,
+            {"email": "blank@mycsu.edu", "first_name": "B", "last_name": "L", "course_id": "DATA210", "grade": "C", "marks": None},
+            Student.FIELDS,
+        )
+
+    def tearDown(self):
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_python_report_matches_course_stats(self):
+        report = analytics.course_report(self.file_path, use_numpy=False)
+        self.assertEqual(sorted(report), ["DATA200", "DATA210", "DATA220"])
+        rows = FileHandler.read_all(self.file_path)
+        for cid, stats in report.items():
+            expected = Student.course_stats(cid, file_path=self.file_path)
+            self.assertEqual({k: stats[k] for k in expected}, expected)
+            marks = [int(r["marks"]) for r in rows if r["course_id"] == cid and r["marks"]]
+            self.assertEqual(stats["std_dev"], round(statistics.pstdev(marks), 2))
+            self.assertEqual(sum(stats["letters"].values()), sum(1 for r in rows if r["course_id"] == cid))
+            self.assertEqual(sum(stats["histogram"]), sum(1 for m in marks if 0 <= m <= 100))
+
+    @unittest.skipUnless(analytics.HAVE_NUMPY, "NumPy not installed")
+    def test_numpy_report_matches_python_report(self):
+        self.assertEqual(
+            analytics.course_report(self.file_path, use_numpy=True),
+            analytics.course_report(self.file_path, use_numpy=False),
+        )
+
+    def test_compare_courses_ranks_by_metric(self):
+        report = analytics.course_report(self.file_path, use_numpy=False)
+        ranked = analytics.compare_courses(report, metric="median")
+        self.assertEqual([r["course_id"] for r in ranked], sorted(report, key=lambda c: report[c]["median"], reverse=True))
@@ -0,0 +1,31 @@
+import unittest
+from unittest import mock
+
+from benchmarks import run
+
+def report(**medians):
+    return {"results": {"1k": {name: {"median_ms": ms} for name, ms in medians.items()}}}
+
+class TestBenchmarks(unittest.TestCase):
+    def test_regressions_respect_threshold_and_noise(self):
+        baseline = report(load=10.0, add=0.01, update=5.0)
+        current = report(load=16.0, add=0.04, update=7.0, delete=1.0)
+        self.assertEqual(run.regressions(current, baseline, 0.5), ["1k load: 16.000 ms vs baseline 10.000 ms"])
+        self.assertEqual(run.regressions(current, baseline, 1.0), [])
+
+    def test_run_reports_every_selected_operation(self):
+        result = run.run(["1k"], 2, 0, ["load", "search_by_email", "course_stats"])
+        ops = result["results"]["1k"]
+        self.assertEqual(sorted(ops), ["course_stats", "load", "search_by_email"])
+        for stats in ops.values():
+            self.assertLessEqual(stats["median_ms"], stats["p95_ms"])
+            self.assertGreater(stats["peak_kb"], 0)
+        self.assertEqual(result["meta"]["seed"], 0)
+    def test_parallel_load_is_skipped_on_one_core(self):
+        with mock.patch("utils.parallel_csv.cores", return_value=1):
+            result = run.run(["1k"], 2, 0, ["load", "load_parallel"])
+        self.assertEqual(sorted(result["results"]["1k"]), ["load"])
+        self.assertIsNone(result["meta"]["parallel_workers"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from models.student import Student
+from utils import locking, storage
+from utils.file_handler import FileHandler
+
+WRITERS = 4
+PER_WRITER = 10
+ROUNDS = 5
+
+def _writer(file_path, first):
+    # each process only ever touches its own students
+    for r in range(1, ROUNDS + 1):
+        for i in range(first, first + PER_WRITER):
+            FileHandler.update_csv(file_path, "email", f"s{i}@mycsu.edu", {"marks": r})
+
+def _reader(file_path, stop, bad):
+    while not stop.is_set():
+        if len(FileHandler.read_all(file_path)) != WRITERS * PER_WRITER:
+            bad.value += 1
+
+@unittest.skipUnless(
+    locking.fcntl is not None and "fork" in multiprocessing.get_all_start_methods(), "needs fcntl and fork"
+)
+class TestConcurrentWriters(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        with open(self.file_path, "w") as f:
+            f.write(",".join(Student.FIELDS) + "\n")
+        Student.add_new_students(
+            [Student(f"s{i}@mycsu.edu", "F", "L", "DATA200", "A", 0) for i in range(WRITERS * PER_WRITER)],
+            file_path=self.file_path,
+        )
+        # children must open their own database connections
+        storage.get_engine("sqlite").close()
+        FileHandler.invalidate()
+
+    def tearDown(self):
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_no_update_is_lost(self):
+        ctx = multiprocessing.get_context("fork")
+        stop, bad = ctx.Event(), ctx.Value("i", 0)
+        reader = ctx.Process(target=_reader, args=(self.file_path, stop, bad))
+        writers = [ctx.Process(target=_writer, args=(self.file_path, w * PER_WRITER)) for w in range(WRITERS)]
+
+        reader.start()
+        start = time.time()
+        for p in writers:
+            p.start()
+        for p in writers:
+            p.join()
+        elapsed = time.time() - start
+        stop.set()
+        reader.join()
+
+        self.assertTrue(all(p.exitcode == 0 for p in writers))
+        self.assertEqual(reader.exitcode, 0)
+        self.assertEqual(bad.value, 0)
+        rows = FileHandler.read_all(self.file_path)
+        self.assertEqual(len(rows), WRITERS * PER_WRITER)
+        self.assertTrue(all(r["marks"] == str(ROUNDS) for r in rows))
+
+        updates = WRITERS * PER_WRITER * ROUNDS
+        print(f"\n{updates} updates from {WRITERS} processes in {elapsed:.2f}s ({updates / elapsed:.0f} updates/s)")
+
+@unittest.skipIf(locking.fcntl is None, "needs fcntl")
+class TestLocking(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def other_process_can_lock(self, op):
+        with open(self.file_path + ".lock", "a") as f:
+            try:
+                locking.fcntl.flock(f.fileno(), op | locking.fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+            locking.fcntl.flock(f.fileno(), locking.fcntl.LOCK_UN)
+            return True
+
+    def test_exclusive_and_shared_holds(self):
+        with FileHandler.locked(self.file_path):
+            with FileHandler.locked(self.file_path):  # re-entrant
+                # a second open file description stands in for another process
+                self.assertFalse(self.other_process_can_lock(locking.fcntl.LOCK_SH))
+        with FileHandler.locked(self.file_path, shared=True):
+            self.assertTrue(self.other_process_can_lock(locking.fcntl.LOCK_SH))
+            self.assertFalse(self.other_process_can_lock(locking.fcntl.LOCK_EX))
+            with self.assertRaises(RuntimeError):
+                with FileHandler.locked(self.file_path):
+                    pass
+        self.assertTrue(self.other_process_can_lock(locking.fcntl.LOCK_EX))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from models.login_user import LoginUser
+from models.student import Student
+from utils import config, datagen
+from utils.file_handler import FileHandler
+
+class TestDatagen(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.saved = (config.PBKDF2_ITERATIONS, config.ENGINE)
+        config.PBKDF2_ITERATIONS = 1000
+        config.ENGINE = "csv"
+
+    def tearDown(self):
+        config.PBKDF2_ITERATIONS, config.ENGINE = self.saved
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def path(self, name, directory=None):
+        return os.path.join(directory or self.tmpdir, name)
+
+    def test_same_seed_same_rows(self):
+        other = os.path.join(self.tmpdir, "other")
+        counts = datagen.generate(self.tmpdir, 300, courses=5, seed=7)
+        datagen.generate(other, 300, courses=5, seed=7)
+        for name in ("students.csv", "courses.csv", "professors.csv", "grades.csv"):
+            with open(self.path(name)) as a, open(self.path(name, other)) as b:
+                self.assertEqual(a.read(), b.read(), name)
+        self.assertEqual(counts["login"], 1 + 5 + 300)
+        self.assertEqual(counts["students"], 300)  # one course each by default
+        self.assertGreater(datagen.generate(other, 300, courses=5, max_courses=3)["students"], 300)
+
+    def test_rows_are_consistent(self):
+        datagen.generate(self.tmpdir, 500, courses=4, professors=8, max_courses=2)
+        rows = FileHandler.read_all(self.path("students.csv"))
+        self.assertEqual(len({r["email"] for r in rows}), 500)
+        per_student = {}
+        for r in rows:
+            self.assertEqual(r["grade"], datagen.letter_for(int(r["marks"])))
+            per_student.setdefault(r["email"], set()).add(r["course_id"])
+        self.assertEqual(max(len(c) for c in per_student.values()), 2)
+        self.assertTrue(all(len(c) == len(set(c)) for c in per_student.values()))
+        courses = {r["course_id"] for r in FileHandler.read_all(self.path("courses.csv"))}
+        self.assertEqual({r["course_id"] for r in FileHandler.read_all(self.path("professors.csv"))}, courses)
+        self.assertLessEqual({r["course_id"] for r in rows}, courses)
+
+        # generated logins work with the generated password
+        email = datagen.student_email(42)
+        self.assertEqual(Student.search_by_email(email, file_path=self.path("students.csv"))[0]["email"], email)
+        self.assertTrue(LoginUser.authenticate(email, "password1", file_path=self.path("login.csv")))
+
+    def test_multi_enrollment_rows_share_the_student_key(self):
+        datagen.generate(self.tmpdir, 200, courses=4, max_courses=3, seed=3)
+        path = self.path("students.csv")
+        rows = FileHandler.read_all(path)
+        email = next(e for e in (r["email"] for r in rows) if sum(r["email"] == e for r in rows) > 1)
+        enrollments = [r for r in rows if r["email"] == email]
+        self.assertEqual(Student.search_by_email(email, file_path=path)[0], enrollments[0])
+        with self.assertRaises(ValueError):
+            Student.add_new_student(Student(email, "F", "L", "DATA200", "A", 95), file_path=path)
+        # the key names the student: updates reach every enrollment, deletes drop them all
+        Student.update_student(email, {"first_name": "Renamed"}, file_path=path)
+        self.assertEqual({r["first_name"] for r in FileHandler.read_all(path) if r["email"] == email}, {"Renamed"})
+        Student.delete_student(email, file_path=path)
+        self.assertEqual(len(FileHandler.read_all(path)), len(rows) - len(enrollments))
+
+if __name__ == "__main__":
+    unittest.main()
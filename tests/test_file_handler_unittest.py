@@ -0,0 +1,325 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from models.student import Student
+from utils import config
+from utils.file_handler import FileHandler
+
+class TestFileHandlerCache(unittest.TestCase):
+    def setUp(self):
+        # raw edits of the CSV file below exercise the CSV engine
+        self.saved_engine = config.ENGINE
+        config.ENGINE = "csv"
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        with open(self.file_path, "w") as f:
+            f.write(",".join(Student.FIELDS) + "\n")
+        FileHandler.invalidate()
+        FileHandler.reset_cache_stats()
+
+    def tearDown(self):
+        config.ENGINE = self.saved_engine
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_repeated_reads_hit_cache(self):
+        FileHandler.read_all(self.file_path)
+        FileHandler.read_all(self.file_path)
+        stats = FileHandler.cache_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+
+    def test_writes_update_cache_in_place(self):
+        Student.add_new_student(Student("sam@mycsu.edu", "Sam", "Carpenter", "DATA200", "A", 96), file_path=self.file_path)
+        Student.update_student("sam@mycsu.edu", {"marks": 85}, file_path=self.file_path)
+        Student.add_new_student(Student("lily@mycsu.edu", "Lily", "Nguyen", "DATA210", "B", 88), file_path=self.file_path)
+        Student.delete_student("sam@mycsu.edu", file_path=self.file_path)
+
+        cached = FileHandler.read_all(self.file_path)
+        self.assertEqual(FileHandler.cache_stats()["misses"], 1)
+
+        # What the cache serves must equal what a fresh parse of the file gives
+        FileHandler.invalidate(self.file_path)
+        self.assertEqual(cached, FileHandler.read_all(self.file_path))
+        self.assertEqual([r["email"] for r in cached], ["lily@mycsu.edu"])
+
+    @unittest.skipUnless(hasattr(os, "fchmod"), "needs Unix permission bits")
+    def test_rewrite_keeps_file_mode(self):
+        os.chmod(self.file_path, 0o664)
+        Student.add_new_student(Student("sam@mycsu.edu", "Sam", "Carpenter", "DATA200", "A", 96), file_path=self.file_path)
+        Student.update_student("sam@mycsu.edu", {"marks": 85}, file_path=self.file_path)
+        FileHandler.compact(self.file_path)
+        self.assertEqual(os.stat(self.file_path).st_mode & 0o777, 0o664)
+
+    def test_external_change_is_detected(self):
+        self.assertEqual(FileHandler.read_all(self.file_path), [])
+        with open(self.file_path, "a") as f:
+            f.write("ext@mycsu.edu,Ext,Ernal,DATA200,C,70\n")
+        rows = FileHandler.read_all(self.file_path)
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(FileHandler.cache_stats()["misses"], 2)
+
+    def test_stream_reads_a_snapshot(self):
+        FileHandler.write_to_csv(self.file_path, {"email": "a@mycsu.edu", "marks": 1}, fieldnames=Student.FIELDS)
+        rows = FileHandler.iter_rows(self.file_path)
+        self.assertEqual(next(rows)["email"], "a@mycsu.edu")
+        with open(self.file_path, "a") as f:
+            f.write("late@mycsu.edu,L,A,DATA200,C,70\n")
+        self.assertEqual(list(rows), [])
+        self.assertEqual(len(FileHandler.read_all(self.file_path)), 2)
+
+    def test_returned_rows_are_copies(self):
+        FileHandler.write_to_csv(self.file_path, {"email": "a@mycsu.edu", "marks": 1}, fieldnames=Student.FIELDS)
+        rows = FileHandler.read_all(self.file_path)
+        rows[0]["marks"] = "99"
+        rows.clear()
+        self.assertEqual(FileHandler.read_all(self.file_path)[0]["marks"], "1")
+
+
+class TestFileHandlerIndexes(unittest.TestCase):
+    def setUp(self):
+        # raw edits of the CSV file below exercise the CSV engine
+        self.saved_engine = config.ENGINE
+        config.ENGINE = "csv"
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        with open(self.file_path, "w") as f:
+            f.write(",".join(Student.FIELDS) + "\n")
+        for i in range(200):
+            Student.add_new_student(Student(f"s{i}@mycsu.edu", f"F{i}", f"L{i}", "DATA200", "A", i % 101), file_path=self.file_path)
+
+    def tearDown(self):
+        config.ENGINE = self.saved_engine
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_index_tracks_insert_update_delete(self):
+        self.assertTrue(FileHandler.exists(self.file_path, "email", "s150@mycsu.edu"))
+        # Delete enough rows to force a vacuum of the in-memory holes
+        for i in range(0, 150):
+            Student.delete_student(f"s{i}@mycsu.edu", file_path=self.file_path)
+        Student.update_student("s160@mycsu.edu", {"email": "renamed@mycsu.edu"}, file_path=self.file_path)
+
+        self.assertFalse(FileHandler.exists(self.file_path, "email", "s10@mycsu.edu"))
+        self.assertFalse(FileHandler.exists(self.file_path, "email", "s160@mycsu.edu"))
+        self.assertEqual(FileHandler.find_row(self.file_path, "email", "renamed@mycsu.edu")["first_name"], "F160")
+        self.assertEqual(FileHandler.find_row(self.file_path, "email", "s199@mycsu.edu")["last_name"], "L199")
+
+        FileHandler.invalidate(self.file_path)
+        self.assertEqual(len(FileHandler.read_all(self.file_path)), 50)
+        self.assertIsNotNone(FileHandler.find_row(self.file_path, "email", "renamed@mycsu.edu"))
+
+    def test_batch_delete_across_vacuum_threshold(self):
+        # One delete removing more rows than the vacuum threshold, interleaved
+        # with rows that stay; replaying it from the change log must agree.
+        FileHandler.compact(self.file_path)
+        with open(self.file_path, "a") as f:
+            for i in range(600):
+                f.write(f"dup@mycsu.edu,Dup,Row{i},DATA210,C,70\n")
+                if i % 6 == 0:
+                    f.write(f"e{i}@mycsu.edu,E,Row{i},DATA210,C,70\n")
+        saved = config.LOG_MODE
+        config.LOG_MODE = True
+        try:
+            FileHandler.delete_from_csv(self.file_path, "email", "dup@mycsu.edu")
+            cached = FileHandler.read_all(self.file_path)
+            FileHandler.invalidate(self.file_path)
+            replayed = FileHandler.read_all(self.file_path)
+        finally:
+            config.LOG_MODE = saved
+        self.assertEqual(len(cached), 300)
+        self.assertEqual(cached, replayed)
+        self.assertFalse(FileHandler.exists(self.file_path, "email", "dup@mycsu.edu"))
+        self.assertEqual(FileHandler.find_row(self.file_path, "email", "e66@mycsu.edu")["last_name"], "Row66")
+
+    def test_duplicate_keys_in_file_still_update_every_match(self):
+        FileHandler.compact(self.file_path)
+        with open(self.file_path, "a") as f:
+            f.write("s5@mycsu.edu,Dup,Row,DATA210,C,70\n")
+        FileHandler.update_csv(self.file_path, "email", "s5@mycsu.edu", {"grade": "F"})
+        rows = [r for r in FileHandler.read_all(self.file_path) if r["email"] == "s5@mycsu.edu"]
+        self.assertEqual([r["grade"] for r in rows], ["F", "F"])
+        self.assertEqual(FileHandler.find_row(self.file_path, "email", "s5@mycsu.edu")["first_name"], "F5")
+
+
+class TestFileHandlerChangeLog(unittest.TestCase):
+    def setUp(self):
+        # raw edits of the CSV file below exercise the CSV engine
+        self.saved_engine = config.ENGINE
+        config.ENGINE = "csv"
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        self.log_path = self.file_path + ".log"
+        with open(self.file_path, "w") as f:
+            f.write(",".join(Student.FIELDS) + "\n")
+        self.saved = (config.LOG_MODE, config.COMPACT_MIN_BYTES, config.COMPACT_RATIO)
+        # seed the base file whatever CMG_LOG_MODE says, so the log starts empty
+        config.LOG_MODE = False
+        Student.add_new_students(
+            [Student(f"s{i}@mycsu.edu", f"F{i}", f"L{i}", "DATA200", "A", i) for i in range(20)],
+            file_path=self.file_path,
+        )
+        config.LOG_MODE = True
+
+    def tearDown(self):
+        config.ENGINE = self.saved_engine
+        config.LOG_MODE, config.COMPACT_MIN_BYTES, config.COMPACT_RATIO = self.saved
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def apply_changes(self):
+        Student.update_student("s3@mycsu.edu", {"marks": 99}, file_path=self.file_path)
+        Student.delete_student("s4@mycsu.edu", file_path=self.file_path)
+        Student.add_new_student(Student("s4@mycsu.edu", "New", "Four", "DATA210", "B", 80), file_path=self.file_path)
+        Student.update_student("s5@mycsu.edu", {"email": "five@mycsu.edu"}, file_path=self.file_path)
+
+    def test_changes_are_appended_not_rewritten(self):
+        with open(self.file_path) as f:
+            base_before = f.read()
+        self.apply_changes()
+        with open(self.file_path) as f:
+            self.assertEqual(f.read(), base_before)
+        self.assertTrue(os.path.exists(self.log_path))
+
+        cached = FileHandler.read_all(self.file_path)
+        FileHandler.invalidate()
+        merged = FileHandler.read_all(self.file_path)
+        self.assertEqual(cached, merged)
+
+        by_email = {r["email"]: r for r in merged}
+        self.assertEqual(by_email["s3@mycsu.edu"]["marks"], "99")
+        self.assertEqual(by_email["s4@mycsu.edu"]["first_name"], "New")
+        self.assertNotIn("s5@mycsu.edu", by_email)
+        self.assertEqual(merged[-1]["email"], "s4@mycsu.edu")
+
+    def test_compaction_matches_merged_view(self):
+        self.apply_changes()
+        merged = FileHandler.read_all(self.file_path)
+        FileHandler.compact(self.file_path)
+        self.assertFalse(os.path.exists(self.log_path))
+        FileHandler.invalidate()
+        self.assertEqual(FileHandler.read_all(self.file_path), merged)
+
+    def test_threshold_triggers_compaction(self):
+        config.COMPACT_MIN_BYTES = 0
+        config.COMPACT_RATIO = 0
+        Student.update_student("s3@mycsu.edu", {"marks": 99}, file_path=self.file_path)
+        Student.update_student("s3@mycsu.edu", {"marks": 98}, file_path=self.file_path)
+        self.assertFalse(os.path.exists(self.log_path))
+        FileHandler.invalidate()
+        self.assertEqual(FileHandler.find_row(self.file_path, "email", "s3@mycsu.edu")["marks"], "98")
+
+    def test_stale_log_from_interrupted_compaction_is_ignored(self):
+        self.apply_changes()
+        with open(self.log_path) as f:
+            stale_log = f.read()
+        merged = FileHandler.read_all(self.file_path)
+        FileHandler.compact(self.file_path)
+        # Simulate a crash between swapping in the new base and removing the log
+        with open(self.log_path, "w") as f:
+            f.write(stale_log)
+        FileHandler.invalidate()
+        self.assertEqual(FileHandler.read_all(self.file_path), merged)
+
+    def test_append_after_torn_log_line(self):
+        Student.update_student("s3@mycsu.edu", {"marks": 99}, file_path=self.file_path)
+        # A crash mid-append leaves a partial record without its newline
+        with open(self.log_path, "a") as f:
+            f.write('{"op": "update", "key": "em')
+        Student.update_student("s6@mycsu.edu", {"marks": 98}, file_path=self.file_path)
+        FileHandler.invalidate()
+        self.assertEqual(FileHandler.find_row(self.file_path, "email", "s3@mycsu.edu")["marks"], "99")
+        self.assertEqual(FileHandler.find_row(self.file_path, "email", "s6@mycsu.edu")["marks"], "98")
+
+    def test_update_many_is_one_log_record(self):
+        FileHandler.update_many(self.file_path, "email", {"s1@mycsu.edu": {"grade": "B"}, "s2@mycsu.edu": {"marks": 7}})
+        with open(self.log_path) as f:
+            self.assertEqual(len(f.read().splitlines()), 2)  # base marker + the batch
+        with self.assertRaises(ValueError):
+            FileHandler.update_many(self.file_path, "email", {"s3@mycsu.edu": {"grade": "B"}, "nobody@mycsu.edu": {"grade": "B"}})
+        cached = FileHandler.read_all(self.file_path)
+        FileHandler.invalidate()
+        self.assertEqual(FileHandler.read_all(self.file_path), cached)
+        self.assertEqual([(r["grade"], r["marks"]) for r in cached[1:4]], [("B", "1"), ("A", "7"), ("A", "3")])
+
+    def test_leaving_log_mode_folds_pending_log(self):
+        self.apply_changes()
+        merged = FileHandler.read_all(self.file_path)
+        config.LOG_MODE = False
+        Student.add_new_student(Student("late@mycsu.edu", "Late", "Comer", "DATA200", "C", 70), file_path=self.file_path)
+        self.assertFalse(os.path.exists(self.log_path))
+        FileHandler.invalidate()
+        rows = FileHandler.read_all(self.file_path)
+        self.assertEqual(rows[:-1], merged)
+        self.assertEqual(rows[-1]["email"], "late@mycsu.edu")
+
+
+class TestFileHandlerSecondaryIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        with open(self.file_path, "w") as f:
+            f.write(",".join(Student.FIELDS) + "\n")
+        Student.add_new_students(
+            [Student(f"s{i}@mycsu.edu", "F", "L", f"DATA2{i % 3}0", "A", i) for i in range(30)],
+            file_path=self.file_path,
+        )
+
+    def tearDown(self):
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def scan(self, cid):
+        return [r for r in FileHandler.read_all(self.file_path) if r["course_id"] == cid]
+
+    def test_find_all_tracks_writes(self):
+        self.assertEqual(Student.list_by_course("DATA200", file_path=self.file_path), self.scan("DATA200"))
+        Student.update_student("s0@mycsu.edu", {"course_id": "DATA210"}, file_path=self.file_path)
+        Student.delete_student("s3@mycsu.edu", file_path=self.file_path)
+        Student.add_new_student(Student("n@mycsu.edu", "N", "N", "DATA200", "B", 50), file_path=self.file_path)
+        for cid in ("DATA200", "DATA210", "DATA220", "NOPE"):
+            self.assertEqual(Student.list_by_course(cid, file_path=self.file_path), self.scan(cid))
+
+    def test_update_and_delete_by_non_unique_column(self):
+        FileHandler.update_csv(self.file_path, "course_id", "DATA220", {"grade": "C"})
+        self.assertTrue(all(r["grade"] == "C" for r in self.scan("DATA220")))
+        FileHandler.delete_from_csv(self.file_path, "course_id", "DATA210")
+        self.assertEqual(Student.list_by_course("DATA210", file_path=self.file_path), [])
+        FileHandler.invalidate()
+        self.assertEqual(len(FileHandler.read_all(self.file_path)), 20)
+
+
+class TestFileHandlerIterRows(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        FileHandler.insert_many(
+            self.file_path,
+            [{"email": f"s{i}@mycsu.edu", "first_name": f"F{i}", "last_name": f"L{i}",
+              "course_id": f"DATA2{i % 2}0", "grade": "A", "marks": i} for i in range(25)],
+            "email",
+            Student.FIELDS,
+        )
+        FileHandler.compact(self.file_path)
+        FileHandler.invalidate()
+        FileHandler.reset_cache_stats()
+
+    def tearDown(self):
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_streams_without_caching(self):
+        rows = FileHandler.iter_rows(self.file_path, where=lambda r: int(r["marks"]) >= 20, columns=["email"])
+        self.assertEqual(next(rows), {"email": "s20@mycsu.edu"})
+        self.assertEqual(len(list(rows)), 4)
+        self.assertEqual(FileHandler.cache_stats(), {"hits": 0, "misses": 0, "entries": 0})
+
+    def test_cached_and_streamed_results_agree(self):
+        streamed = list(FileHandler.iter_rows(self.file_path, where={"course_id": "DATA210"}))
+        FileHandler.read_all(self.file_path)
+        cached = list(FileHandler.iter_rows(self.file_path, where={"course_id": "DATA210"}))
+        self.assertEqual(streamed, cached)
+        self.assertEqual(len(cached), 12)
+        self.assertEqual(list(FileHandler.iter_rows(os.path.join(self.tmpdir, "missing.csv"))), [])
@@ -0,0 +1,84 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from models.grade import Grade
+from models.student import Student
+from utils.file_handler import FileHandler
+from utils.grading import GradeScale
+
+class TestGradeScale(unittest.TestCase):
+    def test_letters_by_band(self):
+        scale = GradeScale.from_rows([
+            {"grade_id": "G2", "grade": "B", "marks_range": "80-89"},
+            {"grade_id": "G1", "grade": "A", "marks_range": " 90 - 100 "},
+            {"grade_id": "G4", "grade": "F", "marks_range": "0-59"},
+        ])
+        self.assertEqual(scale.lows, [0, 80, 90])
+        self.assertEqual([scale.letter(m) for m in (0, 59, 60, 79, 80, 89, 90, 100, 101, -1)],
+                         ["F", "F", None, None, "B", "B", "A", "A", None, None])
+        self.assertEqual([scale.grade(t) for t in ("85", "", None, "x")], ["B", None, None, None])
+
+    def test_invalid_ranges(self):
+        for marks_range in ("90", "90-", "a-b", "90-80", "", None):
+            with self.assertRaises(ValueError):
+                GradeScale.parse_range(marks_range)
+        with self.assertRaises(ValueError):
+            GradeScale([(80, 90, "B"), (90, 100, "A")])
+
+
+class TestRegrade(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.grades = os.path.join(self.tmpdir, "grades.csv")
+        self.students = os.path.join(self.tmpdir, "students.csv")
+        Grade.add_new_grades(
+            [Grade("G1", "A", "90-100"), Grade("G2", "B", "80-89"), Grade("G3", "C", "70-79")], file_path=self.grades
+        )
+        Student.add_new_students([
+            Student("a@mycsu.edu", "A", "A", "DATA200", "A", 95),
+            Student("b@mycsu.edu", "B", "B", "DATA200", "A", 85),
+            Student("c@mycsu.edu", "C", "C", "DATA200", "", 72),
+            Student("d@mycsu.edu", "D", "D", "DATA200", "B", 40),
+            Student("e@mycsu.edu", "E", "E", "DATA210", "C", 99),
+        ], file_path=self.students)
+
+    def tearDown(self):
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_overlapping_grades_are_refused(self):
+        with self.assertRaises(ValueError):
+            Grade.add_new_grade(Grade("G4", "D", "60-70"), file_path=self.grades)
+        with self.assertRaises(ValueError):
+            Grade.update_grade("G3", {"marks_range": "70-80"}, file_path=self.grades)
+        report = Grade.add_new_grades(
+            [Grade("G4", "D", "60-69"), Grade("G5", "E", "65-66"), Grade("G1", "A", "0-1"), Grade("G6", "F", "x")],
+            file_path=self.grades,
+        )
+        self.assertEqual([s for _, s in report], ["inserted", "invalid", "duplicate", "invalid"])
+        self.assertEqual(len(Grade.scale(self.grades)), 4)
+
+    def test_dry_run_flags_disagreements(self):
+        report = Student.regrade_course("DATA200", file_path=self.students, dry_run=True)
+        self.assertEqual(report["students"], 4)
+        self.assertEqual(report["changed"], [("b@mycsu.edu", "A", "B"), ("c@mycsu.edu", "", "C")])
+        self.assertEqual(report["ungradable"], ["d@mycsu.edu"])
+        self.assertEqual(FileHandler.find_row(self.students, "email", "b@mycsu.edu")["grade"], "A")
+
+    def test_regrade_writes_the_course_once(self):
+        Student.regrade_course("DATA200", file_path=self.students)
+        grades = {r["email"]: r["grade"] for r in FileHandler.read_all(self.students)}
+        self.assertEqual(grades, {"a@mycsu.edu": "A", "b@mycsu.edu": "B", "c@mycsu.edu": "C",
+                                  "d@mycsu.edu": "B", "e@mycsu.edu": "C"})
+        FileHandler.invalidate()
+        self.assertEqual(Student.regrade_course("DATA200", file_path=self.students, dry_run=True)["changed"], [])
+
+        # the view follows later writes
+        Student.update_student("a@mycsu.edu", {"marks": 81}, file_path=self.students)
+        report = Student.regrade_course("DATA200", file_path=self.students, dry_run=True)
+        self.assertEqual(report["changed"], [("a@mycsu.edu", "A", "B")])
+
+if __name__ == "__main__":
+    unittest.main()
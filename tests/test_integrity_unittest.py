@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from models.course import Course
+from models.professor import Professor
+from models.student import Student
+from utils import config, integrity
+from utils.file_handler import FileHandler
+
+class TestReferentialIntegrity(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.courses = os.path.join(self.tmpdir, "courses.csv")
+        self.students = os.path.join(self.tmpdir, "students.csv")
+        self.professors = os.path.join(self.tmpdir, "professors.csv")
+        self.saved = config.FOREIGN_KEYS
+        config.FOREIGN_KEYS = True
+        Course.add_new_courses([Course("DATA200", "A", ""), Course("DATA210", "B", "")], file_path=self.courses)
+        Student.add_new_students(
+            [Student(f"s{i}@mycsu.edu", "F", "L", f"DATA2{i % 2}0", "A", 90) for i in range(6)], file_path=self.students
+        )
+        Professor.add_new_professors([Professor("p1@mycsu.edu", "P", "Lecturer", "DATA200")], file_path=self.professors)
+
+    def tearDown(self):
+        config.FOREIGN_KEYS = self.saved
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def course_ids(self, path):
+        return sorted(r["course_id"] for r in FileHandler.read_all(path))
+
+    def test_writes_need_a_known_course(self):
+        with self.assertRaises(ValueError):
+            Student.add_new_student(Student("x@mycsu.edu", "X", "Y", "DATA999", "A", 90), file_path=self.students)
+        with self.assertRaises(ValueError):
+            Student.update_student("s0@mycsu.edu", {"course_id": "1"}, file_path=self.students)
+        with self.assertRaises(ValueError):
+            Professor.add_new_professor(Professor("p2@mycsu.edu", "P", "Lecturer", "DATA999"), file_path=self.professors)
+        with self.assertRaises(ValueError):
+            Professor.update_professor("p1@mycsu.edu", {"course_id": "DATA999"}, file_path=self.professors)
+
+        report = Student.add_new_students(
+            [Student("ok@mycsu.edu", "O", "K", "DATA210", "A", 90), Student("no@mycsu.edu", "N", "O", "1", "A", 90)],
+            file_path=self.students,
+        )
+        self.assertEqual(report, [("ok@mycsu.edu", "inserted"), ("no@mycsu.edu", "invalid")])
+        report = Professor.add_new_professors([Professor("p3@mycsu.edu", "P", "Lecturer", "DATA999")], file_path=self.professors)
+        self.assertEqual(report, [("p3@mycsu.edu", "invalid")])
+
+        config.FOREIGN_KEYS = False
+        Student.add_new_student(Student("x@mycsu.edu", "X", "Y", "DATA999", "A", 90), file_path=self.students)
+
+    def test_delete_restricts_unless_cascading(self):
+        with self.assertRaises(ValueError):
+            Course.delete_course("DATA200", file_path=self.courses)
+        with self.assertRaises(ValueError):
+            Course.delete_course("DATA200", file_path=self.courses, cascade="reassign", reassign_to="DATA999")
+        self.assertEqual(Course.dependents("DATA200", self.courses), (3, 1))
+
+        Course.delete_course("DATA200", file_path=self.courses, cascade="reassign", reassign_to="DATA210")
+        self.assertEqual(self.course_ids(self.students), ["DATA210"] * 6)
+        self.assertEqual(self.course_ids(self.professors), ["DATA210"])
+
+        Course.delete_course("DATA210", file_path=self.courses, cascade="delete")
+        self.assertEqual(FileHandler.read_all(self.students), [])
+        self.assertEqual(FileHandler.read_all(self.professors), [])
+        self.assertEqual(FileHandler.read_all(self.courses), [])
+
+    def test_referenced_course_keeps_its_id(self):
+        with self.assertRaises(ValueError):
+            Course.update_course("DATA200", {"course_id": "DATA201"}, file_path=self.courses)
+        with self.assertRaises(ValueError):
+            Course.update_course("DATA200", {"course_id": "DATA210"}, file_path=self.courses)
+        Course.update_course("DATA200", {"name": "Renamed"}, file_path=self.courses)
+        Course.add_new_course(Course("DATA230", "C", ""), file_path=self.courses)
+        Course.update_course("DATA230", {"course_id": "DATA231"}, file_path=self.courses)
+        self.assertEqual(self.course_ids(self.courses), ["DATA200", "DATA210", "DATA231"])
+
+    def test_scan_reports_orphans(self):
+        config.FOREIGN_KEYS = False
+        Student.add_new_student(Student("x@mycsu.edu", "X", "Y", "1", "A", 90), file_path=self.students)
+        Course.delete_course("DATA210", file_path=self.courses)
+        report = integrity.scan(self.tmpdir)
+        self.assertEqual(report["courses"], 1)
+        students = report["tables"]["students"]
+        self.assertEqual((students["rows"], students["orphans"]), (7, 4))
+        self.assertEqual(students["missing"], {"DATA210": 3, "1": 1})
+        self.assertEqual(students["examples"], ["s1@mycsu.edu", "s3@mycsu.edu", "s5@mycsu.edu", "x@mycsu.edu"])
+        self.assertEqual(report["tables"]["professors"]["orphans"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from models.login_user import LoginUser
+from utils import config
+from utils.auth import SessionStore
+from utils.encryption import hash_password, needs_rehash, verify_password
+from utils.file_handler import FileHandler
+
+class TestLoginUser(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "login.csv")
+        self.saved = config.PBKDF2_ITERATIONS
+        config.PBKDF2_ITERATIONS = 1000  # keep the suite fast
+        LoginUser.add_users([LoginUser("prof@mycsu.edu", "password2", "professor")], file_path=self.file_path)
+
+    def tearDown(self):
+        config.PBKDF2_ITERATIONS = self.saved
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def stored(self, email):
+        return FileHandler.find_row(self.file_path, LoginUser.KEY, email)["password"]
+
+    def test_passwords_are_salted_hashes(self):
+        stored = self.stored("prof@mycsu.edu")
+        self.assertTrue(stored.startswith("pbkdf2_sha256$1000$"))
+        self.assertNotEqual(stored, hash_password("password2"))
+        self.assertTrue(verify_password("password2", stored))
+        self.assertFalse(verify_password("password3", stored))
+
+    def test_verify_returns_role(self):
+        self.assertEqual(LoginUser.verify("prof@mycsu.edu", "password2", file_path=self.file_path), "professor")
+        self.assertIsNone(LoginUser.verify("prof@mycsu.edu", "nope", file_path=self.file_path))
+        self.assertIsNone(LoginUser.verify("nobody@mycsu.edu", "password2", file_path=self.file_path))
+        self.assertTrue(LoginUser.authenticate("prof@mycsu.edu", "password2", file_path=self.file_path))
+
+    def test_add_users_rejects_blank_passwords_before_hashing(self):
+        with mock.patch("models.login_user.hash_password", wraps=hash_password) as hashed:
+            report = LoginUser.add_users(
+                [
+                    LoginUser("a@mycsu.edu", "", "admin"),
+                    LoginUser("prof@mycsu.edu", "password9", "professor"),
+                    LoginUser("b@mycsu.edu", "password3", "student"),
+                ],
+                file_path=self.file_path,
+            )
+        self.assertEqual(report, [("a@mycsu.edu", "invalid"), ("prof@mycsu.edu", "duplicate"), ("b@mycsu.edu", "inserted")])
+        self.assertEqual(hashed.call_count, 1)
+        self.assertIsNone(LoginUser.verify("a@mycsu.edu", "", file_path=self.file_path))
+        self.assertEqual(LoginUser.verify("b@mycsu.edu", "password3", file_path=self.file_path), "student")
+
+    def test_legacy_and_outdated_entries_are_rehashed(self):
+        # base64 of "password1", as the old reversible scheme stored it
+        FileHandler.write_to_csv(
+            self.file_path, {"email": "old@mycsu.edu", "password": "cGFzc3dvcmQx", "role": "admin"}, LoginUser.FIELDS
+        )
+        self.assertIsNone(LoginUser.verify("old@mycsu.edu", "password2", file_path=self.file_path))
+        self.assertEqual(self.stored("old@mycsu.edu"), "cGFzc3dvcmQx")
+        self.assertEqual(LoginUser.verify("old@mycsu.edu", "password1", file_path=self.file_path), "admin")
+        self.assertFalse(needs_rehash(self.stored("old@mycsu.edu")))
+
+        config.PBKDF2_ITERATIONS = 2000
+        self.assertTrue(needs_rehash(self.stored("prof@mycsu.edu")))
+        LoginUser.verify("prof@mycsu.edu", "password2", file_path=self.file_path)
+        self.assertTrue(self.stored("prof@mycsu.edu").startswith("pbkdf2_sha256$2000$"))
+
+    def test_sessions_expire_when_idle(self):
+        now = [0.0]
+        store = SessionStore(ttl=60, clock=lambda: now[0])
+        session = store.issue("prof@mycsu.edu", "professor")
+        now[0] = 50
+        self.assertEqual(store.get(session.token).role, "professor")
+        now[0] = 100  # renewed at 50, so still alive
+        self.assertIsNotNone(store.get(session.token))
+        now[0] = 161
+        self.assertIsNone(store.get(session.token))
+
+        other = store.issue("prof@mycsu.edu", "professor")
+        self.assertTrue(store.revoke(other.token))
+        self.assertIsNone(store.get(other.token))
+        self.assertEqual(len(store), 0)
+
+    def test_start_session(self):
+        self.assertIsNone(LoginUser.start_session("prof@mycsu.edu", "nope", file_path=self.file_path))
+        session = LoginUser.start_session("prof@mycsu.edu", "password2", file_path=self.file_path)
+        self.assertEqual((session.email, session.role), ("prof@mycsu.edu", "professor"))
+
+if __name__ == "__main__":
+    unittest.main()
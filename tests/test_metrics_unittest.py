@@ -0,0 +1,72 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from models.student import Student
+from utils import config, metrics
+from utils.file_handler import FileHandler
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        self.saved = (config.METRICS, config.ENGINE, config.LOG_MODE)
+        config.ENGINE, config.LOG_MODE = "csv", False  # bytes are counted by the CSV engine
+        metrics.registry.reset()
+
+    def tearDown(self):
+        config.METRICS, config.ENGINE, config.LOG_MODE = self.saved
+        metrics.registry.reset()
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def add(self, n):
+        Student.add_new_students(
+            [Student(f"s{i}@mycsu.edu", "F", "L", "DATA200", "A", i) for i in range(n)], file_path=self.file_path
+        )
+
+    def test_nothing_recorded_when_disabled(self):
+        config.METRICS = False
+        self.add(5)
+        Student.search_by_email("s1@mycsu.edu", file_path=self.file_path)
+        self.assertEqual(metrics.registry.snapshot(), {})
+
+    def test_operations_rows_and_bytes(self):
+        config.METRICS = True
+        self.add(5)
+        appended = metrics.registry.snapshot()["csv.append"]
+        metrics.registry.reset()
+        FileHandler.invalidate()
+        Student.search_by_email("s1@mycsu.edu", file_path=self.file_path)
+        Student.search_by_email("s2@mycsu.edu", file_path=self.file_path)
+        self.assertEqual(list(FileHandler.iter_rows(self.file_path, where={"course_id": "DATA200"})), Student.read_all(self.file_path))
+        with self.assertRaises(ValueError):
+            Student.delete_student("nobody@mycsu.edu", file_path=self.file_path)
+
+        snap = metrics.registry.snapshot()
+        self.assertEqual(snap["Student.search_by_email"]["calls"], 2)
+        self.assertEqual(sum(snap["Student.search_by_email"]["histogram"].values()), 2)
+        self.assertEqual(snap["Student.delete_student"]["errors"], 1)
+        self.assertEqual(appended["rows"], 5)
+        self.assertGreater(appended["bytes_written"], 0)
+        self.assertEqual(snap["FileHandler.load"]["rows"], 5)
+        self.assertEqual(snap["csv.load"]["bytes_read"], os.path.getsize(self.file_path))
+        self.assertEqual(snap["FileHandler.iter_rows"]["rows"], 5)
+
+    def test_measure_and_dump(self):
+        config.METRICS = True
+        with metrics.measure("custom") as span:
+            span.add(rows=3, bytes_read=10)
+        path = os.path.join(self.tmpdir, "metrics.json")
+        metrics.registry.dump(path)
+        with open(path) as f:
+            dumped = json.load(f)
+        self.assertTrue(dumped["enabled"])
+        self.assertEqual(dumped["metrics"]["custom"]["calls"], 1)
+        self.assertEqual(dumped["metrics"]["custom"]["rows"], 3)
+        self.assertEqual(metrics.registry.report()[1].split()[0], "custom")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from utils import config, parallel_csv
+from utils.storage import CsvEngine, _ReplayTable
+
+class TestParallelCsv(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        self.saved = (config.PARALLEL_LOAD_BYTES, config.PARALLEL_LOAD_WORKERS)
+
+    def tearDown(self):
+        config.PARALLEL_LOAD_BYTES, config.PARALLEL_LOAD_WORKERS = self.saved
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def write(self, rows):
+        with open(self.file_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["email", "first_name", "last_name", "course_id", "grade", "marks"])
+            writer.writerows(rows)
+
+    def load(self, threshold, workers=3):
+        config.PARALLEL_LOAD_BYTES, config.PARALLEL_LOAD_WORKERS = threshold, workers
+        table = CsvEngine().load(self.file_path, _ReplayTable)
+        return table.header, table.rows
+
+    def test_same_rows_as_serial_with_quoted_newlines(self):
+        rows = []
+        for i in range(400):
+            first = f'Line\n"{i}"\nbreak' if i % 7 == 0 else f"F{i}"
+            last = "O'Brien, Jr" if i % 5 == 0 else "\n"
+            rows.append([f"s{i}@mycsu.edu", first, last, "DATA200", "A", str(i % 101)])
+        rows.append(["short@mycsu.edu", "S"])
+        rows.append(["long@mycsu.edu", "L", "L", "DATA200", "B", "80", "extra"])
+        self.write(rows)
+        serial = self.load(0)
+        for workers in (2, 3, 16):
+            self.assertEqual(self.load(1, workers), serial)
+        self.assertEqual(len(serial[1]), len(rows))
+
+    def test_split_lands_on_record_boundaries(self):
+        data = b'a,b\n"x\n\n\n\n""\n",1\n2,3\n'
+        for parts in range(1, 8):
+            bounds = parallel_csv.split(data, 4, len(data), parts)
+            self.assertEqual(bounds[0], 4)
+            self.assertEqual(bounds[-1], len(data))
+            self.assertTrue(set(bounds[1:-1]) <= {len(data) - 4})
+
+    def test_file_replaced_during_load_falls_back_to_snapshot(self):
+        self.write([[f"s{i}@mycsu.edu", "F", "L", "DATA200", "A", "1"] for i in range(1000)])
+        other = os.path.join(self.tmpdir, "new.csv")
+        with open(other, "w") as f:
+            f.write("email,first_name,last_name,course_id,grade,marks\r\n")
+        real_load = parallel_csv.load
+
+        def replaced_then_load(f, n=None):
+            os.replace(other, self.file_path)  # what CsvEngine._rewrite does
+            return real_load(f, n)
+
+        with open(self.file_path, "rb") as f, self.assertRaises(parallel_csv.FileReplaced):
+            replaced_then_load(f, 2)
+        self.write([[f"s{i}@mycsu.edu", "F", "L", "DATA200", "A", "1"] for i in range(1000)])
+        with open(other, "w") as f:
+            f.write("email,first_name,last_name,course_id,grade,marks\r\n")
+        with mock.patch.object(parallel_csv, "load", replaced_then_load):
+            header, rows = self.load(1, 2)
+        self.assertEqual(len(rows), 1000)
+
+    def test_small_files_stay_serial(self):
+        self.write([["s@mycsu.edu", "F", "L", "DATA200", "A", "1"]])
+        config.PARALLEL_LOAD_BYTES, config.PARALLEL_LOAD_WORKERS = 1024 * 1024, 4
+        with open(self.file_path, "rb") as f:
+            self.assertFalse(CsvEngine._parallel(f))
+        config.PARALLEL_LOAD_BYTES, config.PARALLEL_LOAD_WORKERS = 1, 1
+        with open(self.file_path, "rb") as f:
+            self.assertFalse(CsvEngine._parallel(f))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from models.course import Course
+from models.grade import Grade
+from models.student import Student
+from utils import query
+from utils.file_handler import FileHandler
+
+class TestQuery(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        Student.add_new_students(
+            [Student(f"s{i}@mycsu.edu", f"Ann{i % 7}", f"Lee{i % 5}", f"DATA2{i % 3}0", "ABC"[i % 3], (i * 37) % 101)
+             for i in range(60)],
+            file_path=self.file_path,
+        )
+        FileHandler.write_to_csv(self.file_path, {"email": "odd@mycsu.edu", "first_name": "Odd", "last_name": "Lee1",
+                                                  "course_id": "DATA200", "grade": "", "marks": "n/a"})
+        self.rows = FileHandler.read_all(self.file_path)
+
+    def tearDown(self):
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def q(self):
+        return Student.query(self.file_path)
+
+    def test_planner_picks_an_access_path(self):
+        self.assertIn("primary index (email = 's1@mycsu.edu')",
+                      self.q().where("course_id", "eq", "DATA200").where("email", "eq", "s1@mycsu.edu").explain())
+        plan = self.q().where("course_id", "eq", "DATA200").where("marks", "range", (50, None)).order_by("marks").explain()
+        self.assertIn("secondary index (course_id = 'DATA200')", plan)
+        self.assertIn("filter: marks in [50, ]", plan)
+        self.assertIn("sort index hits by marks", plan)
+        self.assertIn("counting sort on marks desc", self.q().order_by("marks", descending=True).explain())
+        self.assertIn("sort keys view on last_name, first_name", self.q().order_by("last_name", "first_name").explain())
+
+        contains = self.q().where(("first_name", "last_name"), "contains", "ann1")
+        self.assertIn("access: full scan", contains.explain())
+        query.search_index(self.file_path, ("first_name", "last_name"))
+        self.assertIn("access: n-gram index", contains.explain())
+
+    def test_results_match_a_full_scan(self):
+        def marks(r):
+            return int(r["marks"]) if r["marks"].isdigit() else None
+
+        got = self.q().where("course_id", "eq", "DATA210").where("marks", "range", (20, 80)).all()
+        self.assertEqual(got, [r for r in self.rows if r["course_id"] == "DATA210" and 20 <= (marks(r) or -1) <= 80])
+
+        expected = [r for r in self.rows if "ann1" in r["first_name"].casefold() or "ann1" in r["last_name"].casefold()]
+        self.assertEqual(self.q().where(("first_name", "last_name"), "contains", "ANN1").all(), expected)
+        query.search_index(self.file_path, ("first_name", "last_name"))
+        self.assertEqual(self.q().where(("first_name", "last_name"), "contains", "ANN1").all(), expected)
+
+        numbered = sorted((r for r in self.rows if marks(r) is not None), key=marks, reverse=True)
+        by_marks = numbered + [r for r in self.rows if marks(r) is None]
+        self.assertEqual(self.q().order_by("marks", descending=True).all(), by_marks)
+        self.assertEqual(self.q().order_by("marks", descending=True).limit(5, offset=3).all(), by_marks[3:8])
+        in_course = [r for r in by_marks if r["course_id"] == "DATA200"]
+        self.assertEqual(self.q().where("course_id", "eq", "DATA200").order_by("marks", descending=True).all(), in_course)
+        self.assertEqual(
+            self.q().where("grade", "range", ("B", "C")).order_by("marks", descending=True).limit(4).select("email").all(),
+            [{"email": r["email"]} for r in by_marks if r["grade"] in ("B", "C")][:4],
+        )
+        by_name = sorted(self.rows, key=lambda r: (r["last_name"].casefold(), r["first_name"].casefold()))
+        self.assertEqual(self.q().order_by("last_name", "first_name").all(), by_name)
+
+    def test_wrappers_and_other_tables(self):
+        self.assertEqual(Student.sort_students(by="name", file_path=self.file_path, limit=3),
+                         self.q().order_by("last_name", "first_name").limit(3).all())
+        self.assertEqual(Student.search_by_email("s4@mycsu.edu", file_path=self.file_path)[0], self.rows[4])
+        self.assertEqual(len(Student.list_by_course("DATA220", file_path=self.file_path)), 20)
+
+        courses = os.path.join(self.tmpdir, "courses.csv")
+        Course.add_new_courses([Course("DATA200", "Data", "x"), Course("MATH100", "Math", "y")], file_path=courses)
+        self.assertEqual(Course.query(courses).where("name", "contains", "at").select("course_id").all(),
+                         [{"course_id": "DATA200"}, {"course_id": "MATH100"}])
+        grades = os.path.join(self.tmpdir, "grades.csv")
+        Grade.add_new_grades([Grade("G1", "A", "90-100"), Grade("G2", "B", "80-89")], file_path=grades)
+        self.assertEqual(Grade.query(grades).order_by("grade", descending=True).select("grade_id").all(),
+                         [{"grade_id": "G2"}, {"grade_id": "G1"}])
+
+    def test_bad_queries(self):
+        with self.assertRaises(ValueError):
+            self.q().where("marks", "like", "1")
+        with self.assertRaises(ValueError):
+            self.q().where("marks", "range", 5)
+        with self.assertRaises(ValueError):
+            self.q().select("password").all()
+        with self.assertRaises(ValueError):
+            self.q().limit(-1)
+
+if __name__ == "__main__":
+    unittest.main()
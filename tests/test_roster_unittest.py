@@ -0,0 +1,83 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from models.student import Student
+from utils import config, roster
+from utils.file_handler import FileHandler
+
+HEADER = "email,first_name,last_name,course_id,grade,marks\n"
+
+class TestRoster(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        self.saved = config.ENGINE
+        config.ENGINE = "csv"
+        Student.add_new_students([Student("old@mycsu.edu", "Old", "Timer", "DATA200", "B", 85)], file_path=self.file_path)
+
+    def tearDown(self):
+        config.ENGINE = self.saved
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def run_import(self, text, **kwargs):
+        kwargs.setdefault("course_ids", {"DATA200", "DATA210"})
+        return list(roster.import_roster(io.StringIO(text), file_path=self.file_path, **kwargs))
+
+    def test_errors_are_reported_per_line_and_the_rest_imported(self):
+        lines = self.run_import(
+            HEADER
+            + " Ann@MyCSU.edu , Ann ,Lee,data200,a,91\n"
+            + "not-an-email,Bad,Email,DATA200,A,90\n"
+            + "\n"
+            + "marks@mycsu.edu,Bad,Marks,DATA200,A,101\n"
+            + "course@mycsu.edu,Bad,Course,DATA999,A,70\n"
+            + "ann@mycsu.edu,Ann,Again,DATA210,B,80\n"
+            + "old@mycsu.edu,Old,Timer,DATA200,B,85\n"
+            + "bo@mycsu.edu,Bo,\"Multi\nLine\",DATA210,C,72\n"
+            + "cy@mycsu.edu,Cy,Po,DATA210,,\n",
+            batch_size=2,
+        )
+        report = [(line.line_no, line.status) for line in lines]
+        self.assertEqual(
+            report,
+            [(2, "inserted"), (3, "invalid"), (5, "invalid"), (6, "invalid"), (7, "duplicate"),
+             (8, "duplicate"), (10, "inserted"), (11, "invalid")],
+        )
+        self.assertIn("DATA999", lines[3].error)
+        rows = {r["email"]: r for r in FileHandler.read_all(self.file_path)}
+        self.assertEqual(sorted(rows), ["ann@mycsu.edu", "bo@mycsu.edu", "old@mycsu.edu"])
+        self.assertEqual((rows["ann@mycsu.edu"]["first_name"], rows["ann@mycsu.edu"]["course_id"]), ("Ann", "DATA200"))
+        self.assertEqual(rows["bo@mycsu.edu"]["last_name"], "Multi\nLine")
+
+    def test_dry_run_writes_nothing(self):
+        lines = self.run_import(HEADER + "new@mycsu.edu,N,E,DATA200,A,90\nold@mycsu.edu,O,T,DATA200,B,85\n", dry_run=True)
+        self.assertEqual([line.status for line in lines], ["inserted", "duplicate"])
+        self.assertEqual(len(FileHandler.read_all(self.file_path)), 1)
+
+    def test_missing_columns(self):
+        with self.assertRaises(ValueError):
+            self.run_import("email,marks\na@mycsu.edu,1\n")
+
+    def test_export_columns_and_filter_round_trip(self):
+        self.run_import(HEADER + "".join(f"s{i}@mycsu.edu,F{i},L{i},DATA2{i % 2}0,A,{i}\n" for i in range(50)))
+        out = io.StringIO()
+        written = roster.export_roster(out, file_path=self.file_path, columns=["email", "marks"], where={"course_id": "DATA210"})
+        self.assertEqual(written, 25)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[:2], ["email,marks", "s1@mycsu.edu,1"])
+
+        out = io.StringIO()
+        roster.export_roster(out, file_path=self.file_path, where=lambda r: int(r["marks"]) >= 45)
+        other = os.path.join(self.tmpdir, "other.csv")
+        lines = list(roster.import_roster(io.StringIO(out.getvalue()), file_path=other, course_ids=None))
+        self.assertEqual([line.status for line in lines], ["inserted"] * 6)
+        self.assertEqual(FileHandler.read_all(other), [r for r in FileHandler.read_all(self.file_path) if int(r["marks"]) >= 45])
+        with self.assertRaises(ValueError):
+            roster.export_roster(io.StringIO(), file_path=self.file_path, columns=["email", "password"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,238 @@
+import asyncio
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from models.course import Course
+from models.login_user import LoginUser
+from models.professor import Professor
+from models.student import Student
+from utils import config
+from utils.encryption import verify_password
+from utils.file_handler import FileHandler
+from utils.service import GradeClient, GradeServer
+
+MODELS = (Student, Course, Professor, LoginUser)
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs Unix domain sockets")
+class TestGradeService(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.saved = {m: m.DATA_FILE for m in MODELS}
+        for m in MODELS:
+            m.DATA_FILE = os.path.join(self.tmpdir, os.path.basename(m.DATA_FILE))
+            FileHandler.write_header_if_missing(m.DATA_FILE, m.FIELDS)
+        LoginUser.add_users([
+            LoginUser("admin@mycsu.edu", "password1", "admin"),
+            LoginUser("s1@mycsu.edu", "password1", "student"),
+            LoginUser("p1@mycsu.edu", "password1", "professor"),
+        ])
+        Course.add_new_courses([Course(f"DATA2{i}0", f"Course {i}", "") for i in range(3)])
+        Student.add_new_students(
+            [Student(f"s{i}@mycsu.edu", f"F{i}", f"L{i}", f"DATA2{i % 2}0", "A", i) for i in range(30)]
+        )
+
+        self.socket_path = os.path.join(self.tmpdir, "grades.sock")
+        self.server = GradeServer(self.socket_path)
+        self.loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.server.start())
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        ready.wait(5)
+        self.client = self.connect()
+
+    def connect(self, email="admin@mycsu.edu"):
+        client = GradeClient(self.socket_path)
+        client.call("login", email=email, password="password1")
+        return client
+
+    def tearDown(self):
+        self.client.close()
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        for m, path in self.saved.items():
+            m.DATA_FILE = path
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_login_session(self):
+        session = self.client.call("login", email="admin@mycsu.edu", password="password1")
+        self.assertEqual(session["role"], "admin")
+        self.assertIsNone(self.client.call("login", email="admin@mycsu.edu", password="nope"))
+        self.assertEqual(self.client.call("session", token=session["token"])["email"], "admin@mycsu.edu")
+        self.assertTrue(self.client.call("logout", token=session["token"]))
+        with self.assertRaises(PermissionError):
+            self.client.call("session", token=session["token"])
+
+    def test_login_hashes_off_the_event_loop(self):
+        # base64 of "password1", as the old reversible scheme stored it
+        FileHandler.write_to_csv(
+            LoginUser.DATA_FILE, {"email": "old@mycsu.edu", "password": "cGFzc3dvcmQx", "role": "professor"}, LoginUser.FIELDS
+        )
+        threads = []
+
+        def verify(password, stored):
+            threads.append(threading.current_thread())
+            return verify_password(password, stored)
+
+        with mock.patch("utils.service.verify_password", verify):
+            session = self.client.call("login", email="old@mycsu.edu", password="password1")
+        self.assertEqual(session["role"], "professor")
+        self.assertNotIn(self.thread, threads)
+        FileHandler.invalidate()
+        stored = FileHandler.find_row(LoginUser.DATA_FILE, LoginUser.KEY, "old@mycsu.edu")["password"]
+        self.assertTrue(stored.startswith("pbkdf2_sha256$"))
+
+    def test_calls_need_a_session_and_role(self):
+        Professor.add_new_professor(Professor("P001", "Prof", "Lecturer", "DATA200"))
+        anonymous = GradeClient(self.socket_path)
+        student = self.connect("s1@mycsu.edu")
+        professor = self.connect("p1@mycsu.edu")
+        try:
+            with self.assertRaises(PermissionError):
+                anonymous.call("get", table="students", key="s7@mycsu.edu")
+            with self.assertRaises(PermissionError):
+                anonymous.call("delete", table="students", key="s7@mycsu.edu")
+
+            # a student sees their own record and nothing else
+            self.assertEqual(student.call("get", table="students", key="s1@mycsu.edu")["first_name"], "F1")
+            self.assertEqual(student.call("students.search_email", email="s1@mycsu.edu")[0]["first_name"], "F1")
+            for op, args in [
+                ("get", {"table": "students", "key": "s7@mycsu.edu"}),
+                ("students.search_email", {"email": "s7@mycsu.edu"}),
+                ("rows", {"table": "students"}),
+                ("query", {"table": "students"}),
+                ("students.search_name", {"keyword": ""}),
+                ("get", {"table": "professors", "key": "P001"}),
+                ("update", {"table": "students", "key": "s1@mycsu.edu", "data": {"grade": "A"}}),
+                ("metrics.dump", {"name": "m.json"}),
+            ]:
+                with self.subTest(role="student", op=op, args=args), self.assertRaises(PermissionError):
+                    student.call(op, **args)
+
+            # a professor reads and updates student rows, and nothing else
+            professor.call("update", table="students", key="s7@mycsu.edu", data={"marks": "70"})
+            self.assertEqual(len(list(professor.iter_rows("students"))), 30)
+            for op, args in [
+                ("add", {"table": "courses", "fields": {"course_id": "DATA900"}}),
+                ("delete", {"table": "courses", "key": "DATA200", "cascade": "delete"}),
+                ("delete", {"table": "professors", "key": "P001"}),
+                ("delete", {"table": "students", "key": "s7@mycsu.edu"}),
+                ("add", {"table": "students", "fields": {"email": "x@mycsu.edu", "course_id": "DATA200"}}),
+                ("update", {"table": "courses", "key": "DATA200", "data": {"name": "X"}}),
+                ("get", {"table": "professors", "key": "P001"}),
+                ("courses.dependents", {"course_id": "DATA200"}),
+                ("metrics.reset", {}),
+            ]:
+                with self.subTest(role="professor", op=op, args=args), self.assertRaises(PermissionError):
+                    professor.call(op, **args)
+        finally:
+            anonymous.close()
+            student.close()
+            professor.close()
+        self.assertIsNotNone(FileHandler.find_row(Student.DATA_FILE, Student.KEY, "s7@mycsu.edu"))
+        self.assertIsNotNone(FileHandler.find_row(Professor.DATA_FILE, Professor.KEY, "P001"))
+        self.assertIsNone(FileHandler.find_row(Course.DATA_FILE, Course.KEY, "DATA900"))
+        self.assertEqual(len(list(FileHandler.iter_rows(Student.DATA_FILE, where={"course_id": "DATA200"}))), 15)
+
+    def test_metrics_dump_stays_in_its_directory(self):
+        saved = config.METRICS_DIR
+        config.METRICS_DIR = os.path.join(self.tmpdir, "metrics")
+        try:
+            for name in ("../escape.json", "/tmp/escape.json", ".hidden"):
+                with self.assertRaises(ValueError):
+                    self.client.call("metrics.dump", name=name)
+            path = self.client.call("metrics.dump", name="m.json")
+        finally:
+            config.METRICS_DIR = saved
+        self.assertEqual(path, os.path.join(self.tmpdir, "metrics", "m.json"))
+        self.assertTrue(os.path.isfile(path))
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir, "escape.json")))
+
+    def test_reads(self):
+        row, elapsed = self.client.call("students.search_email", email="s7@mycsu.edu")
+        self.assertEqual(row["first_name"], "F7")
+        rows, _ = self.client.call("students.search_name", keyword="f1")
+        self.assertEqual(len(rows), 11)
+        top = self.client.call("students.sort", by="marks", descending=True, limit=3)
+        self.assertEqual([r["marks"] for r in top], ["29", "28", "27"])
+        self.assertEqual(self.client.call("students.course_stats", course_id="DATA200"), Student.course_stats("DATA200"))
+        self.assertEqual(len(list(self.client.iter_rows("students", where={"course_id": "DATA210"}))), 15)
+
+    def test_rows_pages_by_cursor(self):
+        first = self.client.call("rows", table="students", where={"course_id": "DATA210"}, limit=4)
+        self.assertEqual([r["email"] for r in first["rows"]], ["s1@mycsu.edu", "s3@mycsu.edu", "s5@mycsu.edu", "s7@mycsu.edu"])
+        # rows before the cursor are deleted and the table vacuumed: the next page still starts at s9
+        for i in range(0, 8):
+            self.client.call("delete", table="students", key=f"s{i}@mycsu.edu")
+        FileHandler._table(Student.DATA_FILE).vacuum()
+        second = self.client.call("rows", table="students", where={"course_id": "DATA210"}, limit=4, cursor=first["next"])
+        self.assertEqual([r["email"] for r in second["rows"]], ["s9@mycsu.edu", "s11@mycsu.edu", "s13@mycsu.edu", "s15@mycsu.edu"])
+        last = self.client.call("rows", table="students", limit=100, cursor=second["next"])
+        # the cursor points at the next DATA210 row, s17
+        self.assertEqual([r["email"] for r in last["rows"]], [f"s{i}@mycsu.edu" for i in range(17, 30)])
+        self.assertIsNone(last["next"])
+        with self.assertRaises(ValueError):
+            self.client.call("rows", table="students", cursor="not a cursor")
+
+    def test_crud_and_errors(self):
+        fields = {"email": "new@mycsu.edu", "first_name": "N", "last_name": "W", "course_id": "DATA200", "grade": "B", "marks": "77"}
+        self.client.call("add", table="students", fields=fields)
+        with self.assertRaises(ValueError):
+            self.client.call("add", table="students", fields=fields)
+        self.client.call("update", table="students", key="new@mycsu.edu", data={"grade": "A"})
+        self.assertEqual(self.client.call("get", table="students", key="new@mycsu.edu")["grade"], "A")
+        self.client.call("delete", table="students", key="new@mycsu.edu")
+        self.assertIsNone(self.client.call("get", table="students", key="new@mycsu.edu"))
+        # the service writes through to the files other processes read
+        FileHandler.invalidate()
+        self.assertIsNone(FileHandler.find_row(Student.DATA_FILE, Student.KEY, "new@mycsu.edu"))
+        with self.assertRaises(ValueError):
+            self.client.call("drop_everything")
+
+    def test_failed_write_does_not_stop_the_writer(self):
+        def fail():
+            raise OSError("disk full")
+
+        with self.assertRaises(OSError):
+            asyncio.run_coroutine_threadsafe(self.server._write(fail), self.loop).result(5)
+        self.client.call("update", table="students", key="s7@mycsu.edu", data={"grade": "B"})
+        self.assertEqual(self.client.call("get", table="students", key="s7@mycsu.edu")["grade"], "B")
+
+    def test_concurrent_clients(self):
+        errors = []
+
+        def work(n):
+            client = self.connect()
+            try:
+                for i in range(10):
+                    email = f"c{n}-{i}@mycsu.edu"
+                    client.call("add", table="students", fields={"email": email, "course_id": "DATA220", "marks": "50"})
+                    if client.call("get", table="students", key=email) is None:
+                        errors.append(email)
+            finally:
+                client.close()
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(list(self.client.iter_rows("students", where={"course_id": "DATA220"}))), 50)
+
+if __name__ == "__main__":
+    unittest.main()
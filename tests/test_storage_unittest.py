@@ -0,0 +1,93 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from models.student import Student
+from utils import config, storage
+from utils.file_handler import FileHandler
+
+class TestSqliteEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.tmpdir, "students.csv")
+        self.db_path = os.path.join(self.tmpdir, config.SQLITE_DB_NAME)
+        self.saved = (config.ENGINE, config.LOG_MODE)
+        config.ENGINE = "sqlite"
+        config.LOG_MODE = False
+        FileHandler.invalidate()
+        Student.add_new_students(
+            [Student(f"s{i}@mycsu.edu", f"F{i}", f"L{i}", f"DATA2{i % 2}0", "A", i) for i in range(20)],
+            file_path=self.file_path,
+        )
+
+    def tearDown(self):
+        config.ENGINE, config.LOG_MODE = self.saved
+        storage.get_engine("sqlite").close()
+        FileHandler.invalidate()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_rows_live_in_the_database(self):
+        self.assertFalse(os.path.exists(self.file_path))
+        with sqlite3.connect(self.db_path) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM students").fetchone()[0], 20)
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+
+    def test_update_delete_and_order(self):
+        Student.update_student("s3@mycsu.edu", {"grade": "B"}, file_path=self.file_path)
+        Student.delete_student("s0@mycsu.edu", file_path=self.file_path)
+        FileHandler.invalidate()
+        rows = FileHandler.read_all(self.file_path)
+        self.assertEqual([r["email"] for r in rows], [f"s{i}@mycsu.edu" for i in range(1, 20)])
+        self.assertEqual(rows[2]["grade"], "B")
+
+    def test_update_many_in_one_transaction(self):
+        FileHandler.update_many(
+            self.file_path, "email", {"s1@mycsu.edu": {"grade": "B"}, "s2@mycsu.edu": {"grade": "C", "marks": 50}}
+        )
+        FileHandler.invalidate()
+        rows = FileHandler.read_all(self.file_path)
+        self.assertEqual([(r["grade"], r["marks"]) for r in rows[:3]], [("A", "0"), ("B", "1"), ("C", "50")])
+
+    def test_change_by_another_connection_is_detected(self):
+        self.assertEqual(len(FileHandler.read_all(self.file_path)), 20)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM students WHERE email = 's5@mycsu.edu'")
+        self.assertIsNone(FileHandler.find_row(self.file_path, "email", "s5@mycsu.edu"))
+
+    def test_filtered_scan_is_pushed_down_to_an_index(self):
+        FileHandler.invalidate()
+        rows = list(FileHandler.iter_rows(self.file_path, where={"course_id": "DATA210"}, columns=["email"]))
+        self.assertEqual(len(rows), 10)
+        with sqlite3.connect(self.db_path) as conn:
+            plan = " ".join(r[-1] for r in conn.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM students WHERE course_id = ?", ("DATA210",)
+            ))
+        self.assertIn("students_course_id_idx", plan)
+
+    def test_migrate_copies_csv_rows_and_pending_log(self):
+        csv_path = os.path.join(self.tmpdir, "courses.csv")
+        config.ENGINE = "csv"
+        config.LOG_MODE = True
+        FileHandler.insert_many(
+            csv_path, [{"course_id": f"C{i}", "course_name": "X"} for i in range(5)], "course_id", ["course_id", "course_name"]
+        )
+        FileHandler.delete_from_csv(csv_path, "course_id", "C1")
+
+        csv_engine, sqlite_engine = storage.get_engine("csv"), storage.get_engine("sqlite")
+        self.assertEqual(storage.migrate(csv_path, csv_engine, sqlite_engine), 4)
+        with self.assertRaises(ValueError):
+            storage.migrate(csv_path, csv_engine, sqlite_engine)
+        self.assertEqual(storage.migrate(csv_path, csv_engine, sqlite_engine, replace=True), 4)
+
+        expected = FileHandler.read_all(csv_path)
+        config.ENGINE = "sqlite"
+        self.assertEqual(FileHandler.read_all(csv_path), expected)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            storage.get_engine("paper")
+
+if __name__ == "__main__":
+    unittest.main()
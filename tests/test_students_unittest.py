@@ -3,8 +3,12 @@ import shutil
 import tempfile
 import time
 import unittest
+from unittest import mock
 
+from models.course import Course
 from models.student import Student
+from utils import config
+from utils.storage import CsvEngine
 from utils.file_handler import FileHandler
 
 class TestStudents(unittest.TestCase):
@@ -42,10 +46,94 @@ class TestStudents(unittest.TestCase):
         rows = FileHandler.read_all(self.file_path)
         self.assertEqual(len(rows), 0)
 
+    def test_update_students_is_one_all_or_nothing_write(self):
+        saved = config.ENGINE, config.LOG_MODE
+        config.ENGINE, config.LOG_MODE = "csv", False
+        self.addCleanup(setattr, config, "LOG_MODE", saved[1])
+        self.addCleanup(setattr, config, "ENGINE", saved[0])
+        self.addCleanup(FileHandler.invalidate)
+        Course.add_new_courses([Course("DATA200", "A", ""), Course("DATA210", "B", "")],
+                               file_path=os.path.join(self.data_dir, "courses.csv"))
+        Student.add_new_students(
+            [Student(f"s{i}@mycsu.edu", "F", "L", "DATA200", "", 0) for i in range(300)], file_path=self.file_path
+        )
+        before = FileHandler.read_all(self.file_path)
+        for bad in ({"s1@mycsu.edu": {"marks": 50}, "nobody@mycsu.edu": {"marks": 50}},
+                    {"s1@mycsu.edu": {"marks": 50}, "s2@mycsu.edu": {"marks": "ninety"}},
+                    {"s1@mycsu.edu": {"marks": 50}, "s2@mycsu.edu": {"course_id": "DATA999"}},
+                    {"s1@mycsu.edu": {"email": "new@mycsu.edu"}},
+                    {"s1@mycsu.edu": {"nickname": "x"}}):
+            with self.assertRaises(ValueError):
+                Student.update_students(bad, file_path=self.file_path)
+        self.assertEqual(FileHandler.read_all(self.file_path), before)
+
+        with mock.patch.object(CsvEngine, "_rewrite", autospec=True, side_effect=CsvEngine._rewrite) as rewrite:
+            n = Student.update_students(
+                {f"s{i}@mycsu.edu": {"marks": i % 101} for i in range(300)} | {"s0@mycsu.edu": {"course_id": "DATA210"}},
+                file_path=self.file_path,
+            )
+        self.assertEqual((n, rewrite.call_count), (300, 1))
+        FileHandler.invalidate()
+        rows = FileHandler.read_all(self.file_path)
+        self.assertEqual([r["marks"] for r in rows[:3]], ["0", "1", "2"])
+        self.assertEqual(rows[0]["course_id"], "DATA210")
+
+    def test_keyset_pages(self):
+        self.addCleanup(FileHandler.invalidate)
+        Student.add_new_students(
+            [Student(f"s{i:03d}@mycsu.edu", f"F{i % 9}", f"L{i % 4}", "DATA200", "A", (i * 7) % 20) for i in range(95)],
+            file_path=self.file_path,
+        )
+        FileHandler.write_to_csv(self.file_path, {"email": "odd@mycsu.edu", "first_name": "O", "last_name": "D",
+                                                  "course_id": "DATA200", "grade": "", "marks": "absent"})
+        rows = FileHandler.read_all(self.file_path)
+        marked = [r for r in rows if r["marks"].isdigit()]
+        expected = {
+            ("marks", False): sorted(marked, key=lambda r: (int(r["marks"]), r["email"])) + rows[-1:],
+            ("marks", True): sorted(marked, key=lambda r: (int(r["marks"]), r["email"]), reverse=True) + rows[-1:],
+            ("name", False): sorted(rows, key=lambda r: (r["last_name"].casefold(), r["first_name"].casefold(), r["email"])),
+        }
+        for (by, desc), want in expected.items():
+            pages = [Student.sort_students(by=by, descending=desc, page_size=10, file_path=self.file_path)]
+            while pages[-1]["next"]:
+                pages.append(Student.sort_students(by=by, descending=desc, cursor=pages[-1]["next"], page_size=10,
+                                                   file_path=self.file_path))
+            self.assertEqual([r for page in pages for r in page["rows"]], want)
+            self.assertEqual(len(pages), 10)
+            self.assertIsNone(pages[0]["previous"])
+            back = Student.sort_students(by=by, descending=desc, cursor=pages[4]["previous"], page_size=10,
+                                         file_path=self.file_path)
+            self.assertEqual(back["rows"], pages[3]["rows"])
+
+        # a cursor keeps its place when rows are written in between
+        first = Student.sort_students(by="marks", page_size=3, file_path=self.file_path)
+        Student.add_new_student(Student("aaa@mycsu.edu", "A", "A", "DATA200", "A", 0), file_path=self.file_path)
+        Student.delete_student(first["rows"][2]["email"], file_path=self.file_path)
+        second = Student.sort_students(by="marks", page_size=3, cursor=first["next"], file_path=self.file_path)
+        self.assertEqual(second["rows"], expected[("marks", False)][3:6])
+
+        with self.assertRaises(ValueError):
+            Student.sort_students(by="name", cursor=first["next"], page_size=3, file_path=self.file_path)
+        with self.assertRaises(ValueError):
+            Student.sort_students(by="marks", cursor="not a cursor", page_size=3, file_path=self.file_path)
+
+        # writes between pages are merged in one go: a change made and undone, and a batch larger than
+        # KeysetIndex.MERGE_ONE_BY_ONE
+        Student.update_student("s001@mycsu.edu", {"marks": 19}, file_path=self.file_path)
+        Student.update_student("s001@mycsu.edu", {"marks": 7}, file_path=self.file_path)
+        batch = [r["email"] for r in FileHandler.read_all(self.file_path) if r["marks"].isdigit()][10:70]
+        Student.update_students({email: {"marks": str(i % 20)} for i, email in enumerate(batch)}, file_path=self.file_path)
+        Student.add_new_students([Student(f"t{i:02d}@mycsu.edu", "T", "T", "DATA200", "A", i % 20) for i in range(40)],
+                                 file_path=self.file_path)
+        rows = FileHandler.read_all(self.file_path)
+        want = sorted((r for r in rows if r["marks"].isdigit()), key=lambda r: (int(r["marks"]), r["email"]))
+        want += [r for r in rows if not r["marks"].isdigit()]
+        self.assertEqual(Student.sort_students(by="marks", page_size=1000, file_path=self.file_path)["rows"], want)
+
     def test_1000_records_search_and_sort(self):
-        # Add 1000 students
-        for i in range(1000):
-            s = Student(
+        # Add 1000 students in one batch
+        students = (
+            Student(
                 f"student{i}@mycsu.edu",
                 f"First{i}",
                 f"Last{i}",
@@ -53,24 +141,21 @@ class TestStudents(unittest.TestCase):
                 "A",
                 i % 101
             )
-            Student.add_new_student(s, file_path=self.file_path)
+            for i in range(1000)
+        )
+        report = Student.add_new_students(students, file_path=self.file_path)
+        self.assertTrue(all(status == "inserted" for _, status in report))
 
         # load and simple search
         t_load_start = time.time()
         rows = FileHandler.read_all(self.file_path)
         t_load_end = time.time()
 
-        t_search_start = time.time()
         target = "student999@mycsu.edu"
-        found = None
-        for r in rows:
-            if r["email"] == target:
-                found = r
-                break
-        t_search_end = time.time()
+        found, search_time = Student.search_by_email(target, file_path=self.file_path)
 
         print("\nLoad time:", round(t_load_end - t_load_start, 6), "sec")
-        print("Search time:", round(t_search_end - t_search_start, 6), "sec")
+        print("Search time (index probe):", round(search_time, 6), "sec")
 
         self.assertEqual(len(rows), 1000)
         self.assertIsNotNone(found)
@@ -0,0 +1,145 @@
+# utils/aggregates.py
+import math
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MARKS_MIN = 0
+MARKS_MAX = 100
+
+
+class MarksHistogram:
+    """Count, sum and per-mark histogram of the integer marks of one group."""
+
+    __slots__ = ("count", "total", "buckets", "overflow")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.buckets = [0] * (MARKS_MAX - MARKS_MIN + 1)
+        # Marks outside MARKS_MIN..MARKS_MAX are rare; keep them exact in a dict
+        self.overflow: Dict[int, int] = {}
+
+    def add(self, mark: int, n: int = 1) -> None:
+        self.count += n
+        self.total += mark * n
+        if MARKS_MIN <= mark <= MARKS_MAX:
+            self.buckets[mark - MARKS_MIN] += n
+        else:
+            left = self.overflow.get(mark, 0) + n
+            if left:
+                self.overflow[mark] = left
+            else:
+                del self.overflow[mark]
+
+    def items(self) -> Iterator[Tuple[int, int]]:
+        """(mark, count) pairs in ascending mark order, skipping empty buckets."""
+        below = sorted(m for m in self.overflow if m < MARKS_MIN)
+        above = sorted(m for m in self.overflow if m > MARKS_MAX)
+        for m in below:
+            yield m, self.overflow[m]
+        for i, n in enumerate(self.buckets):
+            if n:
+                yield i + MARKS_MIN, n
+        for m in above:
+            yield m, self.overflow[m]
+
+    def nth(self, ranks: List[int]) -> List[int]:
+        """Marks at the given 0-based ranks (ascending) of the sorted marks."""
+        out = []
+        i = 0
+        seen = 0
+        for mark, n in self.items():
+            seen += n
+            while i < len(ranks) and ranks[i] < seen:
+                out.append(mark)
+                i += 1
+            if i == len(ranks):
+                break
+        return out
+
+    def median(self):
+        # Same result as statistics.median: the middle mark, or the mean of
+        # the two middle marks when the count is even
+        mid = self.count // 2
+        if self.count % 2:
+            return self.nth([mid])[0]
+        lo, hi = self.nth([mid - 1, mid])
+        return (lo + hi) / 2
+
+    def stats(self, course_id: str) -> Dict[str, object]:
+        """The course_stats dict for a non-empty histogram."""
+        lo, hi = self.nth([0, self.count - 1])
+        return {
+            "course_id": course_id,
+            "count": self.count,
+            "average": round(self.total / self.count, 2),
+            "median": self.median(),
+            "min": lo,
+            "max": hi,
+        }
+
+    def percentile(self, p: float) -> int:
+        """Nearest-rank percentile, 0 < p <= 100."""
+        rank = max(0, math.ceil(p * self.count / 100) - 1)
+        return self.nth([min(rank, self.count - 1)])[0]
+
+
+class CourseAggregates:
+    """
+    Per-course marks aggregates kept in step with the students table, so
+    course statistics never need to scan the rows. Used as a FileHandler view.
+    """
+
+    def __init__(self, group_column: str = "course_id", value_column: str = "marks"):
+        self.group_column = group_column
+        self.value_column = value_column
+        self.groups: Dict[str, MarksHistogram] = {}
+
+    def _mark(self, row: Dict[str, str]) -> Optional[int]:
+        value = row.get(self.value_column)
+        if value in (None, "", "None"):
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            return None
+
+    def _add(self, row: Dict[str, str], n: int) -> None:
+        mark = self._mark(row)
+        if mark is None:
+            return
+        group = row.get(self.group_column)
+        hist = self.groups.get(group)
+        if hist is None:
+            hist = self.groups[group] = MarksHistogram()
+        hist.add(mark, n)
+        if not hist.count:
+            del self.groups[group]
+
+    # view protocol
+    def build(self, rows) -> "CourseAggregates":
+        self.groups.clear()
+        for row in rows:
+            if row is not None:
+                self._add(row, 1)
+        return self
+
+    def insert(self, pos: int, row: Dict[str, str]) -> None:
+        self._add(row, 1)
+
+    def remove(self, pos: int, row: Dict[str, str]) -> None:
+        self._add(row, -1)
+
+    def update(self, pos: int, old: Dict[str, str], new: Dict[str, str]) -> None:
+        self._add(old, -1)
+        self._add(new, 1)
+
+    # queries
+    def histogram(self, group: str) -> Optional[MarksHistogram]:
+        return self.groups.get(group)
+
+    def stats(self, group: str) -> Optional[Dict[str, object]]:
+        hist = self.groups.get(group)
+        return hist.stats(group) if hist is not None else None
+
+    def all_stats(self) -> Dict[str, Dict[str, object]]:
+        return {group: self.stats(group) for group in sorted(self.groups, key=str)}
@@ -0,0 +1,189 @@
+# utils/analytics.py
+"""
+Department-level grade analytics computed for every course in one pass.
+
+The marks, course_id and grade columns are loaded once; with NumPy
+installed all per-course figures come out of a single vectorized group-by
+(bincount over course codes plus one lexsort for the order statistics).
+Without NumPy the same figures are computed in pure Python from per-course
+histograms. Both paths give identical results, and the count, average,
+median, min and max fields equal Student.course_stats.
+"""
+import math
+from typing import Dict, List, Optional
+
+from utils.aggregates import MARKS_MAX, MARKS_MIN, MarksHistogram
+from utils.file_handler import FileHandler
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+HAVE_NUMPY = np is not None
+PERCENTILES = (25, 75, 90)
+
+
+class _Columns:
+    """course_id / grade / marks columns of the students table, encoded once."""
+
+    def __init__(self):
+        self.courses: List[str] = []      # code -> course_id
+        self.letters: List[str] = []      # code -> grade letter
+        self.row_courses: List[int] = []  # course code of every row
+        self.row_letters: List[int] = []  # grade code of every row
+        self.mark_courses: List[int] = [] # course code of every row with integer marks
+        self.marks: List[int] = []
+
+    @staticmethod
+    def load(file_path: str) -> "_Columns":
+        cols = _Columns()
+        course_ids: Dict[str, int] = {}
+        letter_ids: Dict[str, int] = {}
+        for row in FileHandler.iter_rows(file_path, columns=["course_id", "grade", "marks"]):
+            cid = row["course_id"]
+            code = course_ids.get(cid)
+            if code is None:
+                code = course_ids[cid] = len(cols.courses)
+                cols.courses.append(cid)
+            letter = row["grade"]
+            lcode = letter_ids.get(letter)
+            if lcode is None:
+                lcode = letter_ids[letter] = len(cols.letters)
+                cols.letters.append(letter)
+            cols.row_courses.append(code)
+            cols.row_letters.append(lcode)
+            # same rule as course_stats: skip empty or non-integer marks
+            raw = row["marks"]
+            if raw in (None, "", "None"):
+                continue
+            try:
+                mark = int(raw)
+            except ValueError:
+                continue
+            cols.mark_courses.append(code)
+            cols.marks.append(mark)
+        return cols
+
+
+def _summary(course_id, count, total, sumsq, lo, hi, median, percentiles, histogram, letters):
+    # population standard deviation from exact integer sums
+    variance = (count * sumsq - total * total) / (count * count)
+    return {
+        "course_id": course_id,
+        "count": count,
+        "average": round(total / count, 2),
+        "median": median,
+        "min": lo,
+        "max": hi,
+        "std_dev": round(math.sqrt(max(variance, 0.0)), 2),
+        "percentiles": percentiles,
+        "histogram": histogram,
+        "letters": letters,
+    }
+
+
+def _report_python(cols: _Columns) -> Dict[str, Dict[str, object]]:
+    hists = [MarksHistogram() for _ in cols.courses]
+    sumsq = [0] * len(cols.courses)
+    for code, mark in zip(cols.mark_courses, cols.marks):
+        hists[code].add(mark)
+        sumsq[code] += mark * mark
+    letters = [[0] * len(cols.letters) for _ in cols.courses]
+    for code, lcode in zip(cols.row_courses, cols.row_letters):
+        letters[code][lcode] += 1
+
+    report = {}
+    for code, cid in enumerate(cols.courses):
+        hist = hists[code]
+        if not hist.count:
+            continue
+        lo, hi = hist.nth([0, hist.count - 1])
+        report[cid] = _summary(
+            cid, hist.count, hist.total, sumsq[code], lo, hi, hist.median(),
+            {p: hist.percentile(p) for p in PERCENTILES},
+            list(hist.buckets),
+            {cols.letters[i]: n for i, n in enumerate(letters[code]) if n},
+        )
+    return report
+
+
+def _report_numpy(cols: _Columns) -> Dict[str, Dict[str, object]]:
+    k = len(cols.courses)
+    width = MARKS_MAX - MARKS_MIN + 1
+    codes = np.asarray(cols.mark_courses, dtype=np.int64)
+    marks = np.asarray(cols.marks, dtype=np.int64)
+
+    counts = np.bincount(codes, minlength=k)
+    totals = np.bincount(codes, weights=marks, minlength=k)
+    squares = np.bincount(codes, weights=marks.astype(np.float64) ** 2, minlength=k)
+    # sort by (course, mark) once; each course is then a contiguous run
+    ordered = marks[np.lexsort((marks, codes))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    in_range = (marks >= MARKS_MIN) & (marks <= MARKS_MAX)
+    histograms = np.bincount(
+        codes[in_range] * width + (marks[in_range] - MARKS_MIN), minlength=k * width
+    ).reshape(k, width)
+    n_letters = len(cols.letters)
+    letters = np.bincount(
+        np.asarray(cols.row_courses, dtype=np.int64) * n_letters + np.asarray(cols.row_letters, dtype=np.int64),
+        minlength=k * n_letters,
+    ).reshape(k, n_letters)
+
+    report = {}
+    for code, cid in enumerate(cols.courses):
+        count = int(counts[code])
+        if not count:
+            continue
+        start = int(starts[code])
+        run = ordered[start:start + count]
+        mid = count // 2
+        if count % 2:
+            median = int(run[mid])
+        else:
+            median = (int(run[mid - 1]) + int(run[mid])) / 2
+        percentiles = {p: int(run[max(0, math.ceil(p * count / 100) - 1)]) for p in PERCENTILES}
+        report[cid] = _summary(
+            cid, count, int(totals[code]), int(squares[code]), int(run[0]), int(run[-1]), median,
+            percentiles,
+            histograms[code].tolist(),
+            {cols.letters[i]: int(n) for i, n in enumerate(letters[code]) if n},
+        )
+    return report
+
+
+def course_report(file_path: Optional[str] = None, use_numpy: Optional[bool] = None) -> Dict[str, Dict[str, object]]:
+    """
+    Return {course_id: stats} for every course with marks. Each stats dict
+    has count, average, median, min, max (as in Student.course_stats) plus
+    std_dev, percentiles {25, 75, 90}, a 0-100 marks histogram and the
+    grade-letter distribution.
+    """
+    from models.student import Student
+
+    cols = _Columns.load(file_path or Student.DATA_FILE)
+    if use_numpy is None:
+        use_numpy = HAVE_NUMPY
+    if use_numpy and not HAVE_NUMPY:
+        raise RuntimeError("NumPy is not installed")
+    return _report_numpy(cols) if use_numpy else _report_python(cols)
+
+
+def compare_courses(report: Dict[str, Dict[str, object]], metric: str = "average") -> List[Dict[str, object]]:
+    """
+    Rank the courses of a course_report by metric (highest first) and show
+    how far each one sits from the department-wide value.
+    """
+    students = sum(s["count"] for s in report.values())
+    if not students:
+        return []
+    if metric == "average":
+        overall = sum(s["average"] * s["count"] for s in report.values()) / students
+    else:
+        overall = sum(s[metric] for s in report.values()) / len(report)
+    ranked = sorted(report.values(), key=lambda s: s[metric], reverse=True)
+    return [
+        {"course_id": s["course_id"], metric: s[metric], "delta": round(s[metric] - overall, 2)}
+        for s in ranked
+    ]
@@ -0,0 +1,68 @@
+# utils/auth.py
+import secrets
+import time
+from typing import Callable, Dict, Optional
+
+from utils import config
+
+
+class Session:
+    __slots__ = ("token", "email", "role", "expires")
+
+    def __init__(self, token: str, email: str, role: str, expires: float):
+        self.token = token
+        self.email = email
+        self.role = role
+        self.expires = expires
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"token": self.token, "email": self.email, "role": self.role}
+
+
+class SessionStore:
+    """
+    In-memory login sessions keyed by an unguessable token. A session lives
+    for ttl seconds after it was last used; portal actions look the user up
+    here instead of going back to login.csv.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self.sessions: Dict[str, Session] = {}
+
+    def _ttl(self) -> float:
+        return config.SESSION_TTL if self.ttl is None else self.ttl
+
+    def issue(self, email: str, role: str) -> Session:
+        self.purge()
+        token = secrets.token_urlsafe(32)
+        session = self.sessions[token] = Session(token, email, role, self.clock() + self._ttl())
+        return session
+
+    def get(self, token: str) -> Optional[Session]:
+        """The live session for token, with its lifetime renewed; None if unknown or expired."""
+        session = self.sessions.get(token)
+        if session is None:
+            return None
+        now = self.clock()
+        if session.expires <= now:
+            del self.sessions[token]
+            return None
+        session.expires = now + self._ttl()
+        return session
+
+    def revoke(self, token: str) -> bool:
+        return self.sessions.pop(token, None) is not None
+
+    def purge(self) -> None:
+        now = self.clock()
+        for token in [t for t, s in self.sessions.items() if s.expires <= now]:
+            del self.sessions[token]
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+
+# Sessions of this process (the grade service, or a standalone main.py)
+sessions = SessionStore()
@@ -0,0 +1,54 @@
+# utils/config.py
+# Storage settings. Each one can be overridden from the environment, or by
+# assigning to the module attribute before the first read/write.
+import os
+
+
+def _flag(name: str, default: bool) -> bool:
+    return os.environ.get(name, "1" if default else "0").strip().lower() in ("1", "true", "yes", "on")
+
+
+# Log-structured mode: updates and deletes are appended to "<file>.log"
+# instead of rewriting the whole CSV; reads merge the base file with the log.
+LOG_MODE = _flag("CMG_LOG_MODE", False)
+
+# Fold the log back into the base CSV once it is at least COMPACT_MIN_BYTES
+# and COMPACT_RATIO times the size of the base file, or whenever it passes
+# COMPACT_MAX_BYTES regardless of the base size.
+COMPACT_MIN_BYTES = int(os.environ.get("CMG_COMPACT_MIN_BYTES", 64 * 1024))
+COMPACT_RATIO = float(os.environ.get("CMG_COMPACT_RATIO", 0.5))
+COMPACT_MAX_BYTES = int(os.environ.get("CMG_COMPACT_MAX_BYTES", 64 * 1024 * 1024))
+
+# Storage engine behind FileHandler: "csv" keeps one CSV file per table,
+# "sqlite" keeps every table of a data directory in one SQLite database
+# named SQLITE_DB_NAME next to the CSV paths (see migrate_to_sqlite.py).
+ENGINE = os.environ.get("CMG_ENGINE", "csv").strip().lower()
+SQLITE_DB_NAME = os.environ.get("CMG_SQLITE_DB", "checkmygrade.db")
+
+# Check that every course_id written to students.csv or professors.csv names
+# a course in courses.csv, and refuse to delete or rename a course that is
+# still referenced unless a cascade is asked for (Course.delete_course).
+FOREIGN_KEYS = _flag("CMG_FOREIGN_KEYS", True)
+
+# Unix domain socket of the grade service (main.py --serve / --client).
+SOCKET_PATH = os.environ.get("CMG_SOCKET", "data/checkmygrade.sock")
+
+# Cost of the PBKDF2-SHA256 password hashes in login.csv. Raising it makes
+# each login slower; existing hashes are upgraded on their next login.
+PBKDF2_ITERATIONS = int(os.environ.get("CMG_PBKDF2_ITERATIONS", 200_000))
+
+# Seconds a login session stays valid without being used.
+SESSION_TTL = float(os.environ.get("CMG_SESSION_TTL", 30 * 60))
+
+# Record call counts, latencies, rows and bytes per operation in
+# utils.metrics.registry (admin menu: Metrics). Off by default.
+METRICS = _flag("CMG_METRICS", False)
+# Where metrics dumps requested through the service are written; clients
+# only choose the file name.
+METRICS_DIR = os.environ.get("CMG_METRICS_DIR", "data/metrics")
+
+# CSV files of at least this many bytes are parsed by several worker
+# processes at once (utils/parallel_csv.py); 0 turns that off. Workers
+# default to one per usable core, and one core means serial parsing.
+PARALLEL_LOAD_BYTES = int(os.environ.get("CMG_PARALLEL_LOAD_BYTES", 32 * 1024 * 1024))
+PARALLEL_LOAD_WORKERS = int(os.environ.get("CMG_PARALLEL_LOAD_WORKERS", 0))
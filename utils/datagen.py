@@ -0,0 +1,192 @@
+# utils/datagen.py
+"""
+Deterministic synthetic data for every table, at any scale. The same seed
+and sizes always give the same rows (only the salt of the password hash in
+login.csv changes from run to run).
+
+Each course gets its own mark distribution (a mean and spread drawn from
+the seed), and the grade letter of every row follows its marks through
+GRADE_SCALE. Rows are formatted in Python and written in large chunks
+straight to the CSV files, bypassing the per-row model checks, so a
+million students take seconds rather than minutes.
+
+By default every student takes one course, so each students.csv row has its
+own email (Student.KEY). With max_courses > 1 a student gets one row per
+enrollment, all sharing the email, and the models then treat the email as
+the student rather than a row: search_by_email returns the first
+enrollment, update_student changes every enrollment and delete_student
+removes them all, and add_new_student refuses the email. Use it to load
+test multi-enrollment reads, not per-course edits.
+"""
+import itertools
+import os
+import random
+import tempfile
+from typing import Dict, Iterable, List, Tuple
+
+from models.course import Course
+from models.grade import Grade
+from models.login_user import LoginUser
+from models.professor import Professor
+from models.student import Student
+from utils.encryption import hash_password
+from utils.storage import keep_mode
+
+# (grade_id, letter, lowest mark, highest mark), best first
+GRADE_SCALE = [
+    ("G1", "A", 90, 100),
+    ("G2", "B", 80, 89),
+    ("G3", "C", 70, 79),
+    ("G4", "D", 60, 69),
+    ("G5", "F", 0, 59),
+]
+FIRST_NAMES = [
+    "Ada", "Alan", "Grace", "Linus", "Barbara", "Edsger", "Donald", "Frances", "Ken", "Margaret",
+    "Sam", "Lily", "Noah", "Mia", "Omar", "Priya", "Wei", "Sofia", "Mateo", "Aisha",
+    "Jonas", "Yuki", "Chloe", "Ravi", "Elena", "Tariq", "Hana", "Lucas", "Zara", "Ivan",
+]
+LAST_NAMES = [
+    "Lovelace", "Turing", "Hopper", "Torvalds", "Liskov", "Dijkstra", "Knuth", "Allen", "Thompson", "Hamilton",
+    "Carpenter", "Nguyen", "Garcia", "Smith", "Khan", "Patel", "Chen", "Rossi", "Silva", "Okafor",
+    "Muller", "Tanaka", "Martin", "Singh", "Petrova", "Haddad", "Kim", "Santos", "Ali", "Ivanov",
+]
+TOPICS = [
+    "Data Foundations", "Database Systems", "Algorithms", "Statistics", "Machine Learning",
+    "Data Visualization", "Distributed Systems", "Data Ethics", "Cloud Computing", "Big Data",
+]
+RANKS = ["Assistant", "Associate", "Full"]
+# Share of students taking 1, 2, 3, ... courses
+ENROLLMENT_WEIGHTS = [0.55, 0.3, 0.15]
+# Marks drawn per course up front; rows pick from this pool
+_POOL = 4096
+_CHUNK = 50_000
+
+
+def letter_for(mark: int) -> str:
+    for _, letter, low, high in GRADE_SCALE:
+        if low <= mark <= high:
+            return letter
+    return GRADE_SCALE[-1][1]
+
+
+def course_ids(n: int) -> List[str]:
+    return [f"DATA{200 + i}" for i in range(n)]
+
+
+def student_name(i: int) -> Tuple[str, str]:
+    """(first, last) of student number i; every pair comes up once per 900 students."""
+    return FIRST_NAMES[i % len(FIRST_NAMES)], LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+
+
+def student_email(i: int) -> str:
+    first, last = student_name(i)
+    return f"{first.lower()}.{last.lower()}{i}@mycsu.edu"
+
+
+def _write(path: str, header: List[str], lines: Iterable[str]) -> int:
+    """Write header + pre-formatted lines to path atomically, a chunk at a time; returns the line count."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            keep_mode(f.fileno(), path)
+            f.write(",".join(header) + "\r\n")
+            written = 0
+            lines = iter(lines)
+            while True:
+                chunk = list(itertools.islice(lines, _CHUNK))
+                if not chunk:
+                    break
+                f.write("".join(chunk))
+                written += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return written
+
+
+def _mark_pools(rng: random.Random, courses: int) -> List[List[int]]:
+    pools = []
+    for _ in range(courses):
+        mean = rng.uniform(58, 86)
+        spread = rng.uniform(6, 16)
+        pools.append([min(100, max(0, round(rng.gauss(mean, spread)))) for _ in range(_POOL)])
+    return pools
+
+
+def _student_lines(rng: random.Random, students: int, courses: List[str], max_courses: int):
+    # Names, course ids and marks only ever come from the tables above, none
+    # of which need CSV quoting, so rows are joined by hand (csv.writer is
+    # the slow part at this scale).
+    pools = _mark_pools(rng, len(courses))
+    letters = [letter_for(m) for m in range(101)]
+    weights = ENROLLMENT_WEIGHTS[:max_courses]
+    cumulative = [sum(weights[: k + 1]) / sum(weights) for k in range(len(weights))]
+    n_courses = len(courses)
+    bits = _POOL.bit_length() - 1
+    rand, randbelow, getrandbits = rng.random, rng.randrange, rng.getrandbits
+    for i in range(students):
+        first, last = student_name(i)
+        prefix = f"{first.lower()}.{last.lower()}{i}@mycsu.edu,{first},{last},"
+        r = rand()
+        taken = 1
+        while taken < len(cumulative) and r >= cumulative[taken - 1]:
+            taken += 1
+        taken = min(taken, n_courses)
+        # consecutive courses from a random start: distinct, and cheap to draw
+        start = randbelow(n_courses)
+        for k in range(taken):
+            c = (start + k) % n_courses
+            mark = pools[c][getrandbits(bits)]
+            yield f"{prefix}{courses[c]},{letters[mark]},{mark}\r\n"
+
+
+def generate(
+    out_dir: str,
+    students: int,
+    courses: int = 20,
+    professors: int = None,
+    seed: int = 0,
+    max_courses: int = 1,
+    password: str = "password1",
+) -> Dict[str, int]:
+    """
+    Write students.csv, courses.csv, professors.csv, grades.csv and login.csv
+    into out_dir, replacing any that exist. Every student, professor and an
+    admin@mycsu.edu get a login with `password` (one shared PBKDF2 hash, so
+    setup does not pay the hashing cost per user). Returns rows per file;
+    "students" counts enrollments, so it exceeds `students` when max_courses > 1
+    (see the module docstring for how the models treat those rows).
+    """
+    if students < 0 or courses < 1 or max_courses < 1:
+        raise ValueError("need students >= 0, courses >= 1 and max_courses >= 1")
+    professors = courses if professors is None else professors
+    rng = random.Random(seed)
+    ids = course_ids(courses)
+    counts: Dict[str, int] = {}
+
+    def path(model) -> str:
+        return os.path.join(out_dir, os.path.basename(model.DATA_FILE))
+
+    counts["grades"] = _write(path(Grade), Grade.FIELDS, (f"{g},{l},{lo}-{hi}\r\n" for g, l, lo, hi in GRADE_SCALE))
+    counts["courses"] = _write(
+        path(Course),
+        Course.FIELDS,
+        (f"{cid},{TOPICS[i % len(TOPICS)]} {i // len(TOPICS) + 1},Section {i + 1}\r\n" for i, cid in enumerate(ids)),
+    )
+    # professors teach the courses round-robin, so every course has at least one when professors >= courses
+    prof_rows: List[Tuple[str, str, str, str]] = [
+        (f"P{n + 1:04d}", f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.choice(RANKS), ids[n % courses])
+        for n in range(professors)
+    ]
+    counts["professors"] = _write(path(Professor), Professor.FIELDS, (",".join(r) + "\r\n" for r in prof_rows))
+    counts["students"] = _write(path(Student), Student.FIELDS, _student_lines(rng, students, ids, max_courses))
+
+    stored = hash_password(password)
+    logins = [f"admin@mycsu.edu,{stored},admin\r\n"]
+    logins += [f"{pid.lower()}@mycsu.edu,{stored},professor\r\n" for pid, *_ in prof_rows]
+    students_logins = (f"{student_email(i)},{stored},student\r\n" for i in range(students))
+    counts["login"] = _write(path(LoginUser), LoginUser.FIELDS, itertools.chain(logins, students_logins))
+    return counts
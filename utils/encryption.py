@@ -1,7 +1,49 @@
 import base64
+import hashlib
+import hmac
+import os
 
-def encrypt(password):
-    return base64.b64encode(password.encode()).decode()
+from utils import config
 
-def decrypt(encoded_password):
-    return base64.b64decode(encoded_password.encode()).decode()
+# Stored form: "pbkdf2_sha256$<iterations>$<salt>$<hash>" with base64 salt/hash.
+# Entries written before hashing was introduced are plain base64 of the
+# password; they still verify, and report needs_rehash() so callers can
+# replace them on the next successful login.
+ALGORITHM = "pbkdf2_sha256"
+SALT_BYTES = 16
+
+
+def hash_password(password, iterations=None):
+    iterations = iterations or config.PBKDF2_ITERATIONS
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return "$".join((ALGORITHM, str(iterations), base64.b64encode(salt).decode(), base64.b64encode(digest).decode()))
+
+
+def _parse(stored):
+    parts = stored.split("$")
+    if len(parts) != 4 or parts[0] != ALGORITHM:
+        return None
+    try:
+        return int(parts[1]), base64.b64decode(parts[2]), base64.b64decode(parts[3])
+    except ValueError:
+        return None
+
+
+def verify_password(password, stored):
+    """True if password matches the stored hash (or legacy base64 entry)."""
+    parsed = _parse(stored or "")
+    if parsed is None:
+        try:
+            legacy = base64.b64decode((stored or "").encode(), validate=True)
+        except ValueError:
+            return False
+        return hmac.compare_digest(legacy, password.encode())
+    iterations, salt, digest = parsed
+    return hmac.compare_digest(hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations), digest)
+
+
+def needs_rehash(stored):
+    """True for legacy entries and hashes made with a different cost than configured."""
+    parsed = _parse(stored or "")
+    return parsed is None or parsed[0] != config.PBKDF2_ITERATIONS
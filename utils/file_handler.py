@@ -1,76 +1,567 @@
 # utils/file_handler.py
-import csv
 import os
-from typing import List, Dict, Iterable, Optional
+from typing import Callable, List, Dict, Iterable, Iterator, KeysView, Optional, Set, Tuple, Union
+
+from utils import config, locking, metrics
+from utils.indexes import MultiIndex, UniqueIndex
+from utils.storage import StorageEngine, get_engine
+
+# Whatever the storage engine uses to tell that a table changed
+Signature = Tuple[object, ...]
+
+
+class _CachedTable:
+    """
+    Parsed rows of one CSV file, the stat signature they were read at and the
+    indexes and views built over them. Deleted rows are left as None holes so
+    that row positions held by indexes stay valid until the table is vacuumed.
+
+    A view is any derived structure with build(rows), insert(pos, row),
+    update(pos, old, new) and remove(pos, row); it is kept in step with every
+    change made through FileHandler and dropped when the file is re-parsed.
+    """
+
+    __slots__ = ("signature", "header", "rows", "holes", "indexes", "duplicated", "views")
+
+    def __init__(self, signature: Signature, header: List[str], rows: List[Optional[Dict[str, str]]]):
+        self.signature = signature
+        self.header = header
+        self.rows = rows
+        self.holes = 0
+        self.indexes: Dict[str, UniqueIndex] = {}
+        # Columns found to repeat a value; these are served by a MultiIndex view
+        self.duplicated: Set[str] = set()
+        self.views: Dict[str, object] = {}
+
+    def live_rows(self) -> List[Dict[str, str]]:
+        if not self.holes:
+            return self.rows
+        return [r for r in self.rows if r is not None]
+
+    def index(self, column: str) -> Union[UniqueIndex, MultiIndex]:
+        """Unique index on column, or its secondary index once the column repeats a value."""
+        if column in self.duplicated:
+            return self.secondary(column)
+        idx = self.indexes.get(column)
+        if idx is None:
+            idx = UniqueIndex(column).build(self.rows)
+            if not idx.unique:
+                self.duplicated.add(column)
+                return self.secondary(column)
+            self.indexes[column] = idx
+        return idx
+
+    def secondary(self, column: str) -> MultiIndex:
+        name = "secondary:" + column
+        view = self.views.get(name)
+        if view is None:
+            view = self.views[name] = MultiIndex(column).build(self.rows)
+        return view
+
+    def positions(self, column: str, value: str) -> List[int]:
+        """Positions, in file order, of every live row whose column equals value."""
+        return self.index(column).all(value)
+
+    def view(self, name: str, factory: Optional[Callable[[], object]] = None):
+        """The view called name, built with factory() on first use; None if unbuilt and no factory."""
+        view = self.views.get(name)
+        if view is None and factory is not None:
+            view = self.views[name] = factory()
+            view.build(self.rows)
+        return view
+
+    def _demote(self, column: str) -> None:
+        del self.indexes[column]
+        self.duplicated.add(column)
+
+    def append(self, row: Dict[str, str]) -> None:
+        pos = len(self.rows)
+        self.rows.append(row)
+        for column, idx in list(self.indexes.items()):
+            idx.insert(pos, row)
+            if not idx.unique:
+                self._demote(column)
+        for view in self.views.values():
+            view.insert(pos, row)
+
+    def replace(self, pos: int, row: Dict[str, str]) -> None:
+        old = self.rows[pos]
+        self.rows[pos] = row
+        for column, idx in list(self.indexes.items()):
+            idx.update(pos, old, row)
+            if not idx.unique:
+                self._demote(column)
+        for view in self.views.values():
+            view.update(pos, old, row)
+
+    def remove(self, pos: int) -> None:
+        old = self.rows[pos]
+        self.rows[pos] = None
+        self.holes += 1
+        for idx in self.indexes.values():
+            idx.remove(pos, old)
+        for view in self.views.values():
+            view.remove(pos, old)
+
+    def maybe_vacuum(self) -> None:
+        """Vacuum once holes outnumber live rows. Only call between batches:
+        vacuuming renumbers rows, so positions looked up earlier go stale."""
+        if self.holes > 64 and self.holes * 2 > len(self.rows):
+            self.vacuum()
+
+    def vacuum(self) -> None:
+        self.rows = [r for r in self.rows if r is not None]
+        self.holes = 0
+        for idx in self.indexes.values():
+            idx.build(self.rows)
+        for view in self.views.values():
+            view.build(self.rows)
+
 
 class FileHandler:
+    # Parsed tables keyed by absolute path. Every access revalidates the entry
+    # against the storage engine's signature (os.stat for CSV files), so edits
+    # made outside this process are still picked up.
+    _cache: Dict[str, _CachedTable] = {}
+    _hits = 0
+    _misses = 0
+
+    # STORAGE ENGINE
+    @staticmethod
+    def _engine() -> StorageEngine:
+        return get_engine(config.ENGINE)
+
+    # TABLE CACHE
+    @staticmethod
+    def _signature(file_path: str) -> Optional[Signature]:
+        return FileHandler._engine().signature(file_path)
+
+    @staticmethod
+    def _table(file_path: str) -> Optional[_CachedTable]:
+        """Return the parsed table for file_path, re-reading it only if it changed."""
+        path = os.path.abspath(file_path)
+        signature = FileHandler._signature(path)
+        if signature is None:
+            FileHandler._cache.pop(path, None)
+            return None
+
+        table = FileHandler._cache.get(path)
+        if table is not None and table.signature == signature:
+            FileHandler._hits += 1
+            return table
+
+        FileHandler._misses += 1
+        with metrics.measure("FileHandler.load") as span:
+            table = FileHandler._engine().load(path, lambda header, rows: _CachedTable(signature, header, rows))
+            span.add(rows=len(table.rows))
+        FileHandler._cache[path] = table
+        return table
+
+    @staticmethod
+    def _fresh_table(file_path: str) -> Optional[_CachedTable]:
+        """Return the cached table only if it still matches the file (never parses)."""
+        path = os.path.abspath(file_path)
+        table = FileHandler._cache.get(path)
+        if table is None:
+            return None
+        if table.signature != FileHandler._signature(path):
+            FileHandler._cache.pop(path, None)
+            return None
+        return table
+
+    @staticmethod
+    def _touch(file_path: str, table: _CachedTable) -> None:
+        """Re-stamp a table after we changed both it and its file ourselves."""
+        path = os.path.abspath(file_path)
+        signature = FileHandler._signature(path)
+        if signature is None:
+            FileHandler._cache.pop(path, None)
+            return
+        table.signature = signature
+        FileHandler._cache[path] = table
+
+    @staticmethod
+    def _as_cell(value: object) -> str:
+        # Mirror what csv.writer would put on disk, so cached rows equal re-read rows
+        return "" if value is None else str(value)
+
+    @staticmethod
+    def invalidate(file_path: Optional[str] = None) -> None:
+        """Drop the cached table for file_path, or every cached table if no path is given."""
+        if file_path is None:
+            FileHandler._cache.clear()
+        else:
+            FileHandler._cache.pop(os.path.abspath(file_path), None)
+
+    @staticmethod
+    def cache_stats() -> Dict[str, int]:
+        return {
+            "hits": FileHandler._hits,
+            "misses": FileHandler._misses,
+            "entries": len(FileHandler._cache),
+        }
+
+    @staticmethod
+    def reset_cache_stats() -> None:
+        FileHandler._hits = 0
+        FileHandler._misses = 0
+
+    # LOCKING
+    # Writers hold an exclusive flock on "<file>.lock" across their whole
+    # read-modify-write, and revalidate the cache once they have it, so
+    # concurrent processes never overwrite each other's changes. Readers do
+    # not lock: every write either replaces the file atomically or appends
+    # whole lines, and reads take a snapshot of complete lines only.
+    @staticmethod
+    def locked(file_path: str, shared: bool = False):
+        """
+        Context manager holding the cross-process lock of file_path: exclusive
+        by default, shared for readers that need several reads to agree.
+        Callers use it to make a check-then-write atomic.
+        """
+        return locking.locked(os.path.abspath(file_path) + ".lock", shared)
+
+    # COMPACTION
+    @staticmethod
+    def _maybe_compact(file_path: str) -> None:
+        if FileHandler._engine().needs_compaction(file_path):
+            FileHandler.compact(file_path)
+
     @staticmethod
+    @metrics.timed
+    def compact(file_path: str) -> None:
+        """Fold pending changes of file_path (the CSV change log) back into its base storage."""
+        with FileHandler.locked(file_path):
+            engine = FileHandler._engine()
+            if not engine.pending(file_path):
+                return
+            table = FileHandler._table(file_path)
+            if table is None:
+                return
+            engine.compact(file_path, table.header, table.live_rows())
+            FileHandler._touch(file_path, table)
+
+    # FILE OPERATIONS
+    @staticmethod
+    @metrics.timed
     def read_all(file_path: str) -> List[Dict[str, str]]:
-        if not os.path.isfile(file_path):
+        table = FileHandler._table(file_path)
+        if table is None:
             return []
-        with open(file_path, "r", newline="") as f:
-            reader = csv.DictReader(f)
-            return list(reader)
+        # Hand out copies: callers sort and mutate what they get back
+        return [dict(r) for r in table.rows if r is not None]
 
     @staticmethod
-    def write_header_if_missing(file_path: str, fieldnames: Iterable[str]) -> None:
-        # If file missing -> create with header
-        if not os.path.isfile(file_path):
-            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
-            with open(file_path, "w", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-            return
+    def iter_rows(
+        file_path: str,
+        where: Union[Dict[str, str], Callable[[Dict[str, str]], bool], None] = None,
+        columns: Optional[Iterable[str]] = None,
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Yield the rows of file_path one at a time, in file order.
+        where: {column: value} equality tests, or a predicate taking a row.
+        columns: only keep these columns in each yielded row.
+        If the table is already cached (or a change log must be merged) rows
+        come from memory and an equality filter is answered from an index;
+        otherwise the file is streamed without being cached, so memory stays
+        bounded by what the caller holds on to.
+        """
+        columns = list(columns) if columns else None
+        if isinstance(where, dict):
+            tests = list(where.items())
+            match = lambda r: all(r.get(k) == v for k, v in tests)
+        else:
+            tests = []
+            match = where
+
+        engine = FileHandler._engine()
+        table = FileHandler._fresh_table(file_path)
+        if table is None and not engine.can_stream(file_path):
+            table = FileHandler._table(file_path)
+        if table is not None:
+            if tests:
+                rows = table.rows
+                source = (rows[pos] for pos in table.positions(*tests[0]))
+            else:
+                source = (r for r in table.rows if r is not None)
+        else:
+            source = engine.scan(file_path, dict(tests) if tests else None)
 
-        # If file exists but header missing -> rewrite with header (rare)
-        with open(file_path, "r", newline="") as f:
-            first_line = f.readline().strip()
-        if not first_line:
-            with open(file_path, "w", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
+        scanned = 0
+        try:
+            for row in source:
+                scanned += 1
+                if match is not None and not match(row):
+                    continue
+                yield {c: row.get(c) for c in columns} if columns else dict(row)
+        finally:
+            metrics.count("FileHandler.iter_rows", rows=scanned)
 
     @staticmethod
-    def _current_header(file_path: str) -> Optional[List[str]]:
-        if not os.path.isfile(file_path):
+    def build_index(file_path: str, column: str) -> None:
+        """Load file_path and build the index on column ahead of the first probe."""
+        table = FileHandler._table(file_path)
+        if table is not None:
+            table.index(column)
+
+    @staticmethod
+    @metrics.timed
+    def find_row(file_path: str, key: str, value: str) -> Optional[Dict[str, str]]:
+        """Return a copy of the first row whose key column equals value, via the key index."""
+        table = FileHandler._table(file_path)
+        if table is None:
+            return None
+        pos = table.index(key).first(value)
+        return None if pos is None else dict(table.rows[pos])
+
+    @staticmethod
+    @metrics.timed
+    def find_all(file_path: str, column: str, value: str) -> List[Dict[str, str]]:
+        """Return copies, in file order, of every row whose column equals value, via an index."""
+        table = FileHandler._table(file_path)
+        if table is None:
+            return []
+        return [dict(table.rows[pos]) for pos in table.positions(column, value)]
+
+    @staticmethod
+    def keys(file_path: str, column: str) -> Optional[KeysView]:
+        """
+        Distinct values of column as a live, set-like view of its index, for
+        O(1) membership tests (foreign key checks). None if the file does not exist.
+        """
+        table = FileHandler._table(file_path)
+        if table is None:
             return None
-        with open(file_path, "r", newline="") as f:
-            line = f.readline().strip()
-            return line.split(",") if line else None
+        return table.index(column).positions.keys()
+
+    @staticmethod
+    def beside(file_path: Optional[str], data_file: str) -> str:
+        """
+        The table data_file of the data directory holding file_path, e.g. the
+        courses.csv next to a students.csv; data_file itself if file_path is None.
+        """
+        if file_path is None:
+            return data_file
+        return os.path.join(os.path.dirname(file_path), os.path.basename(data_file))
+
+    @staticmethod
+    def count(file_path: str, column: str, value: str) -> int:
+        """Number of rows whose column equals value, via an index."""
+        table = FileHandler._table(file_path)
+        return 0 if table is None else len(table.positions(column, value))
+
+    @staticmethod
+    def rows(file_path: str) -> Optional[List[Optional[Dict[str, str]]]]:
+        """
+        The cached rows themselves, deleted ones as None, for readers that
+        address rows by the positions indexes and views hand out. Read only,
+        and only valid until the next write. None if the file does not exist.
+        """
+        table = FileHandler._table(file_path)
+        return None if table is None else table.rows
+
+    @staticmethod
+    def table(file_path: str) -> Optional[_CachedTable]:
+        """
+        The cached table itself (header, rows, positions(), view()), for
+        readers such as utils/query.py that make several lookups per call:
+        the file is checked for changes once instead of once per lookup.
+        Read only, and only valid until the next write. None if the file
+        does not exist.
+        """
+        return FileHandler._table(file_path)
+
+    @staticmethod
+    def header(file_path: str) -> Optional[List[str]]:
+        table = FileHandler._table(file_path)
+        return None if table is None else table.header
 
     @staticmethod
+    def positions(file_path: str, column: str, value: str) -> List[int]:
+        """Positions (see rows()), in file order, of the rows whose column equals value, via an index."""
+        table = FileHandler._table(file_path)
+        return [] if table is None else table.positions(column, value)
+
+    @staticmethod
+    def view(file_path: str, name: str, factory: Optional[Callable[[], object]] = None):
+        """
+        Return the derived view called name over file_path, building it with
+        factory() on first use. None if the file does not exist, or if the
+        view was never built and no factory is given.
+        """
+        table = FileHandler._table(file_path)
+        return None if table is None else table.view(name, factory)
+
+    @staticmethod
+    @metrics.timed
+    def exists(file_path: str, key: str, value: str) -> bool:
+        table = FileHandler._table(file_path)
+        return table is not None and value in table.index(key)
+
+    @staticmethod
+    def write_header_if_missing(file_path: str, fieldnames: Iterable[str]) -> None:
+        with FileHandler.locked(file_path):
+            FileHandler._engine().ensure_table(file_path, fieldnames)
+
+    @staticmethod
+    def _current_header(file_path: str) -> Optional[List[str]]:
+        return FileHandler._engine().header(file_path)
+
+    @staticmethod
+    @metrics.timed
     def write_to_csv(file_path: str, data: Dict[str, object], fieldnames: Optional[Iterable[str]] = None) -> None:
-        # Preserve a stable column order
-        header = fieldnames or FileHandler._current_header(file_path) or list(data.keys())
-        FileHandler.write_header_if_missing(file_path, header)
-        with open(file_path, "a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=header)
-            writer.writerow(data)
+        with FileHandler.locked(file_path):
+            # Preserve a stable column order
+            header = list(fieldnames or FileHandler._current_header(file_path) or list(data.keys()))
+            FileHandler.write_header_if_missing(file_path, header)
+            FileHandler._append_rows(file_path, header, [data])
 
     @staticmethod
+    def _append_rows(file_path: str, header: List[str], rows: List[Dict[str, object]]) -> None:
+        table = FileHandler._fresh_table(file_path)
+        cells = [{h: FileHandler._as_cell(row.get(h)) for h in header} for row in rows]
+        FileHandler._engine().insert(file_path, header, cells)
+
+        if table is not None and table.header == header:
+            for row in cells:
+                table.append(row)
+            FileHandler._touch(file_path, table)
+        else:
+            # Columns were written in a different order than the file header;
+            # let the next read parse the file rather than guess the mapping.
+            FileHandler.invalidate(file_path)
+        FileHandler._maybe_compact(file_path)
+
+    @staticmethod
+    @metrics.timed
+    def insert_many(
+        file_path: str,
+        rows: Iterable[Dict[str, object]],
+        key: str,
+        fieldnames: Iterable[str],
+        validate: Optional[Callable[[Dict[str, object]], bool]] = None,
+        prepare: Optional[Callable[[Dict[str, object]], Dict[str, object]]] = None,
+    ) -> List[Tuple[object, str]]:
+        """
+        Append a batch of rows with one buffered write.
+        Returns (key value, status) per input row, in order, where status is
+        "inserted", "duplicate" (key already in the file or earlier in the
+        batch) or "invalid" (empty key, or rejected by validate).
+        prepare, if given, turns each accepted row into the row written.
+        """
+        with FileHandler.locked(file_path):
+            header = list(fieldnames)
+            FileHandler.write_header_if_missing(file_path, header)
+            table = FileHandler._table(file_path)
+            existing = table.index(key) if table is not None else {}
+
+            report = []
+            accepted = []
+            seen = set()
+            for row in rows:
+                value = row.get(key)
+                if not value or (validate is not None and not validate(row)):
+                    report.append((value, "invalid"))
+                elif value in existing or value in seen:
+                    report.append((value, "duplicate"))
+                else:
+                    seen.add(value)
+                    accepted.append(prepare(row) if prepare is not None else row)
+                    report.append((value, "inserted"))
+
+            if accepted:
+                FileHandler._append_rows(file_path, header, accepted)
+            return report
+
+    @staticmethod
+    @metrics.timed
     def delete_from_csv(file_path: str, key: str, value: str) -> None:
-        rows = FileHandler.read_all(file_path)
-        if not rows:
-            return
-        header = rows[0].keys()
-        kept = [r for r in rows if r.get(key) != value]
-        with open(file_path, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=header)
-            writer.writeheader()
-            writer.writerows(kept)
+        with FileHandler.locked(file_path):
+            table = FileHandler._table(file_path)
+            if table is None:
+                return
+            doomed = set(table.positions(key, value))
+            if not doomed:
+                return
+            FileHandler._engine().delete(
+                file_path,
+                table.header,
+                key,
+                value,
+                lambda: (r for pos, r in enumerate(table.rows) if r is not None and pos not in doomed),
+            )
+            for pos in doomed:
+                table.remove(pos)
+            table.maybe_vacuum()
+            FileHandler._touch(file_path, table)
+            FileHandler._maybe_compact(file_path)
 
     @staticmethod
+    @metrics.timed
     def update_csv(file_path: str, key: str, value: str, new_data: Dict[str, object]) -> None:
-        rows = FileHandler.read_all(file_path)
-        if not rows:
-            return
-        header = rows[0].keys()
-        out = []
-        for r in rows:
-            if r.get(key) == value:
-                r.update({k: str(v) for k, v in new_data.items()})
-            out.append(r)
-        with open(file_path, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=header)
-            writer.writeheader()
-            writer.writerows(out)
+        with FileHandler.locked(file_path):
+            table = FileHandler._table(file_path)
+            if table is None:
+                return
+            changes = {k: str(v) for k, v in new_data.items()}
+            unknown = [k for k in changes if k not in table.header]
+            if unknown:
+                raise ValueError(f"dict contains fields not in fieldnames: {', '.join(map(repr, unknown))}")
+            # Build the new rows as copies so a failed write leaves the cache intact
+            updated = {pos: {**table.rows[pos], **changes} for pos in table.positions(key, value)}
+            if not updated:
+                return
+            FileHandler._engine().update(
+                file_path,
+                table.header,
+                key,
+                value,
+                changes,
+                lambda: (updated.get(pos, r) for pos, r in enumerate(table.rows) if r is not None),
+            )
+            for pos, row in updated.items():
+                table.replace(pos, row)
+            FileHandler._touch(file_path, table)
+            FileHandler._maybe_compact(file_path)
+
+    @staticmethod
+    @metrics.timed
+    def update_many(file_path: str, key: str, updates: Dict[str, Dict[str, object]]) -> int:
+        """
+        Apply updates[value] to the rows whose key column equals value, with
+        one write: every change is made or, on any error, none is. Raises
+        ValueError if a value matches no row or a change names an unknown
+        column. Returns the number of rows changed.
+        """
+        with FileHandler.locked(file_path):
+            table = FileHandler._table(file_path)
+            if table is None:
+                raise ValueError(f"No such table: {file_path}")
+            changes = {value: {k: str(v) for k, v in data.items()} for value, data in updates.items()}
+            unknown = sorted({k for data in changes.values() for k in data if k not in table.header})
+            if unknown:
+                raise ValueError(f"dict contains fields not in fieldnames: {', '.join(map(repr, unknown))}")
+            index = table.index(key)
+            missing = [value for value in changes if value not in index]
+            if missing:
+                raise ValueError(f"No row with {key}: {', '.join(map(str, missing[:10]))}")
+            # Build the new rows as copies so a failed write leaves the cache intact
+            updated = {
+                pos: {**table.rows[pos], **data}
+                for value, data in changes.items()
+                for pos in table.positions(key, value)
+            }
+            if not updated:
+                return 0
+            FileHandler._engine().update_many(
+                file_path,
+                table.header,
+                key,
+                changes,
+                lambda: (updated.get(pos, r) for pos, r in enumerate(table.rows) if r is not None),
+            )
+            for pos, row in updated.items():
+                table.replace(pos, row)
+            FileHandler._touch(file_path, table)
+            FileHandler._maybe_compact(file_path)
+            return len(updated)
@@ -0,0 +1,136 @@
+# utils/grading.py
+import re
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_RANGE = re.compile(r"^\s*(-?\d+)\s*-\s*(-?\d+)\s*$")
+
+
+class GradeScale:
+    """
+    Letter grades of grades.csv as a sorted boundary table. Each
+    marks_range "low-high" (inclusive) becomes one band; bands must not
+    overlap, but may leave gaps, whose marks have no letter. letter() finds
+    the band with one bisect over the low boundaries.
+    """
+
+    __slots__ = ("lows", "highs", "letters")
+
+    def __init__(self, bands: Iterable[Tuple[int, int, str]]):
+        bands = sorted(bands)
+        for (low, high, letter), (next_low, next_high, next_letter) in zip(bands, bands[1:]):
+            if next_low <= high:
+                raise ValueError(
+                    f"Grade ranges overlap: {letter} {low}-{high} and {next_letter} {next_low}-{next_high}"
+                )
+        self.lows = [b[0] for b in bands]
+        self.highs = [b[1] for b in bands]
+        self.letters = [b[2] for b in bands]
+
+    @staticmethod
+    def parse_range(marks_range: str) -> Tuple[int, int]:
+        """(low, high) of a marks_range like "80-89"; ValueError if malformed."""
+        match = _RANGE.match(marks_range or "")
+        if not match:
+            raise ValueError(f"Invalid marks range: {marks_range!r} (expected low-high, e.g. 80-89)")
+        low, high = int(match.group(1)), int(match.group(2))
+        if low > high:
+            raise ValueError(f"Invalid marks range: {marks_range!r} (low is above high)")
+        return low, high
+
+    @staticmethod
+    def from_rows(rows: Iterable[Dict[str, str]]) -> "GradeScale":
+        """Scale of grades.csv rows (grade, marks_range)."""
+        bands = []
+        for row in rows:
+            letter = (row.get("grade") or "").strip()
+            if not letter:
+                raise ValueError(f"Grade {row.get('grade_id')} has no letter")
+            bands.append(GradeScale.parse_range(row.get("marks_range")) + (letter,))
+        return GradeScale(bands)
+
+    def __len__(self) -> int:
+        return len(self.letters)
+
+    def letter(self, marks: int) -> Optional[str]:
+        """Letter of marks, or None if it falls outside every band."""
+        i = bisect_right(self.lows, marks) - 1
+        if i >= 0 and marks <= self.highs[i]:
+            return self.letters[i]
+        return None
+
+    def grade(self, marks: Optional[str]) -> Optional[str]:
+        """Letter of a marks cell as stored in students.csv; None if it is not an integer or has no band."""
+        try:
+            return self.letter(int(marks))
+        except (TypeError, ValueError):
+            return None
+
+
+class CourseGrades:
+    """
+    FileHandler view over students.csv grouping row positions by course_id,
+    then by the (marks, grade) cells they hold. Every row of a group gets
+    the same letter from a GradeScale, so checking a course against the
+    scale costs one lookup per distinct (marks, grade) pair (a few hundred
+    at most) and only the rows that disagree are ever visited.
+    """
+
+    def __init__(self):
+        self.rows: List[Optional[Dict[str, str]]] = []
+        self.courses: Dict[str, Dict[Tuple[str, str], Set[int]]] = {}
+
+    @staticmethod
+    def _group(row: Dict[str, str]) -> Tuple[str, str]:
+        return row.get("marks"), row.get("grade")
+
+    # view protocol
+    def build(self, rows) -> "CourseGrades":
+        self.rows = rows
+        self.courses = {}
+        for pos, row in enumerate(rows):
+            if row is not None:
+                self.insert(pos, row)
+        return self
+
+    def insert(self, pos: int, row: Dict[str, str]) -> None:
+        groups = self.courses.setdefault(row.get("course_id"), {})
+        groups.setdefault(self._group(row), set()).add(pos)
+
+    def remove(self, pos: int, row: Dict[str, str]) -> None:
+        groups = self.courses.get(row.get("course_id"))
+        if groups is None:
+            return
+        key = self._group(row)
+        hits = groups.get(key)
+        if hits is not None:
+            hits.discard(pos)
+            if not hits:
+                del groups[key]
+                if not groups:
+                    del self.courses[row.get("course_id")]
+
+    def update(self, pos: int, old: Dict[str, str], new: Dict[str, str]) -> None:
+        if old.get("course_id") == new.get("course_id") and self._group(old) == self._group(new):
+            return
+        self.remove(pos, old)
+        self.insert(pos, new)
+
+    def check(self, course_id: str, scale: GradeScale) -> Tuple[int, List[Tuple[int, str]], List[int]]:
+        """
+        (students, [(pos, letter)] of rows whose grade disagrees with the
+        scale, [pos] of rows the scale cannot grade), positions in file order.
+        """
+        students = 0
+        wrong: List[Tuple[int, str]] = []
+        ungradable: List[int] = []
+        for (marks, grade), positions in self.courses.get(course_id, {}).items():
+            students += len(positions)
+            letter = scale.grade(marks)
+            if letter is None:
+                ungradable.extend(positions)
+            elif letter != grade:
+                wrong.extend((pos, letter) for pos in positions)
+        wrong.sort()
+        ungradable.sort()
+        return students, wrong, ungradable
@@ -0,0 +1,195 @@
+# utils/indexes.py
+from typing import Dict, List, Optional, Set
+
+
+class UniqueIndex:
+    """
+    Hash index from the values of one column to row positions in a table.
+    Built for natural keys (email, course_id, ...): each value maps to the
+    first row holding it. If the data turns out to contain the same value
+    twice, `unique` drops to False and the table switches that column over
+    to a MultiIndex.
+    """
+
+    def __init__(self, column: str):
+        self.column = column
+        self.positions: Dict[Optional[str], int] = {}
+        self.unique = True
+
+    def build(self, rows: List[Optional[Dict[str, str]]]) -> "UniqueIndex":
+        self.positions.clear()
+        self.unique = True
+        for pos, row in enumerate(rows):
+            if row is not None:
+                self.insert(pos, row)
+        return self
+
+    def get(self, value: str) -> Optional[int]:
+        return self.positions.get(value)
+
+    def first(self, value: str) -> Optional[int]:
+        return self.positions.get(value)
+
+    def all(self, value: str) -> List[int]:
+        pos = self.positions.get(value)
+        return [] if pos is None else [pos]
+
+    def __contains__(self, value: str) -> bool:
+        return value in self.positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def insert(self, pos: int, row: Dict[str, str]) -> None:
+        value = row.get(self.column)
+        if value in self.positions:
+            self.unique = False
+            return
+        self.positions[value] = pos
+
+    def remove(self, pos: int, row: Dict[str, str]) -> None:
+        value = row.get(self.column)
+        if self.positions.get(value) == pos:
+            del self.positions[value]
+
+    def update(self, pos: int, old: Dict[str, str], new: Dict[str, str]) -> None:
+        if old.get(self.column) == new.get(self.column):
+            return
+        self.remove(pos, old)
+        self.insert(pos, new)
+
+
+class NgramIndex:
+    """
+    Inverted index from casefolded character n-grams to the positions of the
+    rows whose columns contain them, for substring search. Trigrams narrow
+    keywords of three or more characters; shorter keywords are served from
+    the unigram and bigram postings. Every hit is confirmed with a real
+    substring test, so results are exactly those of a full scan.
+    Used as a FileHandler view.
+    """
+
+    def __init__(self, columns: List[str], n: int = 3):
+        self.columns = list(columns)
+        self.n = n
+        self.rows: List[Optional[Dict[str, str]]] = []
+        self.postings: Dict[str, Set[int]] = {}
+
+    def _grams(self, row: Dict[str, str]) -> Set[str]:
+        grams = set()
+        for column in self.columns:
+            text = (row.get(column) or "").casefold()
+            for size in range(1, self.n + 1):
+                for i in range(len(text) - size + 1):
+                    grams.add(text[i:i + size])
+        return grams
+
+    # view protocol
+    def build(self, rows) -> "NgramIndex":
+        self.rows = rows
+        self.postings = {}
+        for pos, row in enumerate(rows):
+            if row is not None:
+                self.insert(pos, row)
+        return self
+
+    def insert(self, pos: int, row: Dict[str, str]) -> None:
+        postings = self.postings
+        for gram in self._grams(row):
+            hits = postings.get(gram)
+            if hits is None:
+                postings[gram] = {pos}
+            else:
+                hits.add(pos)
+
+    def remove(self, pos: int, row: Dict[str, str]) -> None:
+        for gram in self._grams(row):
+            hits = self.postings.get(gram)
+            if hits is not None:
+                hits.discard(pos)
+                if not hits:
+                    del self.postings[gram]
+
+    def update(self, pos: int, old: Dict[str, str], new: Dict[str, str]) -> None:
+        if all(old.get(c) == new.get(c) for c in self.columns):
+            return
+        self.remove(pos, old)
+        self.insert(pos, new)
+
+    def search(self, keyword: str) -> List[int]:
+        """Positions, in file order, of rows where any column contains keyword (case-insensitive)."""
+        kw = keyword.casefold()
+        if not kw:
+            return [pos for pos, row in enumerate(self.rows) if row is not None]
+        size = min(self.n, len(kw))
+        grams = {kw[i:i + size] for i in range(len(kw) - size + 1)}
+        lists = sorted((self.postings.get(g, set()) for g in grams), key=len)
+        candidates = set(lists[0])
+        for hits in lists[1:]:
+            if not candidates:
+                break
+            candidates &= hits
+        rows = self.rows
+        return sorted(
+            pos
+            for pos in candidates
+            if any(kw in (rows[pos].get(c) or "").casefold() for c in self.columns)
+        )
+
+
+class MultiIndex:
+    """
+    Secondary (non-unique) hash index from the values of one column to the
+    set of row positions holding each value, e.g. course_id on students.
+    Used as a FileHandler view.
+    """
+
+    def __init__(self, column: str):
+        self.column = column
+        self.positions: Dict[Optional[str], Set[int]] = {}
+
+    def get(self, value: str) -> Set[int]:
+        return self.positions.get(value, set())
+
+    def first(self, value: str) -> Optional[int]:
+        hits = self.positions.get(value)
+        return min(hits) if hits else None
+
+    def all(self, value: str) -> List[int]:
+        return sorted(self.positions.get(value, ()))
+
+    def __contains__(self, value: str) -> bool:
+        return value in self.positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    # view protocol
+    def build(self, rows) -> "MultiIndex":
+        self.positions = {}
+        for pos, row in enumerate(rows):
+            if row is not None:
+                self.insert(pos, row)
+        return self
+
+    def insert(self, pos: int, row: Dict[str, str]) -> None:
+        value = row.get(self.column)
+        hits = self.positions.get(value)
+        if hits is None:
+            self.positions[value] = {pos}
+        else:
+            hits.add(pos)
+
+    def remove(self, pos: int, row: Dict[str, str]) -> None:
+        value = row.get(self.column)
+        hits = self.positions.get(value)
+        if hits is not None:
+            hits.discard(pos)
+            if not hits:
+                del self.positions[value]
+
+    def update(self, pos: int, old: Dict[str, str], new: Dict[str, str]) -> None:
+        if old.get(self.column) == new.get(self.column):
+            return
+        self.remove(pos, old)
+        self.insert(pos, new)
@@ -0,0 +1,49 @@
+# utils/integrity.py
+"""
+Referential integrity scan of one data directory: a hash join of
+students.csv and professors.csv against the course keys of courses.csv.
+The course ids are hashed once, then every dependent table is streamed a
+single time (FileHandler.iter_rows, only the columns needed), so memory is
+the course key set plus the orphans reported.
+"""
+import os
+from typing import Dict, List, Optional
+
+from models.course import Course
+from models.professor import Professor
+from models.student import Student
+from utils.file_handler import FileHandler
+
+# dependent model -> the column that must name a course
+REFERENCES = ((Student, "course_id"), (Professor, "course_id"))
+
+
+def scan(data_dir: Optional[str] = None, examples: int = 10) -> Dict[str, object]:
+    """
+    Orphans of every table referring to courses, in data_dir or the
+    models' DATA_FILE locations. Returns
+    {"courses": n, "tables": {name: {"rows", "orphans", "missing", "examples"}}}
+    where missing counts orphan rows per unknown course_id and examples
+    holds the keys of the first `examples` orphan rows.
+    """
+    def path(model) -> str:
+        return os.path.join(data_dir, os.path.basename(model.DATA_FILE)) if data_dir else model.DATA_FILE
+
+    courses = set(Course.ids(path(Course)) or ())
+    report: Dict[str, object] = {"courses": len(courses), "tables": {}}
+    for model, column in REFERENCES:
+        rows = orphans = 0
+        missing: Dict[str, int] = {}
+        found: List[str] = []
+        for row in FileHandler.iter_rows(path(model), columns=[model.KEY, column]):
+            rows += 1
+            value = row[column]
+            if value in courses:
+                continue
+            orphans += 1
+            missing[value] = missing.get(value, 0) + 1
+            if len(found) < examples:
+                found.append(row[model.KEY])
+        name = os.path.splitext(os.path.basename(model.DATA_FILE))[0]
+        report["tables"][name] = {"rows": rows, "orphans": orphans, "missing": missing, "examples": found}
+    return report
@@ -0,0 +1,54 @@
+# utils/locking.py
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; locks are then per process only
+    fcntl = None
+
+# lock path -> [open file, depth, shared]; one flock per path per process
+_held: Dict[str, List] = {}
+_threads: Dict[str, threading.RLock] = {}
+_guard = threading.Lock()
+
+
+@contextmanager
+def locked(lock_path: str, shared: bool = False):
+    """
+    Hold an flock on lock_path for the duration of the block: exclusive for
+    writers, shared for readers. Re-entrant within a process, so a writer can
+    call other locking writers; a shared hold cannot be upgraded to exclusive.
+    Threads of one process take turns through an RLock as well, since flock
+    does not tell them apart.
+    """
+    with _guard:
+        rlock = _threads.setdefault(lock_path, threading.RLock())
+    with rlock:
+        entry = _held.get(lock_path)
+        if entry is not None:
+            if entry[2] and not shared:
+                raise RuntimeError(f"cannot upgrade the shared lock on {lock_path} to exclusive")
+            entry[1] += 1
+            try:
+                yield
+            finally:
+                entry[1] -= 1
+            return
+
+        os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+        f = open(lock_path, "a")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            _held[lock_path] = [f, 1, shared]
+            try:
+                yield
+            finally:
+                del _held[lock_path]
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            f.close()
@@ -0,0 +1,176 @@
+# utils/metrics.py
+import functools
+import json
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional
+
+from utils import config
+
+# Upper bounds, in milliseconds, of the latency histogram buckets; the last
+# bucket takes everything slower.
+BUCKETS_MS = (0.01, 0.1, 1, 10, 100, 1000, 10_000)
+
+
+class Metric:
+    """Counters for one named operation."""
+
+    __slots__ = ("calls", "errors", "total_ms", "max_ms", "buckets", "rows", "bytes_read", "bytes_written")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.rows = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def observe(self, ms: float, failed: bool = False) -> None:
+        self.calls += 1
+        self.errors += failed
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+
+    def to_dict(self) -> Dict[str, object]:
+        labels = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 4) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n},
+            "rows": self.rows,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, rows: int = 0, bytes_read: int = 0, bytes_written: int = 0) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """What measure() yields: times the block, and lets it report rows and bytes as it goes."""
+
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        registry.observe(self.name, (time.perf_counter() - self.t0) * 1000, exc_type is not None)
+        return False
+
+    def add(self, rows: int = 0, bytes_read: int = 0, bytes_written: int = 0) -> None:
+        registry.count(self.name, rows, bytes_read, bytes_written)
+
+
+class Registry:
+    """
+    Process-wide metrics keyed by operation name ("Student.add_new_student",
+    "FileHandler.update_csv", "csv.load", ...). Nothing is recorded unless
+    config.METRICS is on; the switch is read on every call, so it can be
+    flipped at run time.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name: str) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics.setdefault(name, Metric())
+        return metric
+
+    def observe(self, name: str, ms: float, failed: bool = False) -> None:
+        with self._lock:
+            self._get(name).observe(ms, failed)
+
+    def count(self, name: str, rows: int = 0, bytes_read: int = 0, bytes_written: int = 0) -> None:
+        if not config.METRICS:
+            return
+        with self._lock:
+            metric = self._get(name)
+            metric.rows += rows
+            metric.bytes_read += bytes_read
+            metric.bytes_written += bytes_written
+
+    def timed(self, fn: Callable) -> Callable:
+        """Decorator recording calls and latency of fn under its qualified name."""
+        name = fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not config.METRICS:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            failed = True
+            try:
+                result = fn(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                self.observe(name, (time.perf_counter() - t0) * 1000, failed)
+
+        return wrapper
+
+    def measure(self, name: str):
+        """Context manager timing its block under name; the span it yields counts rows and bytes."""
+        if not config.METRICS:
+            return _NULL_SPAN
+        return _Span(name)
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {name: m.to_dict() for name, m in sorted(self._metrics.items())}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+    def report(self) -> List[str]:
+        """One formatted line per operation, for the admin menu."""
+        lines = [f"{'operation':<36}{'calls':>8}{'mean ms':>11}{'max ms':>11}{'rows':>10}{'read':>11}{'written':>11}"]
+        for name, m in self.snapshot().items():
+            lines.append(
+                f"{name:<36}{m['calls']:>8}{m['mean_ms']:>11.3f}{m['max_ms']:>11.3f}"
+                f"{m['rows']:>10}{m['bytes_read']:>11}{m['bytes_written']:>11}"
+            )
+        return lines
+
+    def dump(self, path: str, extra: Optional[Dict[str, object]] = None) -> None:
+        """Write the snapshot (plus any extra top-level fields) to path as JSON."""
+        data = {"enabled": config.METRICS, "buckets_ms": list(BUCKETS_MS), "metrics": self.snapshot()}
+        data.update(extra or {})
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+            f.write("\n")
+
+
+registry = Registry()
+timed = registry.timed
+measure = registry.measure
+count = registry.count
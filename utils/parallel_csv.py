@@ -0,0 +1,129 @@
+# utils/parallel_csv.py
+"""
+Parse one large CSV file on several cores. The file is cut into byte ranges
+that end on a newline outside any quoted field (an even number of quote
+characters precedes it, which also holds for "" escapes), each range is
+parsed by csv.reader in a worker process, and the rows are put back
+together in file order. Used by CsvEngine.load for files of at least
+config.PARALLEL_LOAD_BYTES.
+"""
+import csv
+import io
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from utils import config
+
+class FileReplaced(Exception):
+    """The file was swapped for a new one (an atomic rewrite) while the workers read it."""
+
+
+def cores() -> int:
+    """Cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def workers() -> int:
+    """Worker processes to use: config.PARALLEL_LOAD_WORKERS, or one per usable core."""
+    return config.PARALLEL_LOAD_WORKERS or cores()
+
+
+def _record_end(data, start: int, end: int, quotes: int = 0) -> int:
+    """
+    Offset just past the first newline at or after start that ends a record,
+    given the number of quote characters since the record began (end if none).
+    """
+    pos = start
+    while True:
+        nl = data.find(b"\n", pos, end)
+        if nl < 0:
+            return end
+        quotes += data[pos:nl + 1].count(b'"')
+        pos = nl + 1
+        if quotes % 2 == 0:
+            return pos
+
+
+def split(data, start: int, end: int, parts: int) -> List[int]:
+    """
+    Offsets start = b0 < b1 < ... = end cutting data[start:end], which begins
+    at a record boundary, into at most parts ranges of whole records.
+    """
+    bounds = [start]
+    for i in range(1, parts):
+        target = start + (end - start) * i // parts
+        if target <= bounds[-1]:
+            continue
+        cut = _record_end(data, target, end, data[bounds[-1]:target].count(b'"'))
+        if cut >= end:
+            break
+        bounds.append(cut)
+    bounds.append(end)
+    return bounds
+
+
+def _parse_range(path: str, ino: int, start: int, end: int) -> List[List[str]]:
+    # Plain value lists: the parent pairs them with the header, so the
+    # column names are not pickled once per row on the way back
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_ino != ino:
+            raise FileReplaced(path)
+        f.seek(start)
+        text = f.read(end - start).decode()
+    # DictReader skips blank lines
+    return [values for values in csv.reader(io.StringIO(text, newline="")) if values]
+
+
+def _as_dict(header: List[str], values: List[str]) -> Dict[str, Optional[str]]:
+    # What csv.DictReader makes of short and long rows
+    if len(values) == len(header):
+        return dict(zip(header, values))
+    row = dict(zip(header, values))
+    if len(values) > len(header):
+        row[None] = values[len(header):]
+    else:
+        for h in header[len(values):]:
+            row[h] = None
+    return row
+
+
+def load(f, n: Optional[int] = None) -> Tuple[List[str], List[Dict[str, str]], int]:
+    """
+    (header, rows, bytes parsed) of the open binary CSV file f, with the
+    same rows csv.DictReader would give and the same snapshot rule as
+    CsvEngine._snapshot_lines: only bytes present now, minus a last line
+    that another process is still appending.
+    Workers read the file by name, so FileReplaced is raised if a writer
+    replaced it after f was opened; the caller then parses f itself.
+    """
+    n = n or workers()
+    st = os.fstat(f.fileno())
+    size = st.st_size
+    if size == 0:
+        return [], [], 0
+    with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as data:
+        end = size
+        if data[size - 1:size] != b"\n" and os.fstat(f.fileno()).st_size > size:
+            end = data.rfind(b"\n", 0, size) + 1
+        body = _record_end(data, 0, end)
+        header = next(csv.reader(io.StringIO(data[:body].decode(), newline="")), [])
+        bounds = split(data, body, end, n)
+
+    # A pool per load: starting workers is cheap next to parsing a file this
+    # size, and no idle worker processes outlive the load (a forked child
+    # holding on to a pool would hang at exit waiting for them).
+    rows: List[Dict[str, str]] = []
+    with ProcessPoolExecutor(max_workers=len(bounds) - 1) as pool:
+        futures = [pool.submit(_parse_range, f.name, st.st_ino, a, b) for a, b in zip(bounds, bounds[1:])]
+        width = len(header)
+        for future in futures:
+            rows.extend(
+                dict(zip(header, values)) if len(values) == width else _as_dict(header, values)
+                for values in future.result()
+            )
+    return header, rows, end
@@ -0,0 +1,330 @@
+# utils/query.py
+"""
+Small query engine over the FileHandler tables:
+
+    Student.query().where("course_id", "eq", "DATA200").where("marks", "range", (80, None))
+                   .order_by("marks", descending=True).limit(10).select("email", "marks").all()
+
+A query is planned against what the cached table offers, in this order:
+  access  an equality test on the key column (primary index) or on any
+          other column (secondary index, built on first use); a "contains"
+          test whose columns have an n-gram index (see search_index); or a
+          full scan
+  filter  every remaining predicate, tested on the rows the access yields
+  order   a counting sort over per-value buckets for a numeric column, or a
+          view of precomputed casefolded keys, both kept up to date on every
+          write; a plain sort when an index already narrowed the rows
+  limit   stops the filter/order pipeline once offset + limit rows are found
+explain() prints the plan without running it. Ties keep file order.
+"""
+import os
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from utils import metrics
+from utils.file_handler import FileHandler
+from utils.indexes import NgramIndex
+from utils.sorting import MarksBuckets, SortKeys
+
+OPS = ("eq", "range", "contains")
+Columns = Union[str, Sequence[str]]
+
+
+def _columns(columns: Columns) -> Tuple[str, ...]:
+    return (columns,) if isinstance(columns, str) else tuple(columns)
+
+
+def ngram_view(columns: Columns) -> str:
+    """Name of the FileHandler view holding the n-gram index of columns."""
+    return "ngrams:" + ",".join(_columns(columns))
+
+
+def search_index(file_path: str, columns: Columns, table=None) -> Optional[NgramIndex]:
+    """
+    Build (once) the n-gram index the planner uses for "contains" tests on
+    columns. It costs a few times the table's memory, so it is never built
+    implicitly. None if the file does not exist. table: the
+    FileHandler.table() of file_path, if the caller already holds it.
+    """
+    columns = _columns(columns)
+    table = table or FileHandler.table(file_path)
+    return None if table is None else table.view(ngram_view(columns), lambda: NgramIndex(list(columns)))
+
+
+class Predicate:
+    __slots__ = ("columns", "op", "value", "numeric")
+
+    def __init__(self, columns: Tuple[str, ...], op: str, value: object, numeric: bool):
+        self.columns = columns
+        self.op = op
+        self.value = value
+        self.numeric = numeric
+
+    def __str__(self) -> str:
+        column = "|".join(self.columns)
+        if self.op == "range":
+            low, high = self.value
+            return f"{column} in [{'' if low is None else low}, {'' if high is None else high}]"
+        return f"{column} {'=' if self.op == 'eq' else 'contains'} {self.value!r}"
+
+    def test(self) -> Callable[[Dict[str, str]], bool]:
+        if self.op == "eq":
+            column, value = self.columns[0], self.value
+            return lambda row: row.get(column) == value
+        if self.op == "contains":
+            columns, needle = self.columns, self.value.casefold()
+            return lambda row: any(needle in (row.get(c) or "").casefold() for c in columns)
+        column, (low, high) = self.columns[0], self.value
+        if not self.numeric:
+            return lambda row: (low is None or low <= (row.get(column) or "")) and (
+                high is None or (row.get(column) or "") <= high
+            )
+
+        def in_range(row):
+            try:
+                value = int(row.get(column))
+            except (TypeError, ValueError):
+                return False
+            return (low is None or low <= value) and (high is None or value <= high)
+        return in_range
+
+
+class Plan:
+    """What Query.all() will do; str(plan) is the explain() text."""
+
+    __slots__ = ("table", "access", "using", "filters", "order", "limit", "offset", "select")
+
+    def __init__(self, table: str):
+        self.table = table
+        self.access = "full scan"
+        self.using: Optional[Predicate] = None
+        self.filters: List[Predicate] = []
+        self.order: Optional[str] = None
+        self.limit: Optional[int] = None
+        self.offset = 0
+        self.select: Optional[List[str]] = None
+
+    def __str__(self) -> str:
+        access = self.access if self.using is None else f"{self.access} ({self.using})"
+        lines = [f"query {self.table}", f"  access: {access}"]
+        if self.filters:
+            lines.append("  filter: " + " and ".join(map(str, self.filters)))
+        if self.order:
+            lines.append(f"  order:  {self.order}")
+        if self.limit is not None or self.offset:
+            lines.append(f"  limit:  {'all' if self.limit is None else self.limit} from row {self.offset}")
+        lines.append("  select: " + (", ".join(self.select) if self.select else "*"))
+        return "\n".join(lines)
+
+
+class Query:
+    """
+    Builder for one query over the table at file_path. key names the
+    primary key column; numeric columns hold integers (marks) and are
+    compared and ordered as numbers.
+    """
+
+    def __init__(self, file_path: str, key: Optional[str] = None, numeric: Iterable[str] = ()):
+        self.file_path = file_path
+        self.key = key
+        self.numeric = set(numeric)
+        self._select: Optional[List[str]] = None
+        self._where: List[Predicate] = []
+        self._order: Tuple[str, ...] = ()
+        self._descending = False
+        self._limit: Optional[int] = None
+        self._offset = 0
+
+    def select(self, *columns: str) -> "Query":
+        self._select = list(columns) or None
+        return self
+
+    def where(self, columns: Columns, op: str = "eq", value: object = None) -> "Query":
+        """
+        Keep rows where column equals value ("eq"), lies in value = (low,
+        high) with either end None for open ("range", inclusive), or
+        contains value ignoring case ("contains"; with several columns, any
+        of them).
+        """
+        columns = _columns(columns)
+        if op not in OPS:
+            raise ValueError(f"Unknown operator: {op} (use {', '.join(OPS)})")
+        if not columns or (op != "contains" and len(columns) != 1):
+            raise ValueError(f"{op} takes one column")
+        numeric = columns[0] in self.numeric
+        if op == "range":
+            try:
+                low, high = value
+            except (TypeError, ValueError):
+                raise ValueError("range takes a (low, high) pair") from None
+            if numeric:
+                low, high = (None if v is None else int(v) for v in (low, high))
+            value = (low, high)
+        else:
+            value = "" if value is None else str(value)
+        self._where.append(Predicate(columns, op, value, numeric))
+        return self
+
+    def order_by(self, *columns: str, descending: bool = False) -> "Query":
+        self._order = columns
+        self._descending = descending
+        return self
+
+    def limit(self, n: Optional[int], offset: int = 0) -> "Query":
+        if (n is not None and n < 0) or offset < 0:
+            raise ValueError("limit and offset cannot be negative")
+        self._limit = n
+        self._offset = offset
+        return self
+
+    # PLANNING
+    def _check_columns(self, header: List[str]) -> None:
+        named = list(self._select or []) + list(self._order)
+        for predicate in self._where:
+            named.extend(predicate.columns)
+        unknown = sorted({c for c in named if c not in header})
+        if unknown:
+            raise ValueError(f"Unknown column: {', '.join(unknown)}")
+
+    def plan(self) -> Plan:
+        return self._plan(FileHandler.table(self.file_path))
+
+    def _plan(self, table) -> Plan:
+        if table is not None:
+            self._check_columns(table.header)
+        plan = Plan(os.path.basename(self.file_path))
+        plan.limit, plan.offset, plan.select = self._limit, self._offset, self._select
+
+        eqs = [p for p in self._where if p.op == "eq"]
+        primary = [p for p in eqs if p.columns[0] == self.key]
+        if primary:
+            plan.access, plan.using = "primary index", primary[0]
+        elif eqs:
+            plan.access, plan.using = "secondary index", eqs[0]
+        elif table is not None:
+            for p in self._where:
+                if p.op == "contains" and table.view(ngram_view(p.columns)) is not None:
+                    plan.access, plan.using = "n-gram index", p
+                    break
+        plan.filters = [p for p in self._where if p is not plan.using]
+
+        if self._order:
+            direction = " desc" if self._descending else ""
+            columns = ", ".join(self._order)
+            if plan.using is not None:
+                plan.order = f"sort index hits by {columns}{direction}"
+            elif self._counting():
+                plan.order = f"counting sort on {columns}{direction}"
+            else:
+                plan.order = f"sort keys view on {columns}{direction}"
+        return plan
+
+    def explain(self) -> str:
+        return str(self.plan())
+
+    def _counting(self) -> bool:
+        return len(self._order) == 1 and self._order[0] in self.numeric
+
+    def _sort_view(self, table):
+        columns = self._order
+        name = "sort_" + "_".join(columns)
+        if self._counting():
+            return table.view(name, lambda: MarksBuckets(columns[0]))
+        return table.view(name, lambda: SortKeys(self._sort_key()))
+
+    def _sort_key(self) -> Callable[[Dict[str, str]], object]:
+        columns = self._order
+        if len(columns) == 1:
+            column = columns[0]
+            return lambda row: (row.get(column) or "").casefold()
+        return lambda row: tuple((row.get(c) or "").casefold() for c in columns)
+
+    def _sort_hits(self, rows, hits: List[int]) -> List[int]:
+        if not self._counting():
+            key = self._sort_key()
+            return sorted(hits, key=lambda pos: key(rows[pos]), reverse=self._descending)
+        column = self._order[0]
+        numbered, unsortable = [], []
+        for pos in hits:
+            try:
+                numbered.append((int(rows[pos].get(column)), pos))
+            except (TypeError, ValueError):
+                unsortable.append(pos)
+        # like the counting sort: ties in file order, unsortable rows last
+        numbered.sort(key=lambda item: item[0], reverse=self._descending)
+        return [pos for _, pos in numbered] + unsortable
+
+    # RUNNING
+    def prepare(self, table=None) -> Callable[[], List[Dict[str, str]]]:
+        """
+        Look up the cached table (or take table, the FileHandler.table() of
+        file_path the caller already holds), plan the query and build the
+        indexes and views the plan uses, and return a function that runs
+        only what is left (probe, filter, order, limit, copy) and returns
+        all()'s rows. The wrappers time that function alone. Valid until
+        the next write.
+        """
+        table = table or FileHandler.table(self.file_path)
+        plan = self._plan(table)
+        if table is None:
+            return lambda: []
+        rows = table.rows
+        select = self._select
+        find = self._access(table, plan)
+
+        def run() -> List[Dict[str, str]]:
+            positions = find()
+            if select:
+                return [{c: rows[pos].get(c) for c in select} for pos in positions]
+            return [dict(rows[pos]) for pos in positions]
+        return run
+
+    def _access(self, table, plan: Plan) -> Callable[[], List[int]]:
+        # everything the plan needs from the table is resolved here, once
+        rows = table.rows
+        stop = None if plan.limit is None else plan.offset + plan.limit
+        filters = [p.test() for p in plan.filters]
+        using = plan.using
+        if using is None:
+            probe = None
+        elif using.op == "eq":
+            index, value = table.index(using.columns[0]), using.value
+            probe = lambda: index.all(value)
+        else:
+            ngrams, needle = table.view(ngram_view(using.columns)), using.value
+            probe = lambda: ngrams.search(needle)
+        view = self._sort_view(table) if self._order and probe is None else None
+
+        def find() -> List[int]:
+            hits = None if probe is None else probe()
+            if not self._order:
+                source = hits if hits is not None else (pos for pos, row in enumerate(rows) if row is not None)
+            elif hits is not None:
+                source = self._sort_hits(rows, hits)
+            else:
+                # with nothing to filter, the view's own top-k selection does the limit
+                source = view.positions(self._descending, None if filters else stop)
+            if filters:
+                source = (pos for pos in source if all(test(rows[pos]) for test in filters))
+            return list(islice(source, plan.offset, stop))
+        return find
+
+    def positions(self) -> List[int]:
+        """Row positions (see FileHandler.rows) of the result, in result order."""
+        table = FileHandler.table(self.file_path)
+        plan = self._plan(table)
+        return [] if table is None else self._access(table, plan)()
+
+    @metrics.timed
+    def all(self) -> List[Dict[str, str]]:
+        """Copies of the result rows, keeping only the selected columns."""
+        return self.prepare()()
+
+    def first(self) -> Optional[Dict[str, str]]:
+        saved = self._limit, self._offset
+        self._limit = 1
+        try:
+            found = self.all()
+        finally:
+            self._limit, self._offset = saved
+        return found[0] if found else None
@@ -0,0 +1,196 @@
+# utils/roster.py
+"""
+Streaming roster import and export for students.csv.
+
+Import is a chain of generators, each taking and yielding RosterLine
+objects one at a time:
+
+    read -> normalize -> validate -> dedupe -> write_batches
+
+so the pipeline holds one batch of rows (plus the set of emails already
+seen) whatever the size of the roster file; students.csv itself is held by
+the FileHandler cache, as for every other write. A line that fails a stage keeps its
+error and passes through the later stages untouched; it is reported, and
+the rest of the file is still imported.
+
+Export streams FileHandler.iter_rows into a CSV writer, with an optional
+column selection and filter.
+"""
+import csv
+import re
+from itertools import islice
+from typing import AbstractSet, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Union
+
+from models.course import Course
+from models.student import Student
+from utils import config
+from utils.aggregates import MARKS_MAX, MARKS_MIN
+from utils.file_handler import FileHandler
+
+EMAIL_RE = re.compile(r"^[^@\s,]+@[^@\s,]+\.[^@\s,]+$")
+BATCH_SIZE = 5000
+
+
+class RosterLine:
+    """One data line of a roster file on its way through the pipeline."""
+
+    __slots__ = ("line_no", "row", "status", "error")
+
+    def __init__(self, line_no: int, row: Dict[str, str]):
+        self.line_no = line_no
+        self.row = row
+        # "pending" until written; then "inserted", "duplicate" or "invalid"
+        self.status = "pending"
+        self.error = ""
+
+    def reject(self, status: str, error: str) -> None:
+        self.status = status
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "pending"
+
+
+# IMPORT STAGES
+def read(f: TextIO) -> Iterator[RosterLine]:
+    """Rows of an open roster file. The header must name every Student field; extra columns are ignored."""
+    reader = csv.DictReader(f)
+    missing = [c for c in Student.FIELDS if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Roster header is missing: {', '.join(missing)}")
+    for row in reader:
+        # line_num counts physical lines (blank ones, quoted newlines), as an editor would
+        yield RosterLine(reader.line_num, {c: row.get(c) for c in Student.FIELDS})
+
+
+def normalize(lines: Iterable[RosterLine]) -> Iterator[RosterLine]:
+    """Trim every cell, lowercase emails and uppercase course ids and grades."""
+    for line in lines:
+        row = line.row
+        for c in Student.FIELDS:
+            row[c] = (row[c] or "").strip()
+        row["email"] = row["email"].lower()
+        row["course_id"] = row["course_id"].upper()
+        row["grade"] = row["grade"].upper()
+        yield line
+
+
+def validate(lines: Iterable[RosterLine], course_ids: Optional[AbstractSet[str]] = None) -> Iterator[RosterLine]:
+    """
+    Check email syntax, marks (an integer in MARKS_MIN..MARKS_MAX) and the
+    course id, which must be in course_ids unless that is None.
+    """
+    for line in lines:
+        if line.ok:
+            row = line.row
+            marks = row["marks"]
+            if not EMAIL_RE.match(row["email"]):
+                line.reject("invalid", f"bad email {row['email']!r}")
+            elif not marks.isdigit() or not MARKS_MIN <= int(marks) <= MARKS_MAX:
+                line.reject("invalid", f"marks must be a whole number from {MARKS_MIN} to {MARKS_MAX}, got {marks!r}")
+            elif not row["course_id"]:
+                line.reject("invalid", "missing course_id")
+            elif course_ids is not None and row["course_id"] not in course_ids:
+                line.reject("invalid", f"unknown course_id {row['course_id']!r}")
+        yield line
+
+
+def dedupe(lines: Iterable[RosterLine]) -> Iterator[RosterLine]:
+    """Reject a repeat of an email seen earlier in the file (emails already stored are caught on write)."""
+    seen: Set[str] = set()
+    for line in lines:
+        if line.ok:
+            email = line.row["email"]
+            if email in seen:
+                line.reject("duplicate", f"{email} appears earlier in the file")
+            else:
+                seen.add(email)
+        yield line
+
+
+def write_batches(
+    lines: Iterable[RosterLine], file_path: Optional[str] = None, batch_size: int = BATCH_SIZE, dry_run: bool = False
+) -> Iterator[RosterLine]:
+    """
+    Insert the accepted lines batch_size at a time with FileHandler.insert_many
+    (one lock and one append per batch) and yield every line with its final
+    status. A dry run only checks the accepted lines against the roster.
+    """
+    file_path = file_path or Student.DATA_FILE
+    lines = iter(lines)
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return
+        accepted = [line for line in batch if line.ok]
+        if accepted and not dry_run:
+            report = FileHandler.insert_many(file_path, (line.row for line in accepted), Student.KEY, Student.FIELDS)
+            for line, (_, status) in zip(accepted, report):
+                line.status = status
+                if status == "duplicate":
+                    line.error = f"{line.row['email']} is already in the roster"
+        else:
+            for line in accepted:
+                if FileHandler.exists(file_path, Student.KEY, line.row["email"]):
+                    line.reject("duplicate", f"{line.row['email']} is already in the roster")
+                else:
+                    line.status = "inserted"
+        yield from batch
+
+
+def known_course_ids(file_path: Optional[str] = None) -> Optional[AbstractSet[str]]:
+    """
+    Course ids of the courses.csv next to the students file, or None (no
+    check) under the same conditions as Student writes (see Course.check_ids).
+    """
+    if not config.FOREIGN_KEYS:
+        return None
+    return Course.ids(FileHandler.beside(file_path, Course.DATA_FILE))
+
+
+def import_roster(
+    f: TextIO,
+    file_path: Optional[str] = None,
+    batch_size: int = BATCH_SIZE,
+    course_ids: Union[AbstractSet[str], None, Callable[[Optional[str]], Optional[AbstractSet[str]]]] = known_course_ids,
+    dry_run: bool = False,
+) -> Iterator[RosterLine]:
+    """
+    Run the whole pipeline over the open roster file f and yield each line
+    once it has been written (or rejected); lines are read and written as
+    the result is iterated. course_ids is a set, None for no check, or a
+    function of the students file returning either (by default the ids in
+    the courses.csv beside it).
+    """
+    if callable(course_ids):
+        course_ids = course_ids(file_path)
+    file_path = file_path or Student.DATA_FILE
+    FileHandler.write_header_if_missing(file_path, Student.FIELDS)
+    lines = dedupe(validate(normalize(read(f)), course_ids))
+    return write_batches(lines, file_path, batch_size, dry_run)
+
+
+# EXPORT
+def export_roster(
+    out: TextIO,
+    file_path: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    where: Union[Dict[str, str], Callable[[Dict[str, str]], bool], None] = None,
+) -> int:
+    """
+    Stream students (all columns, or only `columns`) matching `where` to the
+    open file out as CSV; returns the number of rows written.
+    """
+    file_path = file_path or Student.DATA_FILE
+    columns = list(columns or Student.FIELDS)
+    unknown = [c for c in columns + list(where if isinstance(where, dict) else ()) if c not in Student.FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    writer = csv.DictWriter(out, fieldnames=columns)
+    writer.writeheader()
+    written = 0
+    for row in FileHandler.iter_rows(file_path, where=where, columns=columns):
+        writer.writerow(row)
+        written += 1
+    return written
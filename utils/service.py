@@ -0,0 +1,474 @@
+# utils/service.py
+"""
+Long-running grade service. One process loads every table once and keeps
+the FileHandler cache, indexes and views warm; any number of `main.py
+--client` sessions talk to it over a Unix domain socket instead of each
+re-reading the CSV files.
+
+Protocol: one JSON object per line in each direction.
+    request:  {"id": 1, "op": "students.search_email", "token": "...", "args": {"email": "..."}}
+    response: {"id": 1, "ok": true, "result": ..., "output": "..."}
+              {"id": 1, "ok": false, "error": "ValueError", "message": "..."}
+"output" is whatever the operation printed (the models report on stdout).
+"token" is the session token returned by "login", the only operation that
+runs without one. POLICY says which roles may run each operation: students
+see only their own record, professors read and update student rows, and
+everything else is for admins (see authorize).
+
+Reads are answered as soon as they arrive, so clients are served
+concurrently; writes are queued to a single writer task and applied one at
+a time. Both run on the event loop thread, so a read never sees a write
+half applied. Logins check the PBKDF2 hash in a worker thread so they do
+not hold up other clients; only upgrading a stored hash is a write.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from models.course import Course
+from models.login_user import LoginUser
+from models.professor import Professor
+from models.student import Student
+from utils import config, metrics
+from utils.auth import Session, sessions
+from utils.encryption import hash_password, needs_rehash, verify_password
+from utils.file_handler import FileHandler
+from utils.sorting import decode_cursor, encode_cursor
+
+TABLES = {"students": Student, "courses": Course, "professors": Professor}
+_CRUD = {
+    Student: (Student.add_new_student, Student.update_student, Student.delete_student),
+    Course: (Course.add_new_course, Course.update_course, Course.delete_course),
+    Professor: (Professor.add_new_professor, Professor.update_professor, Professor.delete_professor),
+}
+
+
+def _model(table: str):
+    try:
+        return TABLES[table]
+    except KeyError:
+        raise ValueError(f"Unknown table: {table}") from None
+
+
+# OPERATIONS
+def _login(email: str, password: str) -> Optional[Dict[str, str]]:
+    session = LoginUser.start_session(email, password)
+    return session.to_dict() if session else None
+
+
+def _session(token: str) -> Optional[Dict[str, str]]:
+    session = sessions.get(token)
+    return session.to_dict() if session else None
+
+
+def _get(table: str, key: str):
+    model = _model(table)
+    return FileHandler.find_row(model.DATA_FILE, model.KEY, key)
+
+
+def _rows(
+    table: str, where: Optional[Dict[str, str]] = None, limit: Optional[int] = None, cursor: Optional[str] = None
+) -> Dict[str, object]:
+    """
+    {"rows": the next limit rows of table in file order whose columns equal
+    where, "next": cursor of the page after it, None after the last}. The
+    cursor holds the row position the next page starts at and that row's
+    key, which finds it again if the table was vacuumed in between, so
+    reading a whole table page by page visits each row once.
+    """
+    model = _model(table)
+    rows = FileHandler.rows(model.DATA_FILE) or []
+    start = 0 if cursor is None else _resume(model, rows, decode_cursor(cursor))
+    tests = list((where or {}).items())
+    page, nxt = [], None
+    for pos in range(start, len(rows)):
+        row = rows[pos]
+        if row is None or not all(row.get(c) == v for c, v in tests):
+            continue
+        if limit is not None and len(page) == limit:
+            nxt = encode_cursor({"pos": pos, "key": row.get(model.KEY)})
+            break
+        page.append(dict(row))
+    return {"rows": page, "next": nxt}
+
+
+def _resume(model, rows: List[Optional[Dict[str, str]]], state: Dict[str, object]) -> int:
+    pos, key = state.get("pos"), state.get("key")
+    if not isinstance(pos, int) or pos < 0:
+        raise ValueError("Invalid cursor")
+    if pos < len(rows) and rows[pos] is not None and rows[pos].get(model.KEY) == key:
+        return pos
+    found = FileHandler.positions(model.DATA_FILE, model.KEY, key) if isinstance(key, str) else []
+    # a row deleted since the page before was read: carry on from where it was
+    return found[0] if found else min(pos, len(rows))
+
+
+def _build_query(
+    table: str,
+    select: Optional[List[str]] = None,
+    where: Optional[List[Tuple[object, str, object]]] = None,
+    order_by: Optional[List[str]] = None,
+    descending: bool = False,
+    limit: Optional[int] = None,
+    offset: int = 0,
+):
+    # where: [column(s), op, value] triples, as JSON sends them
+    query = _model(table).query()
+    for columns, op, value in where or ():
+        query.where(columns, op, value)
+    if order_by:
+        query.order_by(*order_by, descending=descending)
+    return query.select(*(select or ())).limit(limit, offset)
+
+
+def _query(table: str, **args) -> List[Dict[str, str]]:
+    return _build_query(table, **args).all()
+
+
+def _explain(table: str, **args) -> str:
+    return _build_query(table, **args).explain()
+
+
+def _add(table: str, fields: Dict[str, object]) -> None:
+    model = _model(table)
+    _CRUD[model][0](model(*(fields.get(f, "") for f in model.FIELDS)))
+
+
+def _update(table: str, key: str, data: Dict[str, object]) -> None:
+    model = _model(table)
+    _CRUD[model][1](key, data)
+
+
+def _delete(table: str, key: str, cascade: Optional[str] = None, reassign_to: Optional[str] = None) -> None:
+    model = _model(table)
+    if model is Course:
+        Course.delete_course(key, cascade=cascade, reassign_to=reassign_to)
+    elif cascade or reassign_to:
+        raise ValueError(f"Only courses are deleted with a cascade, not {table}")
+    else:
+        _CRUD[model][2](key)
+
+
+def _metrics_enable(on: bool) -> bool:
+    config.METRICS = bool(on)
+    return config.METRICS
+
+
+def _metrics_dump(name: str) -> str:
+    # Clients only name the file: it always goes to config.METRICS_DIR
+    if not name or os.path.basename(name) != name or name.startswith("."):
+        raise ValueError(f"Give a plain file name; metrics dumps go to {config.METRICS_DIR}")
+    os.makedirs(config.METRICS_DIR, exist_ok=True)
+    path = os.path.join(config.METRICS_DIR, name)
+    metrics.registry.dump(path)
+    return path
+
+
+# op name -> (function, writes?)
+OPS: Dict[str, Tuple[Callable, bool]] = {
+    # GradeServer answers logins itself, off the event loop (see GradeServer._login)
+    "login": (_login, False),
+    "session": (_session, False),
+    "logout": (lambda token: sessions.revoke(token), False),
+    "get": (_get, False),
+    "rows": (_rows, False),
+    "query": (_query, False),
+    "query.explain": (_explain, False),
+    "students.search_email": (lambda email: Student.search_by_email(email), False),
+    "students.search_name": (lambda keyword: Student.search_by_name(keyword), False),
+    "students.sort": (
+        lambda by="marks", descending=False, limit=None, page_size=None, cursor=None: Student.sort_students(
+            by=by, descending=descending, limit=limit, page_size=page_size, cursor=cursor
+        ),
+        False,
+    ),
+    "students.course_stats": (lambda course_id: Student.course_stats(course_id), False),
+    "courses.dependents": (lambda course_id: list(Course.dependents(course_id)), False),
+    "students.update_many": (lambda changes: Student.update_students(changes), True),
+    "students.regrade": (
+        lambda course_id, dry_run=False: Student.regrade_course(course_id, dry_run=dry_run),
+        True,
+    ),
+    "add": (_add, True),
+    "update": (_update, True),
+    "delete": (_delete, True),
+    # instrumentation of the process serving the requests
+    "metrics.report": (lambda: {"enabled": config.METRICS, "lines": metrics.registry.report()}, False),
+    "metrics.enable": (_metrics_enable, False),
+    "metrics.reset": (lambda: metrics.registry.reset(), False),
+    "metrics.dump": (_metrics_dump, False),
+}
+
+# Ops callable without a session
+PUBLIC_OPS = {"login"}
+# Ops that name a table are looked up in POLICY as "op:table"
+TABLE_OPS = {"get", "rows", "query", "query.explain", "add", "update", "delete"}
+ANY = None  # any live session, whatever its role
+STAFF = ("admin", "professor")
+# Roles allowed to run each op; anything not listed is admin-only (course
+# and professor records, deletes and cascades, metrics)
+POLICY: Dict[str, Optional[Tuple[str, ...]]] = {
+    "session": ANY,
+    "logout": ANY,
+    "get:students": STAFF,
+    "rows:students": STAFF,
+    "query:students": STAFF,
+    "query.explain:students": STAFF,
+    "students.search_email": STAFF,
+    "students.search_name": STAFF,
+    "students.sort": STAFF,
+    "students.course_stats": STAFF,
+    # professors only ever change existing student rows
+    "update:students": STAFF,
+    "students.update_many": STAFF,
+    "students.regrade": STAFF,
+}
+# Ops any session may run on its own student row: policy key -> argument holding the email
+OWN_ROW = {"get:students": "key", "students.search_email": "email"}
+
+
+def authorize(op: str, token: Optional[str], args: Optional[Dict[str, object]] = None) -> Optional[Session]:
+    """
+    The session allowed to run op(**args) with token (None for public ops);
+    raises PermissionError if there is no live session or POLICY does not
+    let its role run op, on that table or that row.
+    """
+    if op not in OPS:
+        raise ValueError(f"Unknown operation: {op}")
+    if op in PUBLIC_OPS:
+        return None
+    session = sessions.get(token) if token else None
+    if session is None:
+        raise PermissionError("Not logged in, or the session has expired")
+    args = args or {}
+    name = op
+    if op in TABLE_OPS:
+        table = args.get("table")
+        _model(table)
+        name = f"{op}:{table}"
+    roles = POLICY.get(name, ("admin",))
+    if roles is ANY or session.role in roles:
+        return session
+    if name in OWN_ROW and session.role == "student" and args.get(OWN_ROW[name]) == session.email:
+        return session
+    raise PermissionError(f"{name} is not allowed for role {session.role or 'none'}")
+
+
+def run_op(op: str, args: Dict[str, object]) -> Tuple[object, str]:
+    """Run one operation in this process and return (result, printed output)."""
+    if op not in OPS:
+        raise ValueError(f"Unknown operation: {op}")
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        result = OPS[op][0](**args)
+    return result, out.getvalue()
+
+
+def warm() -> None:
+    """Load every table and build the indexes and views the menus use."""
+    for model in (LoginUser, Student, Course, Professor):
+        FileHandler.build_index(model.DATA_FILE, model.KEY)
+    FileHandler.build_index(Student.DATA_FILE, "course_id")
+    Student.course_stats_all()
+    Student.search_by_name("")
+    Student.sort_students(by="marks", limit=1)
+    Student.sort_students(by="name", limit=1)
+    Student.sort_students(by="marks", page_size=1)
+    Student.sort_students(by="name", page_size=1)
+
+
+class GradeServer:
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or config.SOCKET_PATH
+        self._writes: Optional[asyncio.Queue] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @staticmethod
+    def _respond(request: Dict[str, object]) -> Dict[str, object]:
+        try:
+            authorize(request.get("op"), request.get("token"), request.get("args"))
+            result, output = run_op(request.get("op"), request.get("args") or {})
+        except Exception as e:  # reported to the client; the service keeps running
+            return {"id": request.get("id"), "ok": False, "error": type(e).__name__, "message": str(e)}
+        return {"id": request.get("id"), "ok": True, "result": result, "output": output}
+
+    async def _writer(self) -> None:
+        while True:
+            job, done = await self._writes.get()
+            if not done.cancelled():
+                self._run_job(job, done)
+
+    @staticmethod
+    def _run_job(job: Callable, done: asyncio.Future) -> None:
+        # A failed job fails only its own caller; the writer goes on to the
+        # next one. Catching here, not in _writer, keeps the writer's frame
+        # out of the traceback the caller gets (clearing that would close it).
+        try:
+            result = job()
+        except Exception as e:
+            done.set_exception(e)
+        else:
+            done.set_result(result)
+
+    async def _write(self, job: Callable):
+        """Run job on the writer task, after the writes queued before it."""
+        done = asyncio.get_running_loop().create_future()
+        await self._writes.put((job, done))
+        return await done
+
+    async def _login(self, request: Dict[str, object]) -> Dict[str, object]:
+        # The row lookup stays on the loop with every other cache access; the
+        # hashing, which takes a good fraction of a second, runs in a thread.
+        loop = asyncio.get_running_loop()
+        try:
+            args = request.get("args") or {}
+            email, password = args["email"], args["password"]
+            row = FileHandler.find_row(LoginUser.DATA_FILE, LoginUser.KEY, email)
+            stored = row.get("password", "") if row else ""
+            ok = row is not None and await loop.run_in_executor(None, verify_password, password, stored)
+            if ok and needs_rehash(stored):
+                upgraded = await loop.run_in_executor(None, hash_password, password)
+                await self._write(lambda: LoginUser.store_hash(email, upgraded))
+        except Exception as e:
+            return {"id": request.get("id"), "ok": False, "error": type(e).__name__, "message": str(e)}
+        result = sessions.issue(email, row.get("role", "")).to_dict() if ok else None
+        return {"id": request.get("id"), "ok": True, "result": result, "output": ""}
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if not isinstance(request, dict):
+                    response = {"id": None, "ok": False, "error": "ValueError", "message": "request is not a JSON object"}
+                elif request.get("op") == "login":
+                    response = await self._login(request)
+                else:
+                    entry = OPS.get(request.get("op"))
+                    if entry is not None and entry[1]:
+                        response = await self._write(lambda: self._respond(request))
+                    else:
+                        response = self._respond(request)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _claim_socket(self) -> None:
+        # A socket file nobody answers on is left over from a crashed server
+        if not os.path.exists(self.socket_path):
+            os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+        else:
+            raise RuntimeError(f"A grade service is already listening on {self.socket_path}")
+        finally:
+            probe.close()
+
+    async def start(self) -> None:
+        warm()
+        self._claim_socket()
+        self._writes = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer())
+        self._server = await asyncio.start_unix_server(self._serve_client, path=self.socket_path)
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+        self._writer_task.cancel()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.socket_path)
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stopping.set)
+        print(f"Grade service listening on {self.socket_path}")
+        await stopping.wait()
+        await self.stop()
+
+
+def _track_token(api, op: str, args: Dict[str, object], result) -> None:
+    # The session a client logs in with is sent along with every later call
+    if op == "login" and result:
+        api.token = result["token"]
+    elif op == "logout" and args.get("token") == api.token:
+        api.token = None
+
+
+class LocalApi:
+    """The service operations run in-process, for a standalone main.py."""
+
+    def __init__(self):
+        self.token: Optional[str] = None
+
+    def call(self, op: str, **args):
+        authorize(op, self.token, args)
+        result = OPS[op][0](**args)
+        _track_token(self, op, args, result)
+        return result
+
+    def iter_rows(self, table: str, where: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, str]]:
+        authorize("rows", self.token, {"table": table})
+        return FileHandler.iter_rows(_model(table).DATA_FILE, where=where)
+
+
+class GradeClient:
+    """Blocking client for GradeServer; same interface as LocalApi."""
+
+    PAGE = 200
+
+    def __init__(self, socket_path: Optional[str] = None):
+        self.socket_path = socket_path or config.SOCKET_PATH
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(self.socket_path)
+        self._file = self._sock.makefile("rwb")
+        self._next_id = 0
+        self.token: Optional[str] = None
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def call(self, op: str, **args):
+        self._next_id += 1
+        request = {"id": self._next_id, "op": op, "token": self.token, "args": args}
+        self._file.write(json.dumps(request).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("grade service closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise (PermissionError if response["error"] == "PermissionError" else ValueError)(response["message"])
+        if response["output"]:
+            print(response["output"], end="")
+        _track_token(self, op, args, response["result"])
+        return response["result"]
+
+    def iter_rows(self, table: str, where: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, str]]:
+        cursor = None
+        while True:
+            page = self.call("rows", table=table, where=where, limit=self.PAGE, cursor=cursor)
+            yield from page["rows"]
+            cursor = page["next"]
+            if cursor is None:
+                return
@@ -0,0 +1,234 @@
+# utils/sorting.py
+import base64
+import bisect
+import heapq
+import json
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+from utils.aggregates import MARKS_MAX, MARKS_MIN
+
+
+class MarksBuckets:
+    """
+    FileHandler view that files every row position under its integer mark,
+    so ordering by marks is a counting sort over the buckets instead of a
+    comparison sort over the rows. Ties keep file order, exactly as the
+    stable list.sort (with or without reverse=True) did.
+    Rows whose marks are not an integer are kept apart and always come last.
+    """
+
+    def __init__(self, column: str = "marks"):
+        self.column = column
+        self.rows: List[Optional[Dict[str, str]]] = []
+        self.buckets: List[Set[int]] = []
+        self.overflow: Dict[int, Set[int]] = {}
+        self.unsortable: Set[int] = set()
+
+    def _bucket(self, row: Dict[str, str]) -> Set[int]:
+        try:
+            mark = int(row.get(self.column))
+        except (TypeError, ValueError):
+            return self.unsortable
+        if MARKS_MIN <= mark <= MARKS_MAX:
+            return self.buckets[mark - MARKS_MIN]
+        return self.overflow.setdefault(mark, set())
+
+    # view protocol
+    def build(self, rows) -> "MarksBuckets":
+        self.rows = rows
+        self.buckets = [set() for _ in range(MARKS_MIN, MARKS_MAX + 1)]
+        self.overflow = {}
+        self.unsortable = set()
+        for pos, row in enumerate(rows):
+            if row is not None:
+                self._bucket(row).add(pos)
+        return self
+
+    def insert(self, pos: int, row: Dict[str, str]) -> None:
+        self._bucket(row).add(pos)
+
+    def remove(self, pos: int, row: Dict[str, str]) -> None:
+        self._bucket(row).discard(pos)
+
+    def update(self, pos: int, old: Dict[str, str], new: Dict[str, str]) -> None:
+        self.remove(pos, old)
+        self.insert(pos, new)
+
+    def positions(self, descending: bool = False, limit: Optional[int] = None) -> List[int]:
+        """Row positions in marks order; only the buckets needed for limit are sorted."""
+        below = [self.overflow[m] for m in sorted(self.overflow) if m < MARKS_MIN]
+        above = [self.overflow[m] for m in sorted(self.overflow) if m > MARKS_MAX]
+        ordered = below + self.buckets + above
+        if descending:
+            ordered.reverse()
+        ordered.append(self.unsortable)
+
+        out: List[int] = []
+        for bucket in ordered:
+            if not bucket:
+                continue
+            if limit is not None and len(out) + len(bucket) > limit:
+                out.extend(heapq.nsmallest(limit - len(out), bucket))
+                break
+            out.extend(sorted(bucket))
+        return out
+
+
+class SortKeys:
+    """
+    FileHandler view holding a precomputed sort key for every row position,
+    so casefolding happens once per write rather than once per sort.
+    """
+
+    def __init__(self, key: Callable[[Dict[str, str]], object]):
+        self.key = key
+        self.rows: List[Optional[Dict[str, str]]] = []
+        self.keys: List[object] = []
+
+    # view protocol
+    def build(self, rows) -> "SortKeys":
+        self.rows = rows
+        self.keys = [None if r is None else self.key(r) for r in rows]
+        return self
+
+    def insert(self, pos: int, row: Dict[str, str]) -> None:
+        self.keys.append(self.key(row))
+
+    def remove(self, pos: int, row: Dict[str, str]) -> None:
+        self.keys[pos] = None
+
+    def update(self, pos: int, old: Dict[str, str], new: Dict[str, str]) -> None:
+        self.keys[pos] = self.key(new)
+
+    def _live(self) -> Iterator[int]:
+        return (pos for pos, row in enumerate(self.rows) if row is not None)
+
+    def positions(self, descending: bool = False, limit: Optional[int] = None) -> List[int]:
+        """Row positions in key order, ties in file order; heap-based top-k when limit is set."""
+        keys = self.keys
+        if limit is not None:
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            return pick(limit, self._live(), key=keys.__getitem__)
+        return sorted(self._live(), key=keys.__getitem__, reverse=descending)
+
+
+class KeysetIndex:
+    """
+    FileHandler view keeping one (rank, value, tiebreak, pos) entry per row
+    in a list sorted ascending, for keyset pagination: a page starts with a
+    bisect for the cursor entry and then slices, O(log n + page) whatever
+    the page number. key(row) gives (rank, value, tiebreak); rank 1 marks
+    rows that cannot be ordered by value and always come last, in both
+    directions.
+
+    Writes are only noted (entry -> +1 added / -1 removed) and folded into
+    the list by the next page(): up to MERGE_ONE_BY_ONE changes are applied
+    with insort and bisect-and-delete, each a memmove of the list; beyond
+    that the list is rebuilt once, O(n + k log k), so a bulk import or
+    update_many of k rows does not cost k list shifts.
+    """
+
+    MERGE_ONE_BY_ONE = 32
+
+    def __init__(self, key: Callable[[Dict[str, str]], tuple]):
+        self.key = key
+        self.rows: List[Optional[Dict[str, str]]] = []
+        self.entries: List[tuple] = []
+        self.pending: Dict[tuple, int] = {}
+
+    def _entry(self, pos: int, row: Dict[str, str]) -> tuple:
+        return self.key(row) + (pos,)
+
+    def _note(self, entry: tuple, change: int) -> None:
+        count = self.pending.get(entry, 0) + change
+        if count:
+            self.pending[entry] = count
+        else:
+            self.pending.pop(entry, None)
+
+    def _merge(self) -> None:
+        pending, self.pending = self.pending, {}
+        added = sorted(e for e, count in pending.items() if count > 0)
+        dropped = {e for e, count in pending.items() if count < 0}
+        entries = self.entries
+        if len(pending) <= self.MERGE_ONE_BY_ONE:
+            for entry in dropped:
+                i = bisect.bisect_left(entries, entry)
+                if i < len(entries) and entries[i] == entry:
+                    del entries[i]
+            for entry in added:
+                bisect.insort(entries, entry)
+            return
+        if dropped:
+            entries = [e for e in entries if e not in dropped]
+        # two sorted runs: timsort merges them in linear time
+        entries.extend(added)
+        entries.sort()
+        self.entries = entries
+
+    # view protocol
+    def build(self, rows) -> "KeysetIndex":
+        self.rows = rows
+        self.entries = sorted(self._entry(pos, row) for pos, row in enumerate(rows) if row is not None)
+        self.pending = {}
+        return self
+
+    def insert(self, pos: int, row: Dict[str, str]) -> None:
+        self._note(self._entry(pos, row), 1)
+
+    def remove(self, pos: int, row: Dict[str, str]) -> None:
+        self._note(self._entry(pos, row), -1)
+
+    def update(self, pos: int, old: Dict[str, str], new: Dict[str, str]) -> None:
+        if self.key(old) == self.key(new):
+            return
+        self.remove(pos, old)
+        self.insert(pos, new)
+
+    # In descending order the ranked entries run backwards, then the
+    # unranked ones follow as stored. Pages are slices of that order,
+    # addressed by "virtual" indexes.
+    def _split(self) -> int:
+        return bisect.bisect_left(self.entries, (1,))
+
+    def _entry_at(self, v: int, descending: bool, split: int) -> tuple:
+        return self.entries[split - 1 - v if descending and v < split else v]
+
+    def _virtual(self, entry: tuple, descending: bool, after: bool, split: int) -> int:
+        """Virtual index of the first entry after entry (after=True) or of entry's own slot."""
+        if not descending or entry[0] == 1:
+            return (bisect.bisect_right if after else bisect.bisect_left)(self.entries, entry)
+        return split - (bisect.bisect_left if after else bisect.bisect_right)(self.entries, entry)
+
+    def page(self, size: int, descending: bool = False, after: Optional[tuple] = None, before: Optional[tuple] = None):
+        """
+        (entries, has_previous, has_next) of the page of size entries that
+        follows entry after, or precedes entry before (neither: the first page).
+        """
+        if self.pending:
+            self._merge()
+        split = self._split() if descending else 0
+        total = len(self.entries)
+        if before is not None:
+            stop = self._virtual(before, descending, False, split)
+            start = max(0, stop - size)
+        else:
+            start = 0 if after is None else self._virtual(after, descending, True, split)
+            stop = min(total, start + size)
+        entries = [self._entry_at(v, descending, split) for v in range(start, stop)]
+        return entries, start > 0, stop < total
+
+
+def encode_cursor(state: Dict[str, object]) -> str:
+    """Opaque, URL-safe continuation token for a KeysetIndex page."""
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(token: str) -> Dict[str, object]:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, AttributeError):
+        raise ValueError("Invalid cursor") from None
+    if not isinstance(state, dict):
+        raise ValueError("Invalid cursor")
+    return state
@@ -0,0 +1,659 @@
+# utils/storage.py
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from utils import config, metrics, parallel_csv
+
+Rows = Callable[[], Iterable[Dict[str, str]]]
+
+
+def keep_mode(fd: int, file_path: str) -> None:
+    """
+    Give the temp file open as fd the permission bits of file_path, which it
+    is about to replace (mkstemp makes it owner-only), or the umask default
+    if file_path does not exist yet.
+    """
+    if not hasattr(os, "fchmod"):  # Windows: no Unix permission bits to keep
+        return
+    try:
+        mode = stat.S_IMODE(os.stat(file_path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    os.fchmod(fd, mode)
+
+
+class StorageEngine:
+    """
+    What FileHandler needs from a storage backend. Tables are addressed by
+    their CSV path (Student.DATA_FILE, ...) whatever the backend keeps on
+    disk. Rows go in and come out as {column: str} dicts.
+
+    Write methods are called after FileHandler has worked out the change on
+    its cached table; `rows_after` returns the table's complete content
+    after the change for backends that have to rewrite everything.
+    """
+
+    name = ""
+
+    def signature(self, file_path: str) -> Optional[Tuple]:
+        """A value that changes whenever the table changes; None if the table does not exist."""
+        raise NotImplementedError
+
+    def load(self, file_path: str, make_table: Callable):
+        """Read the whole table and return make_table(header, rows)."""
+        raise NotImplementedError
+
+    def header(self, file_path: str) -> Optional[List[str]]:
+        raise NotImplementedError
+
+    def ensure_table(self, file_path: str, fieldnames: Iterable[str]) -> None:
+        raise NotImplementedError
+
+    def pending(self, file_path: str) -> bool:
+        """True if changes are waiting to be folded into the base storage by compact()."""
+        return False
+
+    def can_stream(self, file_path: str) -> bool:
+        """True if scan() reflects every committed change without going through the cache."""
+        return not self.pending(file_path)
+
+    def scan(self, file_path: str, where: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, str]]:
+        """Yield rows in table order, optionally only those matching every where item."""
+        raise NotImplementedError
+
+    def insert(self, file_path: str, header: List[str], rows: List[Dict[str, str]]) -> None:
+        raise NotImplementedError
+
+    def update(
+        self, file_path: str, header: List[str], key: str, value: str, changes: Dict[str, str], rows_after: Rows
+    ) -> None:
+        """Apply changes to every row whose key column equals value."""
+        raise NotImplementedError
+
+    def update_many(
+        self, file_path: str, header: List[str], key: str, updates: Dict[str, Dict[str, str]], rows_after: Rows
+    ) -> None:
+        """Apply updates[value] to every row whose key column equals value, all or none of them."""
+        raise NotImplementedError
+
+    def delete(self, file_path: str, header: List[str], key: str, value: str, rows_after: Rows) -> None:
+        """Delete every row whose key column equals value."""
+        raise NotImplementedError
+
+    def drop(self, file_path: str) -> None:
+        """Delete the table and everything stored for it."""
+        raise NotImplementedError
+
+    def needs_compaction(self, file_path: str) -> bool:
+        return False
+
+    def compact(self, file_path: str, header: List[str], rows: Iterable[Dict[str, str]]) -> None:
+        pass
+
+    def close(self) -> None:
+        """Release open handles; the engine reopens them on next use."""
+
+
+class CsvEngine(StorageEngine):
+    """
+    One CSV file per table. Outside log mode updates and deletes rewrite the
+    file atomically (temp file + os.replace).
+
+    In log mode every insert, update and delete is appended to "<file>.log"
+    as one JSON line. The first line names the inode of the base CSV it
+    applies to; compaction swaps in a new base file (new inode), so a log
+    left behind by an interrupted compaction is recognised and ignored.
+    """
+
+    name = "csv"
+
+    @staticmethod
+    def _file_signature(file_path: str) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def signature(self, file_path: str) -> Optional[Tuple]:
+        # stat identity of the base CSV followed by that of its change log
+        base = self._file_signature(file_path)
+        if base is None:
+            return None
+        return base + (self._file_signature(self._log_path(file_path)) or (0, 0, 0))
+
+    @staticmethod
+    def _snapshot_lines(f) -> Iterator[str]:
+        """
+        Lines of the binary file f as of when this is first advanced. Bytes
+        appended afterwards are not read, and a last line still being
+        appended by another process (no newline yet, file growing) is left out.
+        """
+        size = os.fstat(f.fileno()).st_size
+        read = 0
+        for line in f:
+            read += len(line)
+            if read > size:
+                break
+            if not line.endswith(b"\n") and os.fstat(f.fileno()).st_size > size:
+                break
+            yield line.decode()
+
+    @staticmethod
+    def _parallel(f) -> bool:
+        threshold = config.PARALLEL_LOAD_BYTES
+        return 0 < threshold <= os.fstat(f.fileno()).st_size and parallel_csv.workers() > 1
+
+    def load(self, file_path: str, make_table: Callable):
+        with metrics.measure("csv.load") as span, open(file_path, "rb") as f:
+            parsed = None
+            if self._parallel(f):
+                try:
+                    parsed = parallel_csv.load(f)
+                except parallel_csv.FileReplaced:
+                    # a writer swapped the file in; f still holds the snapshot we opened
+                    f.seek(0)
+            if parsed is not None:
+                header, rows, size = parsed
+            else:
+                reader = csv.DictReader(self._snapshot_lines(f))
+                rows = list(reader)
+                header = list(reader.fieldnames or [])
+                size = f.tell()
+            span.add(rows=len(rows), bytes_read=size)
+        table = make_table(header, rows)
+        for record in self._read_log(file_path):
+            self._apply(table, record)
+        table.maybe_vacuum()
+        return table
+
+    def header(self, file_path: str) -> Optional[List[str]]:
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path, "r", newline="") as f:
+            line = f.readline().strip()
+            return line.split(",") if line else None
+
+    def ensure_table(self, file_path: str, fieldnames: Iterable[str]) -> None:
+        # If file missing -> create with header
+        if not os.path.isfile(file_path):
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            with open(file_path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+            return
+
+        # If file exists but header missing -> rewrite with header (rare)
+        with open(file_path, "r", newline="") as f:
+            first_line = f.readline().strip()
+        if not first_line:
+            with open(file_path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+
+    def pending(self, file_path: str) -> bool:
+        return os.path.exists(self._log_path(file_path))
+
+    def scan(self, file_path: str, where: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, str]]:
+        if not os.path.isfile(file_path):
+            return
+        tests = list(where.items()) if where else []
+        with open(file_path, "rb") as f:
+            try:
+                for row in csv.DictReader(self._snapshot_lines(f)):
+                    if all(row.get(k) == v for k, v in tests):
+                        yield row
+            finally:
+                metrics.count("csv.scan", bytes_read=f.tell())
+
+    def insert(self, file_path: str, header: List[str], rows: List[Dict[str, str]]) -> None:
+        if config.LOG_MODE:
+            self._append_log(file_path, [{"op": "insert", "row": row} for row in rows])
+            return
+        # Rows are appended to the base file directly, which is only correct
+        # once no pending log records remain to be replayed after them.
+        if self.pending(file_path):
+            table = self.load(file_path, _ReplayTable)
+            self.compact(file_path, table.header, table.live_rows())
+        # One write call, so lock-free readers see all of the new lines or none
+        buf = io.StringIO(newline="")
+        csv.DictWriter(buf, fieldnames=header).writerows(rows)
+        data = buf.getvalue().encode()
+        with open(file_path, "ab") as f:
+            f.write(data)
+        metrics.count("csv.append", rows=len(rows), bytes_written=len(data))
+
+    def update(
+        self, file_path: str, header: List[str], key: str, value: str, changes: Dict[str, str], rows_after: Rows
+    ) -> None:
+        if config.LOG_MODE:
+            self._append_log(file_path, [{"op": "update", "key": key, "value": value, "data": changes}])
+        else:
+            self._rewrite(file_path, header, rows_after())
+
+    def update_many(
+        self, file_path: str, header: List[str], key: str, updates: Dict[str, Dict[str, str]], rows_after: Rows
+    ) -> None:
+        if config.LOG_MODE:
+            # One record, so a crash mid-append loses the whole batch or none of it
+            self._append_log(file_path, [{"op": "update_many", "key": key, "updates": updates}])
+        else:
+            self._rewrite(file_path, header, rows_after())
+
+    def delete(self, file_path: str, header: List[str], key: str, value: str, rows_after: Rows) -> None:
+        if config.LOG_MODE:
+            self._append_log(file_path, [{"op": "delete", "key": key, "value": value}])
+        else:
+            self._rewrite(file_path, header, rows_after())
+
+    def drop(self, file_path: str) -> None:
+        for path in (file_path, self._log_path(file_path)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def needs_compaction(self, file_path: str) -> bool:
+        try:
+            log_size = os.path.getsize(self._log_path(file_path))
+            base_size = os.path.getsize(file_path)
+        except OSError:
+            return False
+        return log_size >= config.COMPACT_MAX_BYTES or (
+            log_size >= config.COMPACT_MIN_BYTES and log_size >= config.COMPACT_RATIO * base_size
+        )
+
+    def compact(self, file_path: str, header: List[str], rows: Iterable[Dict[str, str]]) -> None:
+        if self.pending(file_path):
+            self._rewrite(file_path, header, rows)
+
+    def _rewrite(self, file_path: str, header: List[str], rows: Iterable[Dict[str, str]]) -> None:
+        """Replace file_path atomically with header + rows and retire its change log."""
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with metrics.measure("csv.rewrite") as span, os.fdopen(fd, "w", newline="") as f:
+                keep_mode(f.fileno(), file_path)
+                writer = csv.DictWriter(f, fieldnames=header)
+                writer.writeheader()
+                writer.writerows(rows)
+                f.flush()
+                os.fsync(f.fileno())
+                span.add(bytes_written=f.tell())
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._fsync_dir(directory)
+        try:
+            os.remove(self._log_path(file_path))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _fsync_dir(directory: str) -> None:
+        # Make the rename itself durable; not every platform can open a directory
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    # CHANGE LOG
+    @staticmethod
+    def _log_path(file_path: str) -> str:
+        return file_path + ".log"
+
+    def _log_base(self, file_path: str) -> Optional[int]:
+        """Inode of the base file the existing log was written against."""
+        try:
+            with open(self._log_path(file_path), "r") as f:
+                return json.loads(f.readline()).get("ino")
+        except (OSError, ValueError):
+            return None
+
+    def _read_log(self, file_path: str) -> List[Dict[str, object]]:
+        try:
+            with open(self._log_path(file_path), "r") as f:
+                lines = f.read().split("\n")
+        except FileNotFoundError:
+            return []
+        records = []
+        for line in lines:
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A line torn by a crash mid-append; nothing after it depends on it
+                continue
+        if not records or records[0].get("op") != "base" or records[0].get("ino") != os.stat(file_path).st_ino:
+            return []
+        return records[1:]
+
+    def _append_log(self, file_path: str, records: List[Dict[str, object]]) -> None:
+        ino = os.stat(file_path).st_ino
+        lines = []
+        if self._log_base(file_path) != ino:
+            lines.append(json.dumps({"op": "base", "ino": ino}))
+            mode = "w"
+        else:
+            mode = "a"
+        lines.extend(json.dumps(r) for r in records)
+        data = ("\n".join(lines) + "\n").encode()
+        with open(self._log_path(file_path), mode + "+b") as f:
+            # Finish a line torn by a crash mid-append, or the first new
+            # record would be glued to it and dropped with it on replay
+            if mode == "a" and f.tell() and os.pread(f.fileno(), 1, f.tell() - 1) != b"\n":
+                data = b"\n" + data
+            f.write(data)
+        metrics.count("csv.log", rows=len(records), bytes_written=len(data))
+
+    @staticmethod
+    def _apply(table, record: Dict[str, object]) -> None:
+        op = record["op"]
+        if op == "insert":
+            table.append(record["row"])
+        elif op == "update":
+            for pos in table.positions(record["key"], record["value"]):
+                table.replace(pos, {**table.rows[pos], **record["data"]})
+        elif op == "update_many":
+            key, updates = record["key"], record["updates"]
+            for pos, row in enumerate(table.rows):
+                if row is not None and row.get(key) in updates:
+                    table.replace(pos, {**row, **updates[row[key]]})
+        elif op == "delete":
+            for pos in table.positions(record["key"], record["value"]):
+                table.remove(pos)
+
+
+class _ReplayTable:
+    """Bare table used to merge a change log outside the FileHandler cache."""
+
+    def __init__(self, header: List[str], rows: List[Optional[Dict[str, str]]]):
+        self.header = header
+        self.rows = rows
+
+    def positions(self, column: str, value: str) -> List[int]:
+        return [p for p, r in enumerate(self.rows) if r is not None and r.get(column) == value]
+
+    def append(self, row: Dict[str, str]) -> None:
+        self.rows.append(row)
+
+    def replace(self, pos: int, row: Dict[str, str]) -> None:
+        self.rows[pos] = row
+
+    def remove(self, pos: int) -> None:
+        self.rows[pos] = None
+
+    def maybe_vacuum(self) -> None:
+        pass  # holes are skipped by live_rows()
+
+    def live_rows(self) -> List[Dict[str, str]]:
+        return [r for r in self.rows if r is not None]
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SqliteEngine(StorageEngine):
+    """
+    Every table of a data directory in one SQLite database, config.SQLITE_DB_NAME,
+    next to the CSV files (data/students.csv -> table "students" in
+    data/checkmygrade.db). Columns are TEXT and rows come back in insertion
+    (rowid) order, as they would from the CSV file. The database runs in WAL
+    mode, so readers do not block the writer, and a column gets an SQL index
+    the first time it is used to filter, update or delete rows.
+    """
+
+    name = "sqlite"
+
+    def __init__(self):
+        # SQLite connections cannot be shared between threads; each thread opens its own
+        self._local = threading.local()
+        self._writes: Dict[Tuple[str, str], int] = {}
+        self._indexed: Set[Tuple[str, str, str]] = set()
+
+    @property
+    def _connections(self) -> Dict[str, sqlite3.Connection]:
+        if not hasattr(self._local, "connections"):
+            self._local.connections = {}
+        return self._local.connections
+
+    @property
+    def _files(self) -> Dict[str, Tuple[int, int]]:
+        # db path -> (st_dev, st_ino) this thread's connection was opened at
+        if not hasattr(self._local, "files"):
+            self._local.files = {}
+        return self._local.files
+
+    @staticmethod
+    def _locate(file_path: str) -> Tuple[str, str]:
+        path = os.path.abspath(file_path)
+        table = re.sub(r"\W", "_", os.path.splitext(os.path.basename(path))[0])
+        return os.path.join(os.path.dirname(path), config.SQLITE_DB_NAME), table
+
+    def _connect(self, db: str, create: bool = False) -> Optional[sqlite3.Connection]:
+        """Connection to db, reopened if the file was replaced; None if db is missing and create is False."""
+        try:
+            st = os.stat(db)
+            ident = (st.st_dev, st.st_ino)
+        except OSError:
+            ident = None
+        conn = self._connections.get(db)
+        if conn is not None and ident is not None and self._files.get(db) == ident:
+            return conn
+        self._disconnect(db)
+        if ident is None and not create:
+            return None
+
+        os.makedirs(os.path.dirname(db), exist_ok=True)
+        # Autocommit connection; writes open explicit transactions
+        conn = sqlite3.connect(db, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        st = os.stat(db)
+        self._connections[db] = conn
+        self._files[db] = (st.st_dev, st.st_ino)
+        return conn
+
+    def _disconnect(self, db: str) -> None:
+        conn = self._connections.pop(db, None)
+        if conn is not None:
+            conn.close()
+        self._files.pop(db, None)
+        self._indexed = {k for k in self._indexed if k[0] != db}
+
+    def close(self) -> None:
+        """Close the calling thread's connections."""
+        for db in list(self._connections):
+            self._disconnect(db)
+
+    @contextmanager
+    def _transaction(self, conn: sqlite3.Connection, db: str, table: str):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        # data_version only moves for commits made by other connections
+        self._writes[(db, table)] = self._writes.get((db, table), 0) + 1
+
+    @staticmethod
+    def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+        return [r[1] for r in conn.execute(f"PRAGMA table_info({_quote(table)})")]
+
+    def _index(self, conn: sqlite3.Connection, db: str, table: str, column: str) -> None:
+        if (db, table, column) in self._indexed:
+            return
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {_quote(table + '_' + column + '_idx')} "
+            f"ON {_quote(table)} ({_quote(column)})"
+        )
+        self._indexed.add((db, table, column))
+
+    def signature(self, file_path: str) -> Optional[Tuple]:
+        db, table = self._locate(file_path)
+        conn = self._connect(db)
+        if conn is None:
+            return None
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if exists is None:
+            return None
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        return self._files[db] + (version, self._writes.get((db, table), 0))
+
+    def load(self, file_path: str, make_table: Callable):
+        db, table = self._locate(file_path)
+        conn = self._connect(db)
+        header = self._columns(conn, table)
+        with metrics.measure("sqlite.load") as span:
+            cursor = conn.execute(f"SELECT * FROM {_quote(table)} ORDER BY rowid")
+            rows = [dict(zip(header, values)) for values in cursor]
+            span.add(rows=len(rows))
+        return make_table(header, rows)
+
+    def header(self, file_path: str) -> Optional[List[str]]:
+        db, table = self._locate(file_path)
+        conn = self._connect(db)
+        if conn is None:
+            return None
+        return self._columns(conn, table) or None
+
+    def ensure_table(self, file_path: str, fieldnames: Iterable[str]) -> None:
+        db, table = self._locate(file_path)
+        conn = self._connect(db, create=True)
+        columns = ", ".join(f"{_quote(c)} TEXT" for c in fieldnames)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({columns})")
+
+    def scan(self, file_path: str, where: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, str]]:
+        if self.signature(file_path) is None:
+            return
+        db, table = self._locate(file_path)
+        conn = self._connect(db)
+        sql = f"SELECT * FROM {_quote(table)}"
+        params: List[str] = []
+        if where:
+            if not set(where) <= set(self._columns(conn, table)):
+                return
+            for column in where:
+                self._index(conn, db, table, column)
+            sql += " WHERE " + " AND ".join(f"{_quote(c)} = ?" for c in where)
+            params = list(where.values())
+        cursor = conn.execute(sql + " ORDER BY rowid", params)
+        header = [d[0] for d in cursor.description]
+        for values in cursor:
+            yield dict(zip(header, values))
+
+    def insert(self, file_path: str, header: List[str], rows: List[Dict[str, str]]) -> None:
+        db, table = self._locate(file_path)
+        conn = self._connect(db)
+        sql = (
+            f"INSERT INTO {_quote(table)} ({', '.join(map(_quote, header))}) "
+            f"VALUES ({', '.join('?' * len(header))})"
+        )
+        with metrics.measure("sqlite.insert") as span, self._transaction(conn, db, table):
+            conn.executemany(sql, ([row.get(h) for h in header] for row in rows))
+            span.add(rows=len(rows))
+
+    def update(
+        self, file_path: str, header: List[str], key: str, value: str, changes: Dict[str, str], rows_after: Rows
+    ) -> None:
+        db, table = self._locate(file_path)
+        conn = self._connect(db)
+        self._index(conn, db, table, key)
+        assignments = ", ".join(f"{_quote(c)} = ?" for c in changes)
+        with self._transaction(conn, db, table):
+            conn.execute(
+                f"UPDATE {_quote(table)} SET {assignments} WHERE {_quote(key)} = ?",
+                list(changes.values()) + [value],
+            )
+
+    def update_many(
+        self, file_path: str, header: List[str], key: str, updates: Dict[str, Dict[str, str]], rows_after: Rows
+    ) -> None:
+        db, table = self._locate(file_path)
+        conn = self._connect(db)
+        self._index(conn, db, table, key)
+        # One executemany per distinct set of changed columns, all in one transaction
+        groups: Dict[Tuple[str, ...], List[List[str]]] = {}
+        for value, changes in updates.items():
+            groups.setdefault(tuple(changes), []).append(list(changes.values()) + [value])
+        with metrics.measure("sqlite.update_many") as span, self._transaction(conn, db, table):
+            for columns, params in groups.items():
+                assignments = ", ".join(f"{_quote(c)} = ?" for c in columns)
+                conn.executemany(f"UPDATE {_quote(table)} SET {assignments} WHERE {_quote(key)} = ?", params)
+            span.add(rows=len(updates))
+
+    def delete(self, file_path: str, header: List[str], key: str, value: str, rows_after: Rows) -> None:
+        db, table = self._locate(file_path)
+        conn = self._connect(db)
+        self._index(conn, db, table, key)
+        with self._transaction(conn, db, table):
+            conn.execute(f"DELETE FROM {_quote(table)} WHERE {_quote(key)} = ?", (value,))
+
+    def drop(self, file_path: str) -> None:
+        db, table = self._locate(file_path)
+        conn = self._connect(db)
+        if conn is None:
+            return
+        with self._transaction(conn, db, table):
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+        self._indexed = {k for k in self._indexed if k[:2] != (db, table)}
+
+
+ENGINES = {"csv": CsvEngine, "sqlite": SqliteEngine}
+_engines: Dict[str, StorageEngine] = {}
+
+
+def get_engine(name: str) -> StorageEngine:
+    """The shared instance of the engine registered as name in ENGINES."""
+    engine = _engines.get(name)
+    if engine is None:
+        if name not in ENGINES:
+            raise ValueError(f"Unknown storage engine {name!r}; choose from {', '.join(sorted(ENGINES))}")
+        engine = _engines[name] = ENGINES[name]()
+    return engine
+
+
+def migrate(file_path: str, source: StorageEngine, target: StorageEngine, replace: bool = False) -> int:
+    """
+    Copy the table stored for file_path from source into target and return
+    the number of rows copied. Refuses to overwrite an existing target table
+    unless replace is True.
+    """
+    if source.signature(file_path) is None:
+        return 0
+    if target.signature(file_path) is not None:
+        if not replace:
+            raise ValueError(f"{file_path} already exists in the {target.name} store")
+        target.drop(file_path)
+    table = source.load(file_path, _ReplayTable)
+    rows = table.live_rows()
+    target.ensure_table(file_path, table.header)
+    if rows:
+        target.insert(file_path, table.header, rows)
+    return len(rows)